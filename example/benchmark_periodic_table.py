@@ -0,0 +1,76 @@
+"""
+Benchmark the import of the periodic table and the lookups of the element properties,
+the precompiled numeric table against the full json file.
+    python benchmark_periodic_table.py --natoms 1000
+"""
+import sys
+import time
+import argparse
+import subprocess
+import numpy as np
+
+def timeit(func, repeat = 5):
+    """
+    Return the best wall time of repeat calls of func (s).
+    """
+    best = np.inf
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def import_time(module, repeat = 5):
+    """
+    Return the best cumulative import time of a module in a fresh interpreter,
+    measured with -X importtime (s).
+    """
+    best = np.inf
+    for i in range(repeat):
+        out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                             capture_output = True, text = True, check = True).stderr
+        for line in out.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                best = min(best, int(fields[1]) * 1e-6)
+    return best
+
+def load_time(pt, repeat = 5):
+    """
+    Return the best time of loading and decoding the full json file (s).
+    """
+    def load():
+        pt._pt_data = None
+        pt.load_data()
+    return timeit(load, repeat)
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('--natoms', type = int, default = 1000)
+    args = parser.parse_args()
+
+    from vasplib.core import periodic_table as pt
+    from vasplib.core.structure import Structure
+
+    print('import time (s)')
+    print('{:>40s} {:10.4f}'.format('vasplib.core.periodic_table', import_time('vasplib.core.periodic_table')))
+    print('{:>40s} {:10.4f}'.format('json.load of periodic_table.json', load_time(pt)))
+
+    symbols = ['Li', 'Co', 'O']
+    data = pt.load_data()
+    nloop = 10000
+    print('per-call time (us)')
+    rows = [('json dict lookup of 3 elements', timeit(lambda: [data[s]['Atomic mass'] for s in symbols * nloop])),
+            ('Element().get_attr() of 3 elements', timeit(lambda: [pt.Element(s).get_attr('Atomic mass') for s in symbols * nloop])),
+            ('atomic_masses() of 3 elements', timeit(lambda: [pt.atomic_masses(symbols) for i in range(nloop)]))]
+    for label, seconds in rows:
+        print('{:>40s} {:10.3f}'.format(label, seconds / nloop * 1e6))
+
+    rng = np.random.default_rng(0)
+    n = args.natoms // 3
+    struct = Structure.from_arrays(np.identity(3) * 20, rng.random((3 * n, 3)), symbols, [n] * 3)
+    print('{:>40s} {:10.3f}'.format('Structure.molar_mass', timeit(lambda: [struct.molar_mass for i in range(1000)]) * 1e3))
+    print('{:>40s} {:10.3f}'.format('Structure.mass_center()', timeit(lambda: [struct.mass_center() for i in range(1000)]) * 1e3))
+
+if __name__ == '__main__':
+    main()
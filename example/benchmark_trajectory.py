@@ -0,0 +1,66 @@
+"""
+Benchmark the reads of the binary trajectory format against the XDATCAR text format.
+    python benchmark_trajectory.py --natoms 200 --nframes 5000
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from vasplib.output.xdatcar import Xdatcar
+from vasplib.output.trajectory import convert_xdatcar
+
+def timeit(func, repeat = 3):
+    """
+    Return the best wall time of repeat calls of func (s).
+    """
+    best = np.inf
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def write_xdatcar(filename, natoms, nframes):
+    """
+    Write a random trajectory in the XDATCAR format.
+    """
+    rng = np.random.default_rng(0)
+    with open(filename, 'w') as fp:
+        fp.write('benchmark\n 1.0\n 10.0 0.0 0.0\n 0.0 10.0 0.0\n 0.0 0.0 10.0\n')
+        fp.write(' Li O\n {} {}\n'.format(natoms // 2, natoms - natoms // 2))
+        for i in range(nframes):
+            fp.write('Direct configuration= {:5d}\n'.format(i + 1))
+            np.savetxt(fp, rng.random((natoms, 3)), fmt = '%12.8f')
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('--natoms', type = int, default = 200)
+    parser.add_argument('--nframes', type = int, default = 5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, 'XDATCAR')
+        write_xdatcar(fname, args.natoms, args.nframes)
+        xdatcar = Xdatcar(fname)
+        frames = np.sort(np.random.default_rng(1).choice(args.nframes, 100, replace = False))
+
+        rows = [('XDATCAR', os.path.getsize(fname),
+                 timeit(lambda: xdatcar.trajectory()),
+                 timeit(lambda: [xdatcar.trajectory(i, i + 1) for i in frames]))]
+        for dtype, compress in [(np.float64, 0), (np.float32, 0), (np.float64, 1), (np.float32, 1)]:
+            out = os.path.join(tmp, 'traj.vlt')
+            convert = timeit(lambda: convert_xdatcar(xdatcar, out, dtype, compress), repeat = 1)
+            traj = convert_xdatcar(xdatcar, out, dtype, compress)
+            label = '{} {}'.format(np.dtype(dtype).name, 'zlib' if compress else 'raw')
+            rows.append((label, os.path.getsize(out),
+                         timeit(lambda: traj.trajectory()),
+                         timeit(lambda: [traj.trajectory(i, i + 1) for i in frames])))
+            print('conversion to {}: {:.3f} s'.format(label, convert))
+
+        print('{:<16}{:>12}{:>14}{:>18}'.format('format', 'size (MB)', 'full read (s)', '100 frames (s)'))
+        for label, size, full, random in rows:
+            print('{:<16}{:>12.1f}{:>14.3f}{:>18.3f}'.format(label, size / 2**20, full, random))
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from vasplib.analysis.build import Build
+from vasplib.analysis.build import Build, lattice_points
 from vasplib.core.structure import Structure
 import unittest
 import os
@@ -27,6 +27,10 @@ class TestPeriodicTableClass(unittest.TestCase):
         s.supercell([2,2,1])
         self.assertTrue(np.allclose(s.lattice[0], [6.1473603, 0., 0,]))
         self.assertTrue(np.allclose(s.atoms_flat[-1]['coord'], [1.53683856, 4.43647595, 1.76717472]))
+        self.assertTrue(np.allclose(s.coords[4:8], [[1.53684163, 0.88729405, 1.76717472],
+                                                    [-0.00000152, 1.77459085, 1.76717472],
+                                                    [0.00000155, 3.54917916, 1.76717472],
+                                                    [-1.5368416, 4.43647595, 1.76717472]]))
 
         # test Build.supercell inplace, direct style
         sd = Build()
@@ -39,3 +43,40 @@ class TestPeriodicTableClass(unittest.TestCase):
         s2 = s.supercell([2,2,1], inplace = False)
         self.assertAlmostEqual(s.atoms_flat[1]['coord'][2], 1.767174721)
         self.assertTrue(np.allclose(s2.atoms_flat[-1]['coord'], [1.53683856, 4.43647595, 1.76717472]))
+
+    def test_supercell_matrix(self):
+        rng = np.random.default_rng(0)
+        lattice = np.array([[3.0, 0, 0], [0.5, 3.2, 0], [0.3, 0.2, 3.5]])
+        s = Build.from_arrays(lattice, rng.random((4, 3)), ['Li', 'O'], [1, 3])
+        self.assertEqual(len(lattice_points([[2, 1, -1], [0, 1, 3], [1, 0, 1]])), 6)
+
+        # test Build.supercell with a general matrix, direct and cart style
+        P = [[1, 1, 0], [-1, 1, 0], [0, 0, 2]]
+        for coord_type in ['direct', 'cart']:
+            if coord_type == 'cart':
+                s.direct_to_cart()
+            s2 = s.supercell(P, inplace = False)
+            self.assertEqual(s2.atom_nums, 16)
+            self.assertEqual([atom['num'] for atom in s2.atoms], [4, 12])
+            self.assertTrue(np.allclose(s2.lattice, np.matmul(P, lattice)))
+            # every atom is an image of the atom it comes from, no two images coincide
+            frac = np.matmul(s2.cartesian_coords(), s.inv_lattice)
+            diff = frac - s.direct_coords()[[0, 0, 0, 0] + [1, 2, 3] * 4]
+            self.assertTrue(np.allclose(diff, np.round(diff)))
+            d = s2.distance_matrix()
+            self.assertGreater(np.min(d + np.eye(16) * 10), 0.1)
+
+        # a diagonal matrix is the same as the duplicates, cell by cell inside each block
+        expected = []
+        for k in range(2):
+            block = s.cartesian_coords()[s.species == k]
+            for i in range(2):
+                for j in range(1):
+                    for l in range(3):
+                        expected.append(block + np.matmul([i, j, l], lattice))
+        s3 = s.supercell([2, 1, 3], inplace = False)
+        self.assertTrue(np.allclose(s3.cartesian_coords(), np.concatenate(expected)))
+        self.assertTrue(np.allclose(s.supercell(np.diag([2, 1, 3]), inplace = False).coords,
+                                    s.supercell([2, 1, 3], inplace = False).coords))
+        with self.assertRaises(ValueError):
+            s.supercell([[1, 1, 0], [1, 1, 0], [0, 0, 1]])
@@ -0,0 +1,43 @@
+import os
+import itertools
+import unittest
+import vasplib
+import numpy as np
+from vasplib.analysis.build import Build
+from vasplib.analysis.configuration import Configurations
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        m = Build()
+        m.from_POSCAR(os.path.join(os.path.dirname(vasplib.__file__),'../test/analysis/POSCAR'))
+        sc = m.supercell([2, 2, 2], inplace = False)
+
+        # test the numbers of classes against Burnside's lemma and a brute-force search
+        configs = Configurations(sc, [('B', 'C', 2), ('Mg', None, 1)])
+        self.assertEqual(len(configs.permutations), 192)
+        found = list(configs)
+        self.assertEqual(len(found), 14)
+        self.assertEqual(configs.count(), 14)
+        self.assertEqual(configs.count(symmetry = False), 8 * 120)
+        classes = set()
+        perms = configs.permutations
+        for c, v in itertools.product(itertools.combinations(range(8, 24), 2), range(8)):
+            classes.add(min((tuple(sorted(p[list(c)])), p[v]) for p in perms))
+        self.assertEqual(len(classes), 14)
+        self.assertEqual(len({min((tuple(sorted(p[list(c)])), p[v[0]]) for p in perms) for c, v in found}), 14)
+
+        # overlapping sublattices and the translation group
+        configs = Configurations(sc, [('B', 'C', 3), (list(range(12)), None, 2)], group = 'translation')
+        self.assertEqual(sum(1 for config in configs), configs.count())
+        self.assertEqual(Configurations(sc, [('B', 'C', 2)], group = None).count(), 120)
+
+        # test the structures
+        config = found[3]
+        s = Configurations(sc, [('B', 'C', 2), ('Mg', None, 1)], group = None).structure(config)
+        self.assertEqual(s.elements, ['Mg', 'B', 'C'])
+        self.assertEqual([atom['num'] for atom in s.atoms], [7, 14, 2])
+        self.assertTrue(np.allclose(s.coords[-2:], sc.coords[list(config[0])]))
+        with self.assertRaises(ValueError):
+            Configurations(sc, [('B', 'C', 17)])
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import vasplib
+from vasplib.output.xdatcar import Xdatcar
+from vasplib.analysis.diffusion import unwrap, xdatcar_positions, msd_fft, species_msd, fit_diffusion, diffusion_analysis
+import numpy as np
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        rng = np.random.default_rng(0)
+        lattice = np.array([[8.0, 0, 0], [2.0, 8.0, 0], [0, 0, 9.0]])
+
+        # Test unwrap: a random walk wrapped into the cell
+        steps = 0.02 * rng.standard_normal((300, 10, 3))
+        frac = np.cumsum(steps, axis = 0) + rng.random((10, 3))
+        positions = unwrap(frac % 1, lattice = lattice, chunk = 64)
+        self.assertTrue(np.allclose(positions, np.matmul(frac - np.floor(frac[0]), lattice)))
+
+        # Test msd_fft against the direct average over the time origins
+        msd = msd_fft(positions, chunk = 3)
+        for m in [0, 1, 17, 299]:
+            direct = np.mean(np.sum((positions[m:] - positions[:300 - m])**2, axis = 2), axis = 0)
+            self.assertTrue(np.allclose(msd[m], direct))
+
+        msd = species_msd(msd, [{'element': 'Li', 'num': 4}, {'element': 'O', 'num': 6}])
+        self.assertEqual(msd['Li'].shape, (300,))
+
+        # Test fit_diffusion: MSD = 6 D t
+        time = np.arange(100) * 2.0
+        self.assertAlmostEqual(fit_diffusion(time, 6 * 0.5 * time + 1), 0.05)
+        with self.assertRaises(ValueError):
+            fit_diffusion(time[:3], time[:3])
+
+        # Test diffusion_analysis on an XDATCAR file
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, 'XDATCAR')
+            with open(fname, 'w') as fp:
+                fp.write('walk\n 1.0\n')
+                fp.write(''.join(' {:.6f} {:.6f} {:.6f}\n'.format(*v) for v in lattice))
+                fp.write(' Li O\n 4 6\n')
+                for i, frame in enumerate(frac % 1):
+                    fp.write('Direct configuration= {:5d}\n'.format(i + 1))
+                    fp.write(''.join(' {:.10f} {:.10f} {:.10f}\n'.format(*v) for v in frame))
+            # read and unwrapped chunk by chunk into the memory-mapped file
+            positions = xdatcar_positions(Xdatcar(fname), memmap = os.path.join(tmp, 'walk.npy'), chunk = 64)
+            self.assertIsInstance(positions, np.memmap)
+            self.assertTrue(np.allclose(positions, np.matmul(frac - np.floor(frac[0]), lattice), atol = 1e-6))
+            backward = xdatcar_positions(Xdatcar(fname), -1, None, -3, chunk = 7)
+            self.assertTrue(np.allclose(backward - backward[0], positions[::-3] - positions[-1], atol = 1e-6))
+            del positions
+            results = diffusion_analysis(Xdatcar(fname), dt = 1.0, nblocks = 3,
+                    memmap = os.path.join(tmp, 'positions.npy'))
+            self.assertEqual(sorted(results), ['Li', 'O'])
+            self.assertEqual(results['O']['msd'].shape, (100,))
+            # D = <dx^2> / (2 dt) per direction, in cm^2/s
+            expected = np.mean(np.sum(np.matmul(steps, lattice)**2, axis = 2)) / 6 * 0.1
+            self.assertAlmostEqual(results['O']['D'] / expected, 1, delta = 0.5)
+            self.assertTrue(results['O']['D_err'] > 0)
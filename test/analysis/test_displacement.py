@@ -0,0 +1,57 @@
+import os
+import copy
+import tempfile
+import unittest
+import vasplib
+import numpy as np
+from vasplib.analysis.build import Build
+from vasplib.core.structure import Structure
+from vasplib.analysis.displacement import DisplacedStructure, displacements, write_displacements
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        s = Build()
+        s.from_POSCAR(os.path.join(os.path.dirname(vasplib.__file__),'../test/analysis/POSCAR'))
+        sc = s.supercell([2, 2, 2], inplace = False)
+        coords = sc.coords.copy()
+
+        # test the copy on write of the displaced structures
+        d = DisplacedStructure(sc, 3, [0, 0.1, 0.2])
+        self.assertIs(d.lattice, sc.lattice)
+        self.assertTrue(np.allclose(d.coords[3], coords[3] + [0, 0.1, 0.2]))
+        d.coords[4] += 1
+        self.assertTrue(np.array_equal(sc.coords, coords))
+        c = copy.deepcopy(d)
+        self.assertIs(type(c), Structure)
+        self.assertTrue(np.array_equal(c.coords, d.coords))
+        self.assertTrue(np.allclose(d.distance_matrix(), c.distance_matrix()))
+
+        # test the sets: all the atoms along +-x, y and z, or reduced by symmetry
+        self.assertEqual(len(list(displacements(sc, 0.01))), 6 * sc.atom_nums)
+        reduced = [(x.index, x.displacement.tolist()) for x in displacements(sc, 0.01, symmetry = True)]
+        labels = [sc.symbols[index] for index, displacement in reduced]
+        self.assertEqual(labels, ['Mg', 'Mg', 'B', 'B'])
+        self.assertEqual([displacement for index, displacement in reduced][:2], [[0.01, 0, 0], [0, 0, 0.01]])
+
+        # test the streaming write-out, the spliced lines against the full structures
+        with tempfile.TemporaryDirectory() as tmp:
+            records = write_displacements(sc, os.path.join(tmp, 'disp-{:03d}/POSCAR'), 0.02, atoms = [0, 5],
+                                          nthreads = 2)
+            self.assertEqual(len(records), 12)
+            filename, index, displacement = records[7]
+            self.assertEqual(index, 5)
+            self.assertTrue(np.allclose(displacement, [-0.02, 0, 0]))
+            r = Structure()
+            r.from_POSCAR(filename)
+            expected = coords.copy()
+            expected[5] += displacement
+            self.assertTrue(np.allclose(r.coords, expected))
+
+            # the formatted rows of the parent follow its in-place changes
+            sc.atoms[0]['coords'][0] += 0.25
+            d = DisplacedStructure(sc, 1, [0, 0, 0.1])
+            d.write_POSCAR(os.path.join(tmp, 'POSCAR'))
+            r.from_POSCAR(os.path.join(tmp, 'POSCAR'))
+            self.assertTrue(np.allclose(r.coords, d.coords))
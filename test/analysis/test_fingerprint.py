@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+from vasplib.analysis.build import Build
+from vasplib.analysis.fingerprint import composition, fingerprint, FingerprintIndex, deduplicate
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        rng = np.random.default_rng(0)
+        lattice = np.array([[4.0, 0, 0], [1.0, 4.5, 0], [0.5, 0.8, 5.0]])
+        frac = rng.random((6, 3))
+        s = Build.from_arrays(lattice, frac, ['Li', 'O'], [2, 4])
+        self.assertEqual(composition(s.symbols), (('Li', 1), ('O', 2)))
+
+        # Test the invariance to permutations, species blocks, translations,
+        # rotations and supercells
+        fp = fingerprint(s)
+        self.assertEqual(fp.shape, (3 * 30,))
+        order = np.array([3, 0, 5, 2, 1, 4])
+        p = Build.from_arrays(lattice, (frac[order] + 0.3) % 1, ['O', 'Li', 'O', 'Li', 'O'],
+                              [1, 1, 2, 1, 1])
+        self.assertTrue(np.allclose(fingerprint(p), fp, atol = 1e-6))
+        theta = 0.4
+        rotation = np.array([[np.cos(theta), np.sin(theta), 0], [-np.sin(theta), np.cos(theta), 0], [0, 0, 1]])
+        r = Build.from_arrays(np.matmul(lattice, rotation), frac, ['Li', 'O'], [2, 4])
+        self.assertLess(np.sum(np.abs(fingerprint(r) - fp)) / np.sum(fp), 1e-3)
+        sc = s.supercell([2, 1, 1], inplace = False)
+        self.assertEqual(composition(sc.symbols), composition(s.symbols))
+        self.assertTrue(np.allclose(fingerprint(sc), fp, atol = 1e-6))
+
+        # a commensurate cell, the neighbors at exactly rmax fall out of the grid
+        cubic = Build.from_arrays(np.eye(3) * 3.0, [[0, 0, 0]], ['Li'], [1])
+        fp = fingerprint(cubic, rmax = 3.0, nbins = 30)
+        self.assertEqual(fp.shape, (30,))
+        self.assertEqual(np.sum(fp), 0)
+        self.assertTrue(np.allclose(fingerprint(cubic, rmax = 3.5, nbins = 7), [0] * 6 + [6]))
+
+        # Test the index and the deduplication, serial and parallel
+        other = Build.from_arrays(lattice, rng.random((6, 3)), ['Li', 'O'], [2, 4])
+        index = FingerprintIndex()
+        self.assertEqual(index.add(s), (0, True))
+        self.assertEqual(index.add(other), (1, True))
+        self.assertEqual(index.add(p), (0, False))
+        self.assertEqual(len(index), 2)
+        structures = [s, other, p, sc, other]
+        unique, labels = deduplicate(structures)
+        self.assertEqual(unique, [0, 1])
+        self.assertEqual(labels.tolist(), [0, 1, 0, 0, 1])
+        unique, labels = deduplicate(structures, nprocs = 2, chunk = 2)
+        self.assertEqual(labels.tolist(), [0, 1, 0, 0, 1])
+        # an exact comparison refusing every match
+        unique, labels = deduplicate(structures, compare = lambda s1, s2: False)
+        self.assertEqual(unique, [0, 1, 2, 3, 4])
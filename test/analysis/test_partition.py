@@ -0,0 +1,40 @@
+import os
+import unittest
+import vasplib
+from vasplib.output.chgcar import Chgcar
+from vasplib.analysis.partition import partition_charge
+import numpy as np
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        chg = Chgcar(os.path.join(os.path.dirname(vasplib.__file__),'../test/output/CHGCAR'))
+        density = chg.getChargeDensity()
+        volume = np.linalg.det(chg.struct.lattice)
+
+        # Test the periodic Voronoi partition against a brute-force minimum image search
+        charges, volumes = partition_charge(chg, 'voronoi', nplanes = 5)
+        self.assertAlmostEqual(np.sum(charges), np.sum(density))
+        self.assertAlmostEqual(np.sum(volumes), volume)
+
+        NX, NY, NZ = chg.NX, chg.NY, chg.NZ
+        grid = np.stack(np.meshgrid(np.arange(NZ)/NZ, np.arange(NY)/NY, np.arange(NX)/NX,
+                indexing = 'ij'), axis = -1)[..., ::-1].reshape(-1, 3)
+        diff = grid[:, None, :] - chg.struct.direct_coords()[None, :, :]
+        diff -= np.round(diff)
+        dist = np.linalg.norm(np.matmul(diff, chg.struct.lattice), axis = 2)
+        owner = np.argmin(dist, axis = 1)
+        expected = np.bincount(owner, weights = density.ravel(), minlength = 6)
+        # a few grid points are equidistant to two atoms
+        self.assertTrue(np.allclose(charges, expected, atol = 1e-3))
+
+        # Test the sphere integration, with overlapping spheres
+        charges, volumes = partition_charge(chg, 'sphere', radius = {'Co': 2.5, 'S': 1.0})
+        radii = np.array([2.5, 2.5, 1.0, 1.0, 1.0, 1.0])
+        expected = np.sum((dist <= radii) * density.reshape(-1, 1), axis = 0)
+        self.assertTrue(np.allclose(charges, expected))
+        self.assertTrue(np.allclose(volumes, 4/3 * np.pi * radii**3, rtol = 0.2))
+
+        with self.assertRaises(ValueError):
+            partition_charge(chg, 'sphere')
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import itertools
+import unittest
+import vasplib
+from vasplib.output.xdatcar import Xdatcar
+from vasplib.analysis.rdf import frame_histogram, rdf, xdatcar_rdf, structures_rdf
+import numpy as np
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        rng = np.random.default_rng(0)
+        # a skewed cell, rmax larger than the cell
+        lattice = np.array([[4.0, 0, 0], [3.0, 4.0, 0], [1.0, 1.5, 5.0]])
+        frac = rng.random((6, 3))
+        species_idx = np.array([0, 0, 1, 1, 1, 1])
+
+        # Test frame_histogram against a brute-force search over the images
+        hist = frame_histogram(frac, lattice, species_idx, 2, 7.0, 14)
+        shifts = np.array(list(itertools.product(range(-4, 5), repeat = 3)))
+        diff = frac[None, :, None, :] + shifts[None, None, :, :] - frac[:, None, None, :]
+        dist = np.linalg.norm(np.matmul(diff, lattice), axis = 3)
+        expected = np.zeros((2, 2, 14))
+        for i, j, k in zip(*np.nonzero((dist < 7.0) & (dist > 1e-8))):
+            expected[species_idx[i], species_idx[j], int(dist[i, j, k] / 0.5)] += 1
+        counts = np.array([2, 4])
+        expected /= np.outer(counts, counts)[:, :, None] / np.linalg.det(lattice)
+        self.assertTrue(np.allclose(hist, expected))
+
+        # Test rdf: an ideal gas tends to 1, serial and parallel agree
+        coords = rng.random((40, 60, 3))
+        atoms = [{'element': 'Li', 'num': 20}, {'element': 'O', 'num': 40}]
+        r, g = rdf(coords, lattice * 2, atoms, rmax = 5.0, nbins = 10, chunk = 7)
+        self.assertEqual(sorted(g), ['Li-Li', 'Li-O', 'O-O'])
+        self.assertAlmostEqual(np.mean(g['O-O'][5:]), 1, delta = 0.1)
+        r2, g2 = rdf(coords, lattice * 2, atoms, rmax = 5.0, nbins = 10, nprocs = 2, chunk = 7)
+        self.assertTrue(np.allclose(g['Li-O'], g2['Li-O']))
+
+        # Test xdatcar_rdf with a changing lattice against structures_rdf
+        with tempfile.TemporaryDirectory() as tmp:
+            # a copy, the sidecar index is written next to it
+            x = Xdatcar(shutil.copy(os.path.join(os.path.dirname(vasplib.__file__),'../test/output/XDATCAR2'), tmp))
+            r, g = xdatcar_rdf(x, rmax = 6.0, nbins = 30, chunk = 2)
+            r2, g2 = structures_rdf(x[:], rmax = 6.0, nbins = 30)
+            self.assertTrue(np.allclose(g['Co-S'], g2['Co-S']))
+            self.assertTrue(np.allclose(r, r2))
+            self.assertEqual(r.size, 30)
+            # backwards, in parallel
+            r2, g2 = xdatcar_rdf(x, -1, None, -1, rmax = 6.0, nbins = 30, nprocs = 2, chunk = 2)
+            self.assertTrue(np.allclose(g['Co-S'], g2['Co-S']))
+            # the frames are indexed once, the tasks don't open or index the file again
+            os.remove(x.filename + '.idx.npz')
+            r2, g2 = xdatcar_rdf(x, 1, None, 2, rmax = 6.0, nbins = 30, chunk = 2)
+            self.assertFalse(os.path.exists(x.filename + '.idx.npz'))
+            r3, g3 = structures_rdf(x[1::2], rmax = 6.0, nbins = 30)
+            self.assertTrue(np.allclose(g2['Co-S'], g3['Co-S']))
+
+            # the same frames in cartesian coordinates
+            fname = os.path.join(tmp, 'XDATCAR_cart')
+            with open(fname, 'w') as fp:
+                for n, struct in enumerate(x[:]):
+                    fp.write('cart\n1.0\n')
+                    fp.write(''.join('{:.8f} {:.8f} {:.8f}\n'.format(*row) for row in struct.lattice))
+                    fp.write(' Co S\n 2 4\nCartesian configuration= {}\n'.format(n + 1))
+                    fp.write(''.join('{:.8f} {:.8f} {:.8f}\n'.format(*row) for row in struct.cartesian_coords()))
+            r2, g2 = xdatcar_rdf(Xdatcar(fname), rmax = 6.0, nbins = 30)
+            self.assertTrue(np.allclose(g['Co-S'], g2['Co-S']))
@@ -0,0 +1,55 @@
+import os
+import unittest
+import vasplib
+from vasplib.output.chgcar import Chgcar
+from vasplib.analysis.slicing import GridSampler
+import numpy as np
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        chg = Chgcar(os.path.join(os.path.dirname(vasplib.__file__),'../test/output/CHGCAR'))
+        density = chg.getChargeDensity()
+        sampler = GridSampler(density, chg.struct.lattice)
+
+        # Test GridSampler.miller_planes: the (001) planes through the grid points
+        values, xy = sampler.miller_planes([0, 0, 1], [3/32, 17/32, 1 + 17/32], shape = (10, 10))
+        self.assertEqual(values.shape, (3, 10, 10))
+        self.assertTrue(np.allclose(values[0], density[3].T))
+        self.assertTrue(np.allclose(values[1], density[17].T))
+        self.assertTrue(np.allclose(values[2], values[1]))
+        self.assertTrue(np.allclose(xy[1, 0], [5.506401/10, 0]))
+
+        # (hkl) in-plane vectors are perpendicular to the normal
+        u, v, normal, spacing = sampler.plane_basis([1, 1, 1])
+        self.assertAlmostEqual(np.dot(u, normal), 0)
+        self.assertAlmostEqual(np.dot(v, normal), 0)
+        self.assertAlmostEqual(spacing, 1/np.linalg.norm(1/np.array([5.506401, 5.506401, 18.0])))
+        # high indices: u and v span the plane lattice, the cell area being V / d_hkl
+        u, v, normal, spacing = sampler.plane_basis([9, 9, 1])
+        self.assertAlmostEqual(np.dot(u, normal), 0)
+        self.assertAlmostEqual(np.dot(v, normal), 0)
+        self.assertAlmostEqual(np.dot(np.cross(u, v), normal), 5.506401**2 * 18.0 / spacing)
+        with self.assertRaises(ValueError):
+            sampler.plane_basis([0, 0, 0])
+
+        # Test GridSampler.line, wrapping across the periodic boundary
+        distance, values = sampler.line([0.5, 0, 0.5], [1.5, 0, 0.5], npoints = 11)
+        self.assertAlmostEqual(distance[-1], 5.506401)
+        self.assertTrue(np.allclose(values[:10], np.roll(density[16, 0], -5)))
+        self.assertAlmostEqual(values[0], values[-1])
+
+        # a batch of lines
+        distance, values = sampler.line([[0, 0, 0], [0, 0, 0]], [[0, 0, 1], [1, 1, 0]], npoints = 5)
+        self.assertEqual(values.shape, (2, 5))
+        self.assertAlmostEqual(distance[0, -1], 18.0)
+
+        # Test the cubic spline interpolation at the grid points
+        spline = GridSampler(density, chg.struct.lattice, order = 3)
+        self.assertAlmostEqual(spline.sample([0.3, 0.6, 17/32]), density[17, 6, 3])
+
+        # Test GridSampler.atoms_plane
+        values, xy = sampler.atoms_plane(chg.struct, [0, 1, 2], shape = (4, 4))
+        self.assertAlmostEqual(values[0, 0], sampler.sample(chg.struct.direct_coords()[0]))
+        self.assertTrue(np.allclose(xy[0, 0], [0, 0]))
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from vasplib.analysis.build import Build
+from vasplib.analysis.sqs import SQS, _Chain
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        fcc = Build.from_arrays(np.eye(3) * 3.6, [[0, 0, 0], [0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]],
+                                ['Ni'], [4])
+        sc = fcc.supercell([2, 2, 2], inplace = False)
+        sqs = SQS(sc, 'Ni', {'Ni': 24, 'Co': 8}, pair_shells = 3, triplet_shells = 1)
+        self.assertTrue(np.allclose(sqs.shells, [3.6 / np.sqrt(2), 3.6, 3.6 * np.sqrt(1.5)], atol = 1e-3))
+        # 12 + 6 + 24 neighbors, 24 nearest-neighbor triangles in both orders per site
+        self.assertEqual([len(entries) for entries in sqs._tables['entries']], [32 * 42, 32 * 48])
+
+        # test the incremental updates against the counts from scratch
+        rng = np.random.default_rng(0)
+        chain = _Chain(sqs._tables, rng.permutation(sqs.occupation))
+        for k in range(100):
+            chain.swap(*rng.integers(32, size = 2))
+        recount = _Chain(sqs._tables, chain.occupation)
+        for counts, expected in zip(chain.counts, recount.counts):
+            self.assertTrue(np.array_equal(counts, expected))
+
+        # test the search, the chains in parallel processes
+        struct, objective = sqs.search(steps = 2000, nchains = 2, nprocs = 2, seed = 0)
+        self.assertLess(objective, recount.objective())
+        self.assertAlmostEqual(sqs.objective(), objective)
+        correlations, targets = sqs.correlations()
+        self.assertTrue(np.allclose(correlations[0][0], targets[0][0], atol = 0.05))
+        self.assertEqual(struct.elements, ['Ni', 'Co'])
+        self.assertEqual([atom['num'] for atom in struct.atoms], [24, 8])
+        with self.assertRaises(ValueError):
+            SQS(sc, 'Ni', {'Ni': 16, 'Co': 8})
+
+        # a shell spread over less than tol across a multiple of tol stays whole:
+        # nearest neighbors at 2.50049 Ang in the xy planes, 2.50051 Ang across them
+        a = 2.50049 * np.sqrt(2)
+        strained = Build.from_arrays(np.diag([a, a, a * (1 + 1.6e-5)]), fcc.coords, ['Ni'], [4])
+        sqs = SQS(strained.supercell([2, 2, 2], inplace = False), 'Ni', {'Ni': 16, 'Co': 16},
+                  pair_shells = 2, triplet_shells = 1)
+        self.assertTrue(np.allclose(sqs.shells, [2.5005, a], atol = 1e-4))
+        self.assertEqual([len(entries) for entries in sqs._tables['entries']], [32 * 18, 32 * 48])
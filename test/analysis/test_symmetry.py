@@ -0,0 +1,45 @@
+import os
+import unittest
+import vasplib
+import numpy as np
+from vasplib.analysis.build import Build
+from vasplib.analysis.symmetry import lattice_rotations, symmetry_operations, translation_group, \
+    cartesian_rotations, equivalent_atoms
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        # the holohedry of cubic lattices, in any cell
+        self.assertEqual(len(lattice_rotations(np.eye(3) * 4)), 48)
+        self.assertEqual(len(lattice_rotations([[4, 0, 0], [4, 4, 0], [0, 4, 4]])), 48)
+
+        # zincblende BN, F-43m
+        s = Build()
+        s.from_POSCAR(os.path.join(os.path.dirname(vasplib.__file__),'../test/vasp/selective_BN_POSCAR'))
+        rotations, translations, permutations = symmetry_operations(s)
+        self.assertEqual(len(rotations), 24)
+        self.assertTrue(np.array_equal(equivalent_atoms(permutations), [0, 1]))
+        cart = cartesian_rotations(rotations, s.lattice)
+        self.assertTrue(np.allclose(np.matmul(cart, np.transpose(cart, (0, 2, 1))), np.eye(3)))
+
+        # MgB2, P6/mmm, in a supercell
+        m = Build()
+        m.from_POSCAR(os.path.join(os.path.dirname(vasplib.__file__),'../test/analysis/POSCAR'))
+        self.assertEqual(len(symmetry_operations(m)[0]), 24)
+        sc = m.supercell([2, 2, 1], inplace = False)
+        rotations, translations, permutations = symmetry_operations(sc)
+        self.assertEqual(len(rotations), 96)
+        # the operations map every atom onto permutations[k, i]
+        frac = sc.direct_coords()
+        for k in range(0, 96, 7):
+            diff = np.matmul(frac, rotations[k]) + translations[k] - frac[permutations[k]]
+            self.assertTrue(np.allclose(diff, np.round(diff), atol = 1e-6))
+        group, group_perms = translation_group(sc)
+        self.assertEqual(len(group), 4)
+        self.assertTrue(np.allclose(group[0], 0))
+        reps = symmetry_operations(sc, translations = False)
+        self.assertEqual(len(reps[0]), 24)
+        labels = equivalent_atoms(permutations)
+        self.assertTrue(np.array_equal(equivalent_atoms(reps[2], group_perms), labels))
+        self.assertEqual(len(np.unique(labels)), 2)
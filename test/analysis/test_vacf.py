@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+import vasplib
+from vasplib.output.xdatcar import Xdatcar
+from vasplib.analysis.vacf import frame_interval, finite_difference, vacf_fft, species_vacf, vdos, vacf_analysis
+import numpy as np
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        rng = np.random.default_rng(0)
+
+        # Test finite_difference: exact for uniform motion
+        time = np.arange(50) * 0.5
+        positions = time[:, None, None] * np.array([[[0.1, -0.2, 0.3]]]) + rng.random((1, 4, 3))
+        self.assertTrue(np.allclose(finite_difference(positions, 0.5), [0.1, -0.2, 0.3]))
+
+        # Test vacf_fft against the direct average over the time origins
+        velocities = rng.standard_normal((200, 5, 3))
+        vacf = vacf_fft(velocities)
+        for m in [0, 3, 199]:
+            direct = np.mean(np.sum(velocities[m:] * velocities[:200 - m], axis = 2), axis = 0)
+            self.assertTrue(np.allclose(vacf[m], direct))
+
+        # Test species_vacf and vdos: oscillators at 10 and 25 THz
+        time = np.arange(2000) * 1.0
+        phase = rng.random(6) * 2 * np.pi
+        freqs = np.array([10, 10, 25, 25, 25, 25]) / 1000
+        positions = np.zeros((2000, 6, 3))
+        positions[:, :, 0] = 0.1 * np.cos(2 * np.pi * freqs * time[:, None] + phase)
+        atoms = [{'element': 'Li', 'num': 2}, {'element': 'O', 'num': 4}]
+        vacf = species_vacf(positions, 1.0, atoms, chunk = 4)
+        v = finite_difference(positions, 1.0)
+        self.assertAlmostEqual(vacf['O'][0], 15.999 * np.sum(np.mean(v[:, 2:]**2, axis = 0)), delta = 0.01)
+        freq, dos = vdos(time, vacf['Li'], dof = 6)
+        self.assertAlmostEqual(freq[np.argmax(dos)], 10, delta = 0.5)
+        self.assertAlmostEqual(np.sum(dos) * freq[1], 6)
+        freq, dos = vdos(time, vacf['O'])
+        self.assertAlmostEqual(freq[np.argmax(dos)], 25, delta = 0.5)
+
+        # Test frame_interval and vacf_analysis on an XDATCAR file
+        data = os.path.join(os.path.dirname(vasplib.__file__),'../test/output')
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, 'XDATCAR')
+            shutil.copy(os.path.join(data, 'XDATCAR'), fname)
+            with self.assertRaises(ValueError):
+                frame_interval(Xdatcar(fname))
+            shutil.copy(os.path.join(data, 'OUTCAR2'), os.path.join(tmp, 'OUTCAR'))
+            self.assertEqual(frame_interval(Xdatcar(fname)), 0.5)
+            with open(os.path.join(tmp, 'INCAR'), 'w') as fp:
+                fp.write('IBRION = 0\nPOTIM = 2.0\nNBLOCK = 5\n')
+            self.assertEqual(frame_interval(Xdatcar(fname)), 10.0)
+            self.assertEqual(frame_interval(Xdatcar(fname), potim = 1.0), 5.0)
+
+            results = vacf_analysis(Xdatcar(fname), memmap = os.path.join(tmp, 'positions.npy'))
+            self.assertEqual(sorted(results), ['Co', 'S'])
+            self.assertTrue(np.allclose(results['S']['time'], [0, 10, 20]))
+            self.assertEqual(results['Co']['freq'].shape, results['Co']['vdos'].shape)
@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+import vasplib
+from vasplib.output.chgcar import Chgcar, ChgcarWriter
+from vasplib.analysis.volumetric import linear_combination, charge_density_difference
+import numpy as np
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        fname = os.path.join(os.path.dirname(vasplib.__file__),'../test/output/CHGCAR')
+        density = Chgcar(fname).getChargeDensity()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Test linear_combination with three files
+            out = linear_combination([fname, fname, fname], [2.0, -0.5, 0.25],
+                    os.path.join(tmp, 'CHGSUM'), nplanes = 3)
+            self.assertTrue(np.allclose(out.getChargeDensity(), 1.75 * density))
+
+            # Test charge_density_difference
+            out = charge_density_difference(fname, [os.path.join(tmp, 'CHGSUM')],
+                    os.path.join(tmp, 'CHGDIFF'))
+            self.assertTrue(np.allclose(out.getChargeDensity(), -0.75 * density))
+
+            # Incompatible grids
+            chg = Chgcar(fname)
+            other = os.path.join(tmp, 'CHGCAR_small')
+            with ChgcarWriter(other, chg.struct, [2, 2, 2]) as writer:
+                writer.write(np.ones(8))
+            with self.assertRaises(ValueError):
+                linear_combination([fname, other], [1, -1], os.path.join(tmp, 'CHGDIFF'))
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+import vasplib
+from vasplib.core.batch import StructureBatch
+from vasplib.core.structure import Structure
+from vasplib.output.xdatcar import Xdatcar
+from vasplib.output.outcar import Outcar
+import numpy as np
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        rng = np.random.default_rng(0)
+        lattices = np.array([[4.0, 0, 0], [1.5, 4.5, 0], [1.0, 0.8, 5.0]]) + 0.3 * rng.random((6, 3, 3))
+        coords = rng.random((6, 7, 3))
+        batch = StructureBatch(lattices, coords, ['Li', 'O'], [3, 4], data = {'energies': np.arange(6.0)})
+        structures = [Structure.from_arrays(lat, xyz, ['Li', 'O'], [3, 4]) for lat, xyz in zip(lattices, coords)]
+        self.assertEqual(len(batch), 6)
+        self.assertEqual(batch.nums, [3, 4])
+
+        # Test the vectorized quantities against the structures
+        cart = batch.cartesian_coords()
+        self.assertTrue(np.allclose(cart, [s.cartesian_coords() for s in structures]))
+        self.assertTrue(np.allclose(batch.volumes, [s.volume for s in structures]))
+        self.assertTrue(np.allclose(batch.densities, [s.density for s in structures]))
+        self.assertTrue(np.allclose(batch.mass_centers(), [s.mass_center() for s in structures]))
+        self.assertTrue(np.allclose(batch.distance_matrices(), [s.distance_matrix() for s in structures]))
+        self.assertTrue(np.allclose(batch.distance_matrices([0, 2], [1, 5, 6], dtype = np.float32),
+                                    [s.distance_matrix([0, 2], [1, 5, 6]) for s in structures], atol = 1e-4))
+        self.assertTrue(np.allclose(batch.distance_matrices(block = 2), [s.distance_matrix() for s in structures]))
+        self.assertTrue(np.allclose(batch.plane_spacings, [s.plane_spacings for s in structures]))
+        batch.direct_to_cart()
+        self.assertTrue(np.allclose(batch.direct_coords(), coords))
+
+        # Test the indexing: structure views and sub-batches
+        struct = batch[-1]
+        self.assertTrue(np.shares_memory(struct.coords, batch.coords))
+        self.assertEqual(struct.coord_type, 'cart')
+        struct.coords[0] = [1, 2, 3]
+        self.assertTrue(np.array_equal(batch.coords[5, 0], [1, 2, 3]))
+        sub = batch[1::2]
+        self.assertEqual(len(sub), 3)
+        self.assertTrue(np.array_equal(sub.data['energies'], [1, 3, 5]))
+        self.assertTrue(np.array_equal(sub.lattices, lattices[1::2]))
+        stacked = StructureBatch.from_structures(structures)
+        self.assertTrue(np.allclose(stacked.coords, coords))
+        with self.assertRaises(ValueError):
+            StructureBatch(lattices, coords, ['Li', 'O'], [3, 3])
+
+        # Test a fixed lattice, stored once
+        fixed = StructureBatch(lattices[0], coords, ['Li', 'O'], [3, 4])
+        self.assertTrue(fixed.fixed_lattice)
+        self.assertTrue(np.allclose(fixed.volumes, structures[0].volume))
+        self.assertTrue(np.allclose(fixed[2:4].cartesian_coords(), np.matmul(coords[2:4], lattices[0])))
+        self.assertTrue(np.allclose(fixed.distance_matrices(block = 3),
+                                    [Structure.from_arrays(lattices[0], xyz, ['Li', 'O'], [3, 4]).distance_matrix()
+                                     for xyz in coords]))
+        # float32 coordinates are kept in the batch, and converted for the structures
+        single = StructureBatch(lattices, coords.astype(np.float32), ['Li', 'O'], [3, 4])
+        self.assertEqual(single.coords.dtype, np.float32)
+        self.assertEqual(single[0].coords.dtype, np.float64)
+
+        # Test the readers
+        data = os.path.join(os.path.dirname(vasplib.__file__),'../test/output')
+        with tempfile.TemporaryDirectory() as tmp:
+            # a copy, the sidecar index is written next to it
+            x = Xdatcar(shutil.copy(os.path.join(data, 'XDATCAR2'), tmp))
+            xb = x.batch(1)
+            self.assertEqual(len(xb), len(x) - 1)
+            self.assertTrue(np.allclose(xb[1].cartesian_coords(), x.structure(3).cartesian_coords()))
+            self.assertTrue(np.allclose(xb.lattices[1], x.structure(3).lattice))
+        outcar = Outcar(os.path.join(data, 'OUTCAR2'))
+        ob = outcar.batch()
+        lat, positions, forces, energies = outcar.ionic_steps()
+        self.assertEqual(ob.coord_type, 'cart')
+        self.assertTrue(np.array_equal(ob.data['forces'], forces))
+        self.assertTrue(np.allclose(ob[0].cartesian_coords(), outcar.struct_ionic_step(1).cartesian_coords()))
@@ -0,0 +1,42 @@
+import sys
+import unittest
+import subprocess
+
+# cold-import budget of the light modules (s), generous against a slow machine;
+# numpy alone takes about 0.1 s
+BUDGET = 1.0
+
+def import_times(args):
+    """
+    Run python -X importtime with args in a fresh interpreter and return the
+    cumulative import time of every module (s).
+    """
+    out = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                         capture_output = True, text = True, check = True).stderr
+    times = {}
+    for line in out.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1]) * 1e-6
+    return times
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test_lazy(self):
+        # Test that the readers and the CLI don't load the heavy dependencies
+        modules = ['vasplib.output.outcar', 'vasplib.output.xdatcar', 'vasplib.output.vaspxml',
+                   'vasplib.vasp.poscar', 'vasplib.analysis.electronic', 'vasplib.main']
+        code = ("import sys\n" + "".join("import {}\n".format(m) for m in modules) +
+                "from vasplib.core import periodic_table as pt\n"
+                "print(sorted(m for m in ('matplotlib', 'scipy') if m in sys.modules), pt._pt_data is None)")
+        out = subprocess.run([sys.executable, '-c', code], capture_output = True, text = True, check = True)
+        self.assertEqual(out.stdout.split(), ['[]', 'True'])
+        times = import_times(['-m', 'vasplib.main', '-h'])
+        self.assertFalse([m for m in times if m.split('.')[0] in ('matplotlib', 'scipy')])
+
+    def test_budget(self):
+        # Test the cold-import time, best of 3 runs
+        for module in ['vasplib.output.outcar', 'vasplib.main']:
+            best = min(import_times(['-c', 'import ' + module])[module] for i in range(3))
+            self.assertLess(best, BUDGET, module)
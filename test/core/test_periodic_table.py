@@ -0,0 +1,37 @@
+import os
+import sys
+import subprocess
+import unittest
+import vasplib
+import numpy as np
+from vasplib.core import periodic_table as pt
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        element = pt.Element('H')
+        self.assertAlmostEqual(element.get_attr("Atomic mass"), 1.00794)
+        self.assertEqual(element.get_attr("Electronic structure"), "1s<sup>1</sup>")
+        self.assertEqual(element.get_attr("ICSD oxidation states"), [1, -1])
+
+        element = element.from_Z(11)
+        self.assertEqual(element.symbol, 'Na')
+        self.assertAlmostEqual(element.get_attr("Atomic orbitals")["1s"], -37.719975)
+
+    def test_arrays(self):
+        self.assertEqual(pt.atomic_numbers(['H', 'Fe', 'Lr']).tolist(), [1, 26, 103])
+        self.assertEqual(pt.SYMBOLS[26], 'Fe')
+        self.assertTrue(np.allclose(pt.atomic_masses(['H', 'O']), [1.00794, 15.9994]))
+        self.assertTrue(np.allclose(pt.atomic_masses(np.array([[1, 8]])), [[1.00794, 15.9994]]))
+        self.assertTrue(np.isnan(pt.element_property('X', ['He']))[0])
+        with self.assertRaises(KeyError):
+            pt.Element('He').get_attr('X')
+        with self.assertRaises(ValueError):
+            pt.atomic_numbers(['Xx'])
+        with self.assertRaises(ValueError):
+            pt.element_property('Name', ['H'])
+
+        # the json file is not loaded for the numeric properties
+        code = ("from vasplib.core import periodic_table as pt; pt.Element('Fe').get_attr('Atomic mass'); "
+                "pt.Element('H').from_Z(26); assert pt._pt_data is None")
+        subprocess.run([sys.executable, '-c', code], check = True, cwd = os.path.join(os.path.dirname(vasplib.__file__), '..'))
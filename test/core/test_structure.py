@@ -19,3 +19,96 @@ class TestPeriodicTableClass(unittest.TestCase):
         self.assertTrue(np.allclose(s.atoms[0]['coords'][0], np.array([0.50000000, 0.50000000, 0.53429442])))
         self.assertTrue(np.allclose(s.cartesian_coords()[0], [2.7532005, 2.7532005, 9.61729956]))
         self.assertTrue(np.allclose(np.identity(3), np.dot(s.lattice, s.reciprocal_lattice)))
+
+    def test_arrays(self):
+        s = Structure.from_arrays(np.diag([4.0, 5.0, 6.0]), np.arange(15).reshape(5, 3) / 20,
+                ['Li', 'O'], [2, 3])
+        self.assertEqual(s.atom_nums, 5)
+        self.assertEqual(list(s.species), [0, 0, 1, 1, 1])
+        self.assertEqual(list(s.symbols), ['Li', 'Li', 'O', 'O', 'O'])
+
+        # the atoms view shares the coordinate array
+        self.assertTrue(np.shares_memory(s.atoms[1]['coords'], s.coords))
+        s.atoms[1]['coords'][0] = [0.5, 0.5, 0.5]
+        self.assertTrue(np.allclose(s.direct_coords()[2], [0.5, 0.5, 0.5]))
+        s.atoms[0]['coords'] = [[0.1, 0.2, 0.3]]
+        self.assertEqual(s.atoms[0]['num'], 1)
+        self.assertEqual(list(s.species), [0, 1, 1, 1])
+        s.atoms.append({'element': 'H', 'num': 2})
+        self.assertEqual(s.elements, ['Li', 'O', 'H'])
+        self.assertEqual(s.atom_nums, 6)
+        s.atoms[2]['selective'] = [['T', 'T', 'F']] * 2
+        self.assertEqual(sorted(s.atoms[2]), ['coords', 'element', 'num', 'selective'])
+        with self.assertRaises(ValueError):
+            s.coords = np.zeros((2, 3))
+        with self.assertRaises(AttributeError):
+            s.undefined = 1
+
+    def test_cache(self):
+        lattice = np.array([[4.0, 0, 0], [1.0, 5.0, 0], [0.5, 0.5, 6.0]])
+        s = Structure.from_arrays(lattice, np.random.default_rng(0).random((4, 3)), ['Li'], [4])
+
+        # the lattice quantities are computed once
+        self.assertIs(s.inv_lattice, s.inv_lattice)
+        self.assertAlmostEqual(s.volume, 120.0)
+        self.assertTrue(np.allclose(s.metric_tensor, np.matmul(lattice, lattice.T)))
+        # and recomputed after assigning or editing the lattice
+        s.lattice = lattice * 2
+        self.assertAlmostEqual(s.volume, 960.0)
+        self.assertTrue(np.allclose(np.matmul(s.lattice, s.inv_lattice), np.identity(3)))
+        s.lattice *= 0.5
+        self.assertTrue(np.allclose(s.reciprocal_lattice, np.linalg.inv(lattice).T))
+        s.lattice[2, 2] = 12.0
+        self.assertAlmostEqual(s.volume, 240.0)
+        self.assertAlmostEqual(s.lattice_constants[2], np.sqrt(144.5))
+
+        # the converted coordinates are cached until the atoms change
+        cached = s._converted_coords(s.lattice)
+        self.assertIs(cached, s._converted_coords(s.lattice))
+        # reading the coordinates keeps the cache, editing the result doesn't change it
+        s.coords
+        s.atoms[0]['coords']
+        s.cartesian_coords()[0] += 1
+        self.assertIs(cached, s._converted_coords(s.lattice))
+        # in-place changes of the coordinates are detected
+        s.atoms[0]['coords'][1] = [0.5, 0.5, 0.5]
+        self.assertTrue(np.allclose(s.cartesian_coords()[1], np.matmul([0.5, 0.5, 0.5], s.lattice)))
+        s.coords[2] += 0.25
+        self.assertTrue(np.allclose(s.cartesian_coords(), np.matmul(s.coords, s.lattice)))
+        s.lattice = lattice
+        self.assertTrue(np.allclose(s.cartesian_coords()[1], np.matmul([0.5, 0.5, 0.5], lattice)))
+        # converting keeps both coordinate types
+        frac = s.coords
+        s.direct_to_cart()
+        self.assertTrue(np.shares_memory(s._converted_coords(s.inv_lattice), frac))
+        s.cart_to_direct()
+        self.assertTrue(np.allclose(s.direct_coords(), frac))
+
+    def test_distances(self):
+        rng = np.random.default_rng(1)
+        lattice = np.array([[5.0, 0, 0], [4.2, 3.0, 0], [-2.0, 1.5, 4.0]])
+        frac = rng.random((20, 3))
+        s = Structure.from_arrays(lattice, frac, ['Li', 'O'], [8, 12])
+
+        # brute force over the images
+        n = np.array(np.meshgrid(*[np.arange(-4, 5)] * 3, indexing = 'ij')).reshape(3, -1).T
+        diff = frac[None, :, None, :] - frac[:, None, None, :] + n
+        cart = np.matmul(diff, lattice)
+        dist = np.linalg.norm(cart, axis = 3)
+        expected = np.min(dist, axis = 2)
+
+        self.assertTrue(np.allclose(s.distance_matrix(block = 7), expected))
+        self.assertTrue(np.allclose(s.distance_matrix(dtype = np.float32), expected, atol = 1e-4))
+        self.assertEqual(s.distance_matrix(dtype = np.float32).dtype, np.float32)
+        vectors = s.min_image_vectors([0, 5], range(8, 20))
+        self.assertTrue(np.allclose(np.linalg.norm(vectors, axis = 2), expected[[0, 5]][:, 8:]))
+        k = np.argmin(dist[3, 11])
+        self.assertTrue(np.allclose(s.min_image_vectors([3], [11])[0, 0], cart[3, 11, k]))
+        blocks = list(s.iter_distances(j = [1, 2], block = 8))
+        self.assertEqual([start for start, block in blocks], [0, 8, 16])
+        self.assertTrue(np.allclose(blocks[1][1], expected[8:16, 1:3]))
+
+        # orthogonal cells need no image search
+        s.lattice = np.diag([5.0, 6.0, 7.0])
+        self.assertTrue(np.allclose(s.distance_matrix()[0, 1], np.linalg.norm(
+            np.matmul((frac[1] - frac[0]) - np.round(frac[1] - frac[0]), s.lattice))))
@@ -1,13 +1,97 @@
 import os
+import shutil
+import tempfile
 import unittest
 import vasplib
-from vasplib.output.chgcar import Chgcar
+from vasplib.output.chgcar import Chgcar, ChgcarWriter
 import numpy as np
 
 
 class TestPeriodicTableClass(unittest.TestCase):
 
     def test(self):
-        pass
-        #chg = Chgcar(os.path.join(os.path.dirname(vasplib.__file__),'../test/output/CHGCAR'))
-        
+        chg = Chgcar(os.path.join(os.path.dirname(vasplib.__file__),'../test/output/CHGCAR'))
+        self.assertEqual([chg.NX, chg.NY, chg.NZ], [10, 10, 32])
+        self.assertEqual(chg.struct.elements, ['Co', 'S'])
+        density = chg.getChargeDensity()
+        self.assertEqual(density.shape, (32, 10, 10))
+
+        # Test Chgcar.iter_planes(nplanes), chunks not aligned with the lines
+        blocks = [block for iz, block in chg.iter_planes(3)]
+        self.assertEqual(len(blocks), 11)
+        self.assertEqual(blocks[-1].shape, (2, 10, 10))
+        self.assertTrue(np.allclose(np.concatenate(blocks)/(10 * 10 * 32), density))
+        self.assertAlmostEqual(np.sum(density), 42.0, places = 1)
+
+        # Test ChgcarWriter
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, 'CHGCAR')
+            with ChgcarWriter(fname, chg.struct, [chg.NX, chg.NY, chg.NZ]) as writer:
+                for iz, block in chg.iter_planes(7):
+                    writer.write(block)
+            chg2 = Chgcar(fname)
+            self.assertTrue(np.allclose(chg2.struct.lattice, chg.struct.lattice))
+            self.assertTrue(np.allclose(chg2.getChargeDensity(), density))
+
+            # Test Chgcar.read_data(nprocs) with a process pool, lines of a fixed width
+            self.assertTrue(np.array_equal(chg.read_data(nprocs = 3), chg.read_data()))
+            data = chg.read_data(nprocs = 2, memmap = os.path.join(tmp, 'data.npy'))
+            self.assertTrue(np.array_equal(data, chg.read_data()))
+            self.assertTrue(np.array_equal(chg.getChargeDensity(nprocs = 2), density))
+
+            # Lines of varying width fall back to the serial parser
+            with open(chg.filename, 'r') as fp:
+                lines = fp.readlines()
+            lines[20] = lines[20].replace(' ', '   ')
+            with open(fname, 'w') as fp:
+                fp.writelines(lines)
+            self.assertTrue(np.array_equal(Chgcar(fname).read_data(nprocs = 2), chg.read_data()))
+
+            with self.assertRaises(ValueError):
+                with ChgcarWriter(fname, chg.struct, [2, 2, 2]) as writer:
+                    writer.write(np.ones(7))
+
+    def test_pyramid(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, 'CHGCAR')
+            shutil.copy(os.path.join(os.path.dirname(vasplib.__file__),'../test/output/CHGCAR'), fname)
+            chg = Chgcar(fname)
+            density = chg.getChargeDensity()
+
+            # Test Chgcar.build_pyramid, full resolution assembled in the same pass
+            pyramid, full = chg.build_pyramid(3, keep_full = True)
+            self.assertTrue(np.array_equal(full, density))
+            self.assertEqual([p.shape for p in pyramid], [(16, 5, 5), (8, 3, 3), (4, 2, 2)])
+            self.assertTrue(np.allclose(pyramid[0], density.reshape(16, 2, 5, 2, 5, 2).mean(axis = (1, 3, 5))))
+            # the last block along x and y is smaller
+            self.assertAlmostEqual(pyramid[1][0, 2, 2], np.mean(density[0:4, 8:, 8:]))
+
+            # Test the cache next to the file
+            self.assertEqual(len(chg.pyramid()), 3)
+            self.assertTrue(os.path.isfile(fname + '.pyramid.npz'))
+            chg2 = Chgcar(fname)
+            chg2.build_pyramid = None # must not be rebuilt
+            self.assertTrue(np.array_equal(chg2.pyramid(2)[1], pyramid[1]))
+
+            # Test mean1D/mean2D against a level
+            result = chg.mean1D('z', 'distance', level = 1)
+            self.assertTrue(np.allclose(result[:, 1], density.mean(axis = (1, 2)).reshape(16, 2).mean(axis = 1)))
+            self.assertAlmostEqual(result[0, 0], 0.5 / 32 * 18.0)
+            X, Y, Z = chg.mean2D('xy', level = 2)
+            self.assertEqual(Z.shape, (3, 3))
+            # NX = 10 is not divisible by 4, the last block holds 2 points
+            a = chg.struct.lattice_constants[0]
+            self.assertTrue(np.allclose(X, np.array([1.5, 5.5, 8.5]) / 10 * a))
+            self.assertAlmostEqual(Z[2, 2], np.mean(density[:, 8:, 8:]))
+            # the sums per atom don't depend on the level
+            self.assertTrue(np.allclose(chg.mean1D('x', 'atom', level = 1)[:, 1],
+                                        chg.mean1D('x', 'atom')[:, 1], rtol = 0.1))
+
+            # Test the sampler against a level, coarse points at the block centers
+            sampler = chg.sampler(level = 1)
+            self.assertAlmostEqual(sampler.sample([0.25, 0.05, 0.5 / 32]), pyramid[0][0, 0, 1])
+            sampler = chg.sampler(level = 2)
+            self.assertAlmostEqual(sampler.sample([0.85, 0.85, 1.5 / 32]), pyramid[1][0, 2, 2])
+            # periodic wrap across the smaller last block, halfway to the next cell
+            self.assertAlmostEqual(sampler.sample([1.0, 0.85, 1.5 / 32]),
+                                   np.mean(pyramid[1][0, 2, [2, 0]]))
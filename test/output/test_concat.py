@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+import vasplib
+from vasplib.output.xdatcar import Xdatcar
+from vasplib.output.trajectory import convert_xdatcar
+from vasplib.output.concat import ConcatTrajectory
+import numpy as np
+
+
+def write_xdatcar(filename, lattice, frames, symbols = 'Li O', nums = '2 3'):
+    with open(filename, 'w') as fp:
+        fp.write('segment\n 1.0\n')
+        fp.write(''.join(' {:.6f} {:.6f} {:.6f}\n'.format(*v) for v in lattice))
+        fp.write(' {}\n {}\n'.format(symbols, nums))
+        for i, frame in enumerate(frames):
+            fp.write('Direct configuration= {:5d}\n'.format(i + 1))
+            fp.write(''.join(' {:.8f} {:.8f} {:.8f}\n'.format(*v) for v in frame))
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        rng = np.random.default_rng(0)
+        lattice = np.diag([6.0, 7.0, 8.0])
+        frames = np.round(rng.random((30, 5, 3)), 8)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # three restarts, each starting from the last frame of the previous one
+            names = []
+            for k, (lo, hi) in enumerate([(0, 10), (9, 20), (19, 30)]):
+                names.append(os.path.join(tmp, 'XDATCAR{}'.format(k)))
+                write_xdatcar(names[-1], lattice, frames[lo:hi])
+            # the last segment as a binary trajectory file
+            names[2] = convert_xdatcar(Xdatcar(names[2]), names[2] + '.vlt').filename
+
+            traj = ConcatTrajectory(names, drop_first = True)
+            self.assertTrue(np.allclose(traj[3].atoms[1]['coords'], frames[3, 2:]))
+            self.assertIsNone(traj._segments[1]) # only the first segment is opened
+            self.assertTrue(np.allclose(traj.structure(13).atoms[0]['coords'], frames[12, :2]))
+            self.assertIsNone(traj._segments[2])
+            self.assertEqual(len(traj), 30)
+            self.assertTrue(np.allclose(traj[-1].atoms[0]['coords'], frames[-1, :2]))
+            self.assertEqual(traj.locate(10), (1, 1))
+            with self.assertRaises(IndexError):
+                traj[30]
+
+            coords, lattices = traj.trajectory()
+            self.assertIsNone(lattices)
+            self.assertTrue(np.allclose(coords, frames))
+            coords, lattices = traj.trajectory(2, 27, 4)
+            self.assertTrue(np.allclose(coords, frames[2:27:4]))
+            coords, lattices = traj.trajectory(None, None, -3)
+            self.assertTrue(np.allclose(coords, frames[::-3]))
+            self.assertEqual(len(list(traj.iter_frames(5, 25, 2))), 10)
+            self.assertEqual(len(ConcatTrajectory(names)), 32)
+
+            # a segment with another lattice gives the lattices of the frames
+            write_xdatcar(names[1], lattice * 1.1, frames[9:20])
+            coords, lattices = ConcatTrajectory(names, drop_first = True).trajectory(5, 15)
+            self.assertTrue(np.allclose(lattices[:5], lattice))
+            self.assertTrue(np.allclose(lattices[5:], lattice * 1.1))
+
+            # inconsistent atoms
+            write_xdatcar(names[1], lattice, frames[9:20], nums = '3 2')
+            traj = ConcatTrajectory(names)
+            traj[0]
+            with self.assertRaises(ValueError):
+                traj[15]
+
+            # OUTCAR segments
+            outcar = os.path.join(os.path.dirname(vasplib.__file__),'../test/output/OUTCAR2')
+            traj = ConcatTrajectory([outcar, outcar], drop_first = True)
+            self.assertEqual(len(traj), 25)
+            coords, lattices = traj.trajectory(11, 14)
+            self.assertTrue(np.allclose(coords[2], traj[13].direct_coords()))
+
+            # XDATCAR (direct) and OUTCAR (cartesian) segments give direct coordinates
+            positions = np.round(rng.random((4, 6, 3)), 8)
+            write_xdatcar(names[0], traj.lattice, positions, symbols = 'Co S', nums = '2 4')
+            traj = ConcatTrajectory([names[0], outcar])
+            batch = traj.batch()
+            self.assertEqual(batch.coord_type, 'direct')
+            self.assertEqual(len(batch), 17)
+            self.assertTrue(np.allclose(batch.coords[:4], positions))
+            self.assertTrue(np.allclose(batch.coords[4], traj[4].direct_coords()))
+            self.assertTrue(np.allclose(batch.coords[-1], traj[-1].direct_coords()))
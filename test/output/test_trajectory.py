@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+import vasplib
+from vasplib.output.xdatcar import Xdatcar
+from vasplib.output.outcar import Outcar
+from vasplib.output.trajectory import Trajectory, TrajectoryWriter, convert_xdatcar, convert_outcar
+import numpy as np
+
+
+class TestPeriodicTableClass(unittest.TestCase):
+
+    def test(self):
+        data = os.path.join(os.path.dirname(vasplib.__file__),'../test/output')
+        rng = np.random.default_rng(0)
+        atoms = [{'element': 'Li', 'num': 3}, {'element': 'O', 'num': 2}]
+        coords = rng.random((25, 5, 3))
+        lattices = 5 + rng.random((25, 3, 3))
+        energies = rng.random(25)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Test the writer and the random-access reads, compressed float32
+            fname = os.path.join(tmp, 'traj.vlt')
+            with TrajectoryWriter(fname, atoms, comment = 'test', dtype = np.float32,
+                    compress = 6, chunk = 4) as writer:
+                writer.write(coords[:7], lattices[:7], energies = energies[:7])
+                writer.write(coords[7:], lattices[7:], energies = energies[7:])
+                with self.assertRaises(ValueError):
+                    writer.write(coords[:1])
+            traj = Trajectory(fname)
+            self.assertEqual(len(traj), 25)
+            self.assertEqual(sorted(traj.arrays), ['coords', 'energies', 'lattices'])
+            self.assertTrue(np.allclose(traj.read('coords'), coords, atol = 1e-6))
+            self.assertTrue(np.array_equal(traj.read('energies', 3, 20, 5), energies[3:20:5]))
+            xyz, lat = traj.trajectory(-9, None, 2)
+            self.assertTrue(np.allclose(xyz, coords[-9::2], atol = 1e-6))
+            self.assertTrue(np.array_equal(lat, lattices[-9::2]))
+            struct = traj[-1]
+            self.assertEqual(struct.atoms[1]['element'], 'O')
+            self.assertTrue(np.allclose(struct.atoms[1]['coords'], coords[24, 3:], atol = 1e-6))
+            self.assertEqual(len(traj[::3]), 9)
+            # negative steps, as python indexing
+            frames = traj[::-1]
+            self.assertEqual(len(frames), 25)
+            self.assertTrue(np.allclose(frames[0].coords, coords[24], atol = 1e-6))
+            self.assertTrue(np.allclose(frames[-1].lattice, lattices[0], atol = 1e-6))
+            frames = list(traj.iter_frames(20, 2, -7, chunk = 2))
+            self.assertTrue(np.allclose([f.coords for f in frames], coords[20:2:-7], atol = 1e-6))
+            with self.assertRaises(ValueError):
+                traj.read('forces')
+            with self.assertRaises(ValueError):
+                Trajectory(os.path.join(data, 'XDATCAR'))
+
+            # Test convert_xdatcar, fixed and changing lattices
+            for name in ['XDATCAR', 'XDATCAR2']:
+                # a copy, the sidecar index is written next to it
+                x = Xdatcar(shutil.copy(os.path.join(data, name), tmp))
+                traj = convert_xdatcar(x, os.path.join(tmp, name + '.vlt'), chunk = 2)
+                xyz, lat = x.trajectory()
+                xyz2, lat2 = traj.trajectory(memmap = os.path.join(tmp, 'coords.npy'))
+                self.assertTrue(np.array_equal(xyz, xyz2))
+                self.assertEqual(lat is None, lat2 is None)
+                self.assertTrue(np.array_equal(x.lattice, traj.lattice))
+                self.assertEqual(traj.structure(2).coord_type, x.structure(2).coord_type)
+
+            # Test convert_outcar
+            outcar = Outcar(os.path.join(data, 'OUTCAR2'))
+            traj = convert_outcar(outcar, os.path.join(tmp, 'OUTCAR2.vlt'), compress = 1)
+            self.assertEqual(len(traj), 13)
+            self.assertAlmostEqual(traj.read('energies', 1, 2)[0], outcar.energy_ionic_step(2))
+            self.assertTrue(np.allclose(traj.read('forces', 6, 7)[0], outcar.total_force_ionic_step(7)))
+            self.assertAlmostEqual(traj[9].atoms[1]['coords'][1, 0], 2.04820)
@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 import unittest
 import vasplib
 from vasplib.output.xdatcar import Xdatcar
@@ -8,11 +10,71 @@ import numpy as np
 class TestPeriodicTableClass(unittest.TestCase):
 
     def test(self):
-        x = Xdatcar(os.path.join(os.path.dirname(vasplib.__file__),'../test/output/XDATCAR'))
-        s = x.structure(2)
-        self.assertEqual(s.elements, ['Co', 'S'])
-        self.assertTrue(np.allclose(s.atoms[0]['coords'][0], np.array([0.50000000, 0.50000000, 0.53429442])))
-
-        x2 = Xdatcar(os.path.join(os.path.dirname(vasplib.__file__),'../test/output/XDATCAR2'))
-        s = x2.structure(1)
-        self.assertTrue(np.allclose(s.lattice[0], np.array([5.506401, 0.000000, 0.000000])))
\ No newline at end of file
+        with tempfile.TemporaryDirectory() as tmp:
+            # copies of the files, the sidecar indexes are written next to them
+            data = os.path.join(os.path.dirname(vasplib.__file__),'../test/output')
+            for name in ['XDATCAR', 'XDATCAR2']:
+                shutil.copy(os.path.join(data, name), os.path.join(tmp, name))
+
+            x = Xdatcar(os.path.join(tmp, 'XDATCAR'))
+            s = x.structure(2)
+            self.assertEqual(s.elements, ['Co', 'S'])
+            self.assertTrue(np.allclose(s.atoms[0]['coords'][0], np.array([0.50000000, 0.50000000, 0.53429442])))
+
+            x2 = Xdatcar(os.path.join(tmp, 'XDATCAR2'))
+            s = x2.structure(1)
+            self.assertTrue(np.allclose(s.lattice[0], np.array([5.506401, 0.000000, 0.000000])))
+
+            # Test the frame index, negative indexing and slicing
+            self.assertEqual(len(x), 3)
+            self.assertEqual(len(x2), 3)
+            self.assertTrue(x2._lattice_changed)
+            self.assertTrue(np.allclose(x2[1].lattice[1], [0, 5.302293, 0]))
+            self.assertTrue(np.allclose(x2[-1].atoms[1]['coords'][0], [0.88810270, 0.38565483, 0.56751776]))
+            self.assertTrue(np.allclose(x[-2].atoms[1]['coords'][0], [0.88819523, 0.38468557, 0.56707803]))
+            self.assertEqual(len(x[::2]), 2)
+            with self.assertRaises(IndexError):
+                x[3]
+
+            # Test Xdatcar.trajectory and Xdatcar.iter_frames
+            coords, lattices = x.trajectory()
+            self.assertEqual(coords.shape, (3, 6, 3))
+            self.assertIsNone(lattices)
+            self.assertTrue(np.allclose(coords[1, 2], [0.88819523, 0.38468557, 0.56707803]))
+            coords, lattices = x2.trajectory(start = -2, dtype = np.float32)
+            self.assertEqual(coords.dtype, np.float32)
+            self.assertTrue(np.allclose(lattices[:, 0, 0], [5.233651, 5.313019]))
+            frames = list(x2.iter_frames(step = 2))
+            self.assertEqual(len(frames), 2)
+            self.assertTrue(np.allclose(frames[1].lattice, x2[2].lattice))
+            self.assertTrue(np.allclose(frames[1].atoms[1]['coords'], x2[2].atoms[1]['coords']))
+
+            # memory-mapped output
+            coords, lattices = x.trajectory(0, 3, 2, memmap = os.path.join(tmp, 'coords.npy'))
+            self.assertTrue(np.array_equal(np.load(os.path.join(tmp, 'coords.npy')), x.trajectory()[0][::2]))
+            del coords
+
+            # An incomplete last frame is not indexed
+            fname = os.path.join(tmp, 'XDATCAR3')
+            with open(x2.filename, 'r') as fp:
+                lines = fp.readlines()
+            with open(fname, 'w') as fp:
+                fp.writelines(lines[:-3])
+            x3 = Xdatcar(fname)
+            self.assertEqual(len(x3), 2)
+            self.assertTrue(os.path.isfile(fname + '.idx.npz'))
+
+            # Cartesian frames of a changing lattice, scaled by the factor of each frame
+            fname = os.path.join(tmp, 'XDATCAR4')
+            with open(fname, 'w') as fp:
+                for n, factor in enumerate([1.0, 2.0]):
+                    fp.write('cart\n{}\n4 0 0\n0 4 0\n0 0 4\n Li\n 2\n'.format(factor))
+                    fp.write('Cartesian configuration= {}\n1 1 1\n0.5 0 0\n'.format(n + 1))
+            coords, lattices = Xdatcar(fname).trajectory()
+            self.assertTrue(np.allclose(coords[:, 0], [[1, 1, 1], [2, 2, 2]]))
+            self.assertTrue(np.allclose(lattices[:, 0, 0], [4, 8]))
+
+            # The sidecar index is reused while the file is unchanged
+            np.savez(fname + '.idx.npz', stamp = np.load(fname + '.idx.npz')['stamp'],
+                    offsets = np.array([0]))
+            self.assertEqual(len(Xdatcar(fname)), 1)
@@ -1,7 +1,10 @@
 import os
+import tempfile
 import unittest
 import vasplib
-from vasplib.vasp.poscar import Poscar
+from vasplib.vasp.poscar import Poscar, write_poscars
+from vasplib.core.structure import Structure
+import numpy as np
 import copy
 
 class TestPeriodicTableClass(unittest.TestCase):
@@ -13,3 +16,69 @@ class TestPeriodicTableClass(unittest.TestCase):
         
         p.write_POSCAR(os.path.join(os.path.dirname(vasplib.__file__),'../test/vasp/BN_POSCAR'))
 
+
+    def test_contcar(self):
+        text = """Li O
+
+  2.0
+  2.0 0.0 0.0
+  0.0 2.0 0.0 ! comment
+
+  0.0 0.0 2.0
+Li O
+1 2
+Selective dynamics
+Direct
+0.1 0.2 0.3 T F T
+0.4 0.5 0.6 F F F Li # label
+0.7 0.8 0.9 T T T
+
+0.01 0.02 0.03
+0.04 0.05 0.06
+0.07 0.08 0.09
+"""
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, 'CONTCAR')
+            with open(fname, 'w') as fp:
+                fp.write(text)
+            p = Poscar()
+            p.from_POSCAR(fname)
+            self.assertTrue(np.allclose(p.lattice, np.identity(3) * 4))
+            self.assertEqual(p.elements, ['Li', 'O'])
+            self.assertTrue(np.allclose(p.coords[2], [0.7, 0.8, 0.9]))
+            self.assertEqual(p.selective_flags.dtype, bool)
+            self.assertEqual(p.selective_flags.tolist(), [[True, False, True], [False] * 3, [True] * 3])
+            self.assertTrue(np.allclose(p.velocities[1], [0.04, 0.05, 0.06]))
+
+            # the flags and the velocities are written back
+            p.write_POSCAR(fname)
+            q = Poscar()
+            q.from_POSCAR(fname)
+            self.assertTrue(np.array_equal(q.selective_flags, p.selective_flags))
+            self.assertTrue(np.allclose(q.velocities, p.velocities))
+            s = Structure()
+            s.from_POSCAR(fname)
+            self.assertTrue(np.allclose(s.coords, p.coords))
+
+    def test_write(self):
+        rng = np.random.default_rng(0)
+        structures = [Structure.from_arrays(np.identity(3) * 5, rng.random((4, 3)), ['Li', 'O'], [1, 3])
+                      for i in range(6)]
+        with tempfile.TemporaryDirectory() as tmp:
+            # Test the precision
+            fname = os.path.join(tmp, 'POSCAR')
+            structures[0].write_POSCAR(fname, precision = 6)
+            with open(fname) as fp:
+                lines = fp.read().splitlines()
+            self.assertEqual(lines[-1], '    '.join(['{:.6f}'.format(x) for x in structures[0].coords[-1]]))
+
+            # Test the batch writer with a filename pattern
+            filenames = write_poscars(structures, os.path.join(tmp, 'disp-{:02d}', 'POSCAR'), nthreads = 3)
+            self.assertEqual(len(filenames), 6)
+            for struct, fname in zip(structures, filenames):
+                s = Structure()
+                s.from_POSCAR(fname)
+                self.assertTrue(np.allclose(s.coords, struct.coords))
+                self.assertEqual(s.elements, ['Li', 'O'])
+            with self.assertRaises(ValueError):
+                write_poscars(structures, filenames[:2])
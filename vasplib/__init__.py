@@ -9,10 +9,13 @@ def info():
     print('')
     print('Dependency')
     print('------------')
+    import importlib.util
+    from importlib import metadata
     for modui in ['numpy', 'scipy']:
-        try:
-            mm = __import__(modui)
-            print('%10s %10s   %s' % (modui, mm.__version__, mm.__path__[0]))
-        except ImportError:
+        # found without importing the packages
+        spec = importlib.util.find_spec(modui)
+        if spec is None:
             print('%10s %10s Not Found' % (modui, ''))
+        else:
+            print('%10s %10s   %s' % (modui, metadata.version(modui), spec.submodule_search_locations[0]))
     print()
\ No newline at end of file
@@ -1,6 +1,5 @@
 import numpy as np
 import math
-import scipy.constants as constants
 
 class Bandstructure(object):
     """
@@ -117,6 +116,7 @@ class Bandstructure(object):
         Y = self.eigenvalues[kpoint_idx - N: kpoint_idx + N + 1, band_idx]
         p = np.polyfit(X, Y, deg = 2)
 
+        import scipy.constants as constants # imported on demand
         h_bar = 6.582119E-16;  # reduced planck constant in eV * s
         eV_J = constants.eV; # electron volt in Jouel
         m_e = constants.m_e; # electron mass in Kg
@@ -138,6 +138,7 @@ class Bandstructure(object):
         Y = self.eigenvalues[kpoint_idx - N: kpoint_idx + N + 1, band_idx]
         p = np.polyfit(X, Y, deg = 2)
 
+        import scipy.constants as constants # imported on demand
         h_bar = constants.physical_constants['Planck constant in eV s'][0] / (2 * np.pi);  # reduced planck constant in eV * s
         eV_J = constants.eV; # electron volt in Jouel
         m_e = constants.m_e; # electron mass in Kg
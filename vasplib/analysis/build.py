@@ -2,6 +2,55 @@
 import numpy as np
 from vasplib.core.structure import Structure
 import copy
+import itertools
+
+def supercell_matrix(P):
+    """
+    Return the 3 * 3 integer supercell matrix of P.
+    Args:
+        P (list(int) or 3*3 list(int)): duplicates along a, b and c axis, or the matrix
+    Returns:
+        3 * 3 np.array (int)
+    """
+    P = np.asarray(P)
+    if P.shape == (3,):
+        P = np.diag(P)
+    if P.shape != (3, 3) or not np.array_equal(P, np.round(P)):
+        raise ValueError("The supercell matrix {} is not 3 or 3*3 integers.".format(P.tolist()))
+    P = np.round(P).astype(int)
+    if int(round(np.linalg.det(P))) == 0:
+        raise ValueError("The supercell matrix {} is singular.".format(P.tolist()))
+    return P
+
+def lattice_points(P):
+    """
+    List the lattice translations t of the cell inside the supercell P, i.e.,
+    the integer vectors with 0 <= t P^-1 < 1, one per cell of the supercell.
+    The points of the bounding box of the supercell are tested at once, exactly,
+    in integers with the adjugate matrix of P.
+    Args:
+        P (3*3 np.array, int): supercell matrix, see supercell_matrix()
+    Returns:
+        |det(P)| * 3 np.array (int): in the basis of the lattice vectors of the cell
+    """
+    P = np.asarray(P, dtype = int)
+    det = int(round(np.linalg.det(P)))
+    adjugate = np.rint(np.linalg.inv(P) * det).astype(int) # t P^-1 = t adj(P) / det(P)
+    corners = np.matmul(np.array(list(itertools.product((0, 1), repeat = 3))), P)
+    lower, upper = corners.min(axis = 0), corners.max(axis = 0)
+    points = np.stack(np.meshgrid(*[np.arange(lo, up + 1) for lo, up in zip(lower, upper)],
+                                  indexing = 'ij'), axis = -1).reshape(-1, 3)
+    frac = np.matmul(points, adjugate * np.sign(det))
+    points = points[np.all((frac >= 0) & (frac < abs(det)), axis = 1)]
+    if len(points) != abs(det):
+        raise ValueError("{} lattice points found in the supercell {}.".format(len(points), P.tolist()))
+    return points
+
+def _per_atom(value, num):
+    """
+    Return True if value is an array with one row per atom of a species block of num atoms.
+    """
+    return isinstance(value, np.ndarray) and value.ndim > 0 and len(value) == num
 
 class Build(Structure):
     """
@@ -17,58 +66,46 @@ class Build(Structure):
 
     def supercell(self, P, inplace = True):
         """
-        Make supercell
+        Make supercell with the lattice vectors P L, L the lattice vectors (rows)
+        of the structure. The integer translations inside the new cell are
+        enumerated at once, see lattice_points(), and the coordinates of all the
+        images are generated by one broadcast per species block; inside a block,
+        the images are ordered cell by cell, as the atoms of the cell, so the
+        species blocks stay contiguous. The images are the atoms translated by
+        lattice vectors, not wrapped into the new cell.
+        Per-atom arrays of the species blocks (e.g., selective dynamics flags) and
+        the velocities of a Poscar are repeated with the atoms.
         Args:
-            P (list(int)): duplicates along a, b and c axis, P[i] is positive integers.
+            P (list(int) or 3*3 list(int)): duplicates along a, b and c axis,
+                or a non-singular integer matrix, e.g., [[1, 1, 0], [-1, 1, 0], [0, 0, 2]]
             inplace (bool): whether modify the structure in place, default to True
         """
-        if inplace:
-            if self.coord_type == 'cart':
-                for atom in self.atoms:
-                    original_coords = atom['coords']
-                    atom['coords'] = np.empty((0, 3))
-                    for i in range(int(P[0])):
-                        for j in range(int(P[1])):
-                            for k in range(int(P[2])):
-                                atom['coords'] = np.concatenate((atom['coords'], original_coords + np.matmul([[i, j, k]], self.lattice)))
-                    atom['num'] = len(atom['coords'])
-                self.lattice = self.lattice * [[P[0]], [P[1]], [P[2]]]
-
-            if self.coord_type == 'direct':
-                for atom in self.atoms:
-                    original_coords = atom['coords']
-                    atom['coords'] = np.empty((0, 3))
-                    for i in range(int(P[0])):
-                        for j in range(int(P[1])):
-                            for k in range(int(P[2])):
-                                atom['coords'] = np.concatenate((atom['coords'], original_coords/P + [i/P[0], j/P[1], k/P[2]]))
-                    atom['num'] = len(atom['coords'])
-                self.lattice = self.lattice * [[P[0]], [P[1]], [P[2]]]
-
+        s = self if inplace else copy.deepcopy(self)
+        P = supercell_matrix(P)
+        points = lattice_points(P)
+        ncells = len(points)
+        if s.coord_type == 'cart':
+            coords, shifts = s._coords, np.matmul(points, s.lattice)
         else:
-            s = copy.deepcopy(self)
-            if s.coord_type == 'cart':
-                for atom in s.atoms:
-                    original_coords = atom['coords']
-                    atom['coords'] = np.empty((0, 3))
-                    for i in range(int(P[0])):
-                        for j in range(int(P[1])):
-                            for k in range(int(P[2])):
-                                atom['coords'] = np.concatenate((atom['coords'], original_coords + np.matmul([[i, j, k]], s.lattice)))
-                    atom['num'] = len(atom['coords'])
-                s.lattice = s.lattice * [[P[0]], [P[1]], [P[2]]]
+            inv = np.linalg.inv(P)
+            coords, shifts = np.matmul(s._coords, inv), np.matmul(points, inv)
+        # the old atom of each new atom, block by block, cell-major inside a block
+        nums = np.bincount(s._species, minlength = len(s._elements))
+        starts = np.concatenate(([0], np.cumsum(nums)))
+        order = np.concatenate([np.tile(np.arange(starts[k], starts[k + 1]), ncells)
+                                for k in range(len(nums))]).astype(int)
+        coords = np.concatenate([(shifts[:, None, :] + coords[starts[k] : starts[k + 1]][None, :, :]).reshape(-1, 3)
+                                 for k in range(len(nums))]) if len(order) else np.empty((0, 3))
+        extras = [{key: np.tile(value, (ncells,) + (1,) * (value.ndim - 1)) if _per_atom(value, num) else value
+                   for key, value in extra.items()}
+                  for extra, num in zip(s._extras, nums)]
+        velocities = getattr(s, 'velocities', None)
+        if velocities is not None:
+            s.velocities = np.asarray(velocities)[order]
+        s._set_arrays(coords, s._elements, nums * ncells, extras, copy = False)
+        s.lattice = np.matmul(P, s.lattice)
 
-            if s.coord_type == 'direct':
-                for atom in s.atoms:
-                    original_coords = atom['coords']
-                    atom['coords'] = np.empty((0, 3))
-                    for i in range(int(P[0])):
-                        for j in range(int(P[1])):
-                            for k in range(int(P[2])):
-                                atom['coords'] = np.concatenate((atom['coords'], original_coords/P + [i/P[0], j/P[1], k/P[2]]))
-                    atom['num'] = len(atom['coords'])
-                s.lattice = s.lattice * [[P[0]], [P[1]], [P[2]]]
-                
+        if not inplace:
             return s
 
     def permute_atom(self, idx, displacement, inplace = True):
@@ -79,30 +116,11 @@ class Build(Structure):
             displacement (list(float)): displacement vector along x, y, and z axis
             inplace (bool): whether modify the structure in place, default to True
         """
-        # Change the structure in place
-        if inplace:
-            for element in self.atoms:
-                if idx >= element['num']:
-                    idx -= element['num']
-                elif idx >= 0:
-                    element['coords'][idx] = element['coords'][idx] + displacement
-                    idx = -1
-                else:
-                    break
-
-            if idx > 0:
-                raise ValueError("The atom idx {} exceeds the number of atoms.".format(idx))
+        s = self if inplace else copy.deepcopy(self)
+        if not 0 <= idx < s.atom_nums:
+            raise ValueError("The atom idx {} exceeds the number of atoms.".format(idx))
+        s._coords[idx] += displacement
+        s.invalidate()
 
-        # Return a permuted structure
-        else:
-            s = copy.deepcopy(self)
-
-            for element in s.atoms:
-                if idx >= element['num']:
-                    idx -= element['num']
-                else:
-                    element['coords'][idx] = element['coords'][idx] + displacement
-                    idx = 0
-            if idx > 0:
-                raise ValueError("The atom idx {} exceeds the number of atoms.".format(idx))
-            return s
\ No newline at end of file
+        if not inplace:
+            return s
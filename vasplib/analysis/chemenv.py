@@ -24,8 +24,8 @@ class LocalEnv(Structure):
         """
         original_coord_type = self.coord_type
         self.cart_to_direct()
-        for atom in self.atoms:
-            atom['coords'] = atom['coords'] % 1
+        self._coords %= 1
+        self.invalidate()
 
         if original_coord_type == 'cart':
             self.direct_to_cart()
@@ -0,0 +1,223 @@
+# coding: utf-8
+import numpy as np
+from vasplib.analysis.build import Build
+from vasplib.analysis.symmetry import symmetry_operations, translation_group
+
+"""
+Class for enumerating the substitution and vacancy configurations of a structure,
+e.g., the dopants and vacancies of a supercell, up to its symmetry.
+"""
+
+class Configurations(object):
+    """
+    Enumerator of the configurations of k sites substituted (or emptied) on
+    sublattices of a host structure, one configuration per class of
+    symmetry-equivalent ones. A configuration is a tuple of sorted site tuples,
+    one per substitution.
+    The configurations are generated in order, a site at a time, and a partial
+    configuration is extended only if it is canonical, i.e., the smallest of its
+    images under the symmetry operations, compared as sorted tuples; the images
+    are computed at once from the atom permutations of the operations. Removing
+    the last site of a canonical configuration leaves a canonical one, so every
+    class is reached exactly once, without storing the configurations seen, and
+    the memory used is bounded by the number of operations times k.
+    The numbers of classes are counted without the enumeration by Burnside's
+    lemma, from the cycles of the permutations.
+    >>> configs = Configurations(supercell, [('O', None, 1), ('Co', 'Ni', 2)])
+    >>> configs.count()
+    >>> for struct in configs.structures():
+    ...     struct.write_POSCAR(...)
+    """
+    def __init__(self, struct, substitutions, group = 'space', symprec = 1e-3):
+        """
+        Create a Configurations object.
+        Args:
+            struct (Structure): the host structure
+            substitutions (list of (sites, element, k)): the sites (element symbol of
+                the sublattice, or list(int) of atom indices), the new element (str,
+                None for vacancies) and the number of sites substituted
+            group (str): the operations identifying the configurations, 'space'
+                (space group), 'translation' (pure translations of the supercell)
+                or None, default to 'space'
+            symprec (float): tolerance of the positions (Ang), see symmetry_operations()
+        """
+        self.struct = struct
+        natoms = struct.atom_nums
+        symbols = struct.symbols
+        self.sites, self.elements, self.nums = [], [], []
+        for sites, element, k in substitutions:
+            if isinstance(sites, str):
+                sites = np.flatnonzero(symbols == sites)
+            sites = np.unique(np.asarray(sites, dtype = int))
+            if len(sites) == 0 or sites[0] < 0 or sites[-1] >= natoms:
+                raise ValueError("The sites {} are not atoms of the structure.".format(sites.tolist()))
+            if not 0 <= k <= len(sites):
+                raise ValueError("{} sites substituted on {} sites.".format(k, len(sites)))
+            self.sites.append(sites)
+            self.elements.append(element)
+            self.nums.append(int(k))
+
+        if group == 'space':
+            permutations = symmetry_operations(struct, symprec)[2]
+        elif group == 'translation':
+            permutations = translation_group(struct, symprec)[1]
+        elif group is None:
+            permutations = np.arange(natoms)[None, :]
+        else:
+            raise ValueError("Not supported group: {}".format(group))
+        # the operations mapping each sublattice onto itself
+        members = np.zeros((len(self.sites), natoms), dtype = bool)
+        for s, sites in enumerate(self.sites):
+            members[s, sites] = True
+        keep = np.all([np.all(members[s][permutations[:, sites]], axis = 1)
+                       for s, sites in enumerate(self.sites)], axis = 0)
+        self.permutations = permutations[keep]
+        self._members = members
+
+    def canonical(self, codes):
+        """
+        Check whether a partial configuration is the smallest of its images.
+        Args:
+            codes (np.array, int): sorted codes s * N + i of the substituted sites i,
+                s the index of the substitution
+        Returns:
+            bool
+        """
+        natoms = self.permutations.shape[1]
+        images = np.sort(codes // natoms * natoms + self.permutations[:, codes % natoms], axis = 1)
+        diff = images - codes
+        nonzero = diff != 0
+        first = np.argmax(nonzero, axis = 1)
+        smaller = np.any(nonzero, axis = 1) & (diff[np.arange(len(diff)), first] < 0)
+        return not np.any(smaller)
+
+    def __iter__(self):
+        """
+        Generate the configurations, one per class, lazily.
+        Yields:
+            tuple of tuple(int): the sorted sites of each substitution
+        """
+        natoms = self.struct.atom_nums
+        # codes[bounds[s] : bounds[s + 1]] are the sites of the substitution s
+        bounds = np.concatenate(([0], np.cumsum(self.nums))).tolist()
+        trivial = len(self.permutations) == 1
+        used = np.zeros(natoms, dtype = bool)
+        codes = []
+
+        def extend(s, start):
+            # add the next site of the substitution s, from the position start of its sites
+            if len(codes) == bounds[s + 1]:
+                if s + 1 < len(self.nums):
+                    yield from extend(s + 1, 0)
+                else:
+                    yield tuple(tuple(int(code % natoms) for code in codes[bounds[t] : bounds[t + 1]])
+                                for t in range(len(self.nums)))
+                return
+            sites = self.sites[s]
+            for p in range(start, len(sites) - (bounds[s + 1] - len(codes)) + 1):
+                if used[sites[p]]:
+                    continue
+                codes.append(s * natoms + sites[p])
+                if trivial or self.canonical(np.array(codes)):
+                    used[sites[p]] = True
+                    yield from extend(s, p + 1)
+                    used[sites[p]] = False
+                codes.pop()
+
+        if self.nums:
+            yield from extend(0, 0)
+
+    def count(self, symmetry = True):
+        """
+        Count the configurations by Burnside's lemma, without enumerating them:
+        the number of classes is the average over the operations of the numbers
+        of configurations they leave unchanged, i.e., substituting whole cycles.
+        Args:
+            symmetry (bool): the number of classes, or of all the configurations,
+                default to True
+        Returns:
+            int
+        """
+        natoms = self.permutations.shape[1]
+        permutations = self.permutations if symmetry else np.arange(natoms)[None, :]
+        # the cycle length of every atom under every operation
+        lengths = np.zeros(permutations.shape, dtype = int)
+        current = np.broadcast_to(np.arange(natoms), permutations.shape).copy()
+        rows = np.arange(len(permutations))[:, None]
+        m = 0
+        while np.any(lengths == 0):
+            m += 1
+            current = permutations[rows, current]
+            lengths[(current == np.arange(natoms)) & (lengths == 0)] = m
+        # the sublattices of every atom, the same along a cycle
+        signature = np.dot(1 << np.arange(len(self.sites)), self._members)
+        fixed = {}
+        total = 0
+        for row in lengths:
+            involved = signature > 0
+            pairs, counts = np.unique(np.stack((signature[involved], row[involved])), axis = 1,
+                                      return_counts = True)
+            key = tuple(zip(pairs[0].tolist(), pairs[1].tolist(), (counts // pairs[1]).tolist()))
+            if key not in fixed:
+                fixed[key] = self._fixed(key)
+            total += fixed[key]
+        return total // len(permutations)
+
+    def _fixed(self, cycles):
+        """
+        Number of configurations substituting whole cycles: the coefficient of
+        prod x_s^k_s in prod over the cycles of (1 + sum_s x_s^length), s over the
+        sublattices of the cycle.
+        Args:
+            cycles (tuple of (signature, length, number of cycles))
+        """
+        poly = np.zeros([k + 1 for k in self.nums], dtype = object)
+        poly[(0,) * len(self.nums)] = 1
+        for signature, length, ncycles in cycles:
+            subs = [s for s in range(len(self.nums)) if signature >> s & 1 and length <= self.nums[s]]
+            for c in range(ncycles):
+                new = poly.copy()
+                for s in subs:
+                    src = [slice(None)] * len(self.nums)
+                    dst = [slice(None)] * len(self.nums)
+                    src[s] = slice(0, self.nums[s] + 1 - length)
+                    dst[s] = slice(length, None)
+                    new[tuple(dst)] += poly[tuple(src)]
+                poly = new
+        return int(poly[tuple(self.nums)])
+
+    def structure(self, config):
+        """
+        Build the structure of a configuration: the substituted atoms are moved to
+        blocks of their new elements, after the blocks of the host, and the
+        vacancies removed.
+        Args:
+            config (tuple of tuple(int)): see Configurations.__iter__()
+        Returns:
+            Build
+        """
+        host = self.struct
+        elements = list(host.elements)
+        species = np.array(host.species)
+        for sites, element in zip(config, self.elements):
+            if element is None:
+                species[list(sites)] = -1
+                continue
+            if element not in elements[len(host.elements):]:
+                elements.append(element)
+            species[list(sites)] = elements.index(element, len(host.elements))
+        keep = np.flatnonzero(species >= 0)
+        order = keep[np.argsort(species[keep], kind = 'stable')]
+        nums = np.bincount(species[keep], minlength = len(elements))
+        blocks = [k for k in range(len(elements)) if nums[k] > 0]
+        return Build.from_arrays(host.lattice, host.coords[order], [elements[k] for k in blocks],
+                                 nums[blocks], host.coord_type, host.comment)
+
+    def structures(self):
+        """
+        Generate the structures of the configurations, lazily, see structure().
+        Yields:
+            Build
+        """
+        for config in self:
+            yield self.structure(config)
@@ -0,0 +1,186 @@
+# coding: utf-8
+import numpy as np
+
+"""
+Functions for the mean squared displacement (MSD) and diffusion coefficients of
+molecular dynamics trajectories, e.g., read by Xdatcar.trajectory().
+"""
+
+def _unwrap_chunk(frac, previous, unwrapped):
+    """
+    Unwrap a chunk of direct coordinates, continuing from the frame before the
+    chunk, given wrapped (previous) and unwrapped.
+    """
+    steps = np.diff(np.concatenate(([previous], frac)), axis = 0)
+    steps -= np.round(steps)
+    return unwrapped + np.cumsum(steps, axis = 0)
+
+def unwrap(coords, lattices = None, lattice = None, out = None, chunk = 1000):
+    """
+    Unwrap the direct coordinates across the periodic boundaries, assuming no atom
+    moves more than half a cell between two frames, and convert them to cartesian
+    coordinates. The frames are processed chunk by chunk, so coords and out may be
+    memory-mapped arrays.
+    Args:
+        coords (nframes * natoms * 3 np.array): direct coordinates
+        lattices (nframes * 3 * 3 np.array): lattice of each frame, or None
+        lattice (3 * 3 np.array): the fixed lattice, used if lattices is None
+        out (nframes * natoms * 3 np.array): the output array, default to a new array
+        chunk (int): number of frames processed at a time, default to 1000
+    Returns:
+        positions (nframes * natoms * 3 np.array): unwrapped cartesian coordinates (Ang)
+    """
+    if out is None:
+        out = np.empty(np.shape(coords))
+    previous = np.asarray(coords[0], dtype = float)
+    unwrapped = previous.copy()
+    for i in range(0, len(coords), chunk):
+        frac = np.asarray(coords[i : i + chunk], dtype = float)
+        frac_unwrapped = _unwrap_chunk(frac, previous, unwrapped)
+        if lattices is None:
+            out[i : i + chunk] = np.matmul(frac_unwrapped, lattice)
+        else:
+            out[i : i + chunk] = np.matmul(frac_unwrapped, lattices[i : i + chunk])
+        previous = frac[-1]
+        unwrapped = frac_unwrapped[-1]
+    return out
+
+def xdatcar_positions(xdatcar, start = 0, stop = None, step = 1, memmap = None, chunk = 1000):
+    """
+    Read the frames of an Xdatcar trajectory and unwrap them, chunk by chunk, so
+    only chunk frames of coordinates are held in RAM besides the output.
+    Args:
+        xdatcar (Xdatcar or Trajectory): the trajectory
+        start, stop, step (int): frames read, as range(start, stop, step)
+        memmap (str): if given, the unwrapped positions are written to this .npy
+            file mapped in memory instead of RAM
+        chunk (int): number of frames read at a time, default to 1000
+    Returns:
+        positions (nframes * natoms * 3 np.array): unwrapped cartesian coordinates (Ang)
+    """
+    frames = range(*slice(start, stop, step).indices(len(xdatcar)))
+    shape = (len(frames), xdatcar.natoms, 3)
+    if memmap is None:
+        out = np.empty(shape)
+    else:
+        out = np.lib.format.open_memmap(memmap, mode = 'w+', dtype = float, shape = shape)
+    cart = xdatcar.structure(1).coord_type == 'cart'
+    previous = unwrapped = None
+    for i in range(0, len(frames), chunk):
+        batch = frames[i : i + chunk]
+        # a backward range ending at the first frame stops at -1, i.e., None
+        coords, lattices = xdatcar.trajectory(batch.start, batch.stop if batch.stop >= 0 else None, batch.step)
+        if lattices is None:
+            lattices = xdatcar.lattice
+        if cart:
+            coords = np.matmul(coords, np.linalg.inv(lattices))
+        if previous is None:
+            previous = unwrapped = coords[0]
+        frac_unwrapped = _unwrap_chunk(coords, previous, unwrapped)
+        out[i : i + len(batch)] = np.matmul(frac_unwrapped, lattices)
+        previous, unwrapped = coords[-1], frac_unwrapped[-1]
+    return out
+
+def msd_fft(positions, chunk = 256):
+    """
+    Mean squared displacement of every atom averaged over all time origins,
+    computed with the FFT algorithm in O(nframes log(nframes)):
+        MSD(m) = S1(m) - 2 * S2(m),
+    where S2 is the position autocorrelation and S1 follows from a recursion over
+    the squared positions. Atoms are processed chunk by chunk.
+    Args:
+        positions (nframes * natoms * 3 np.array): unwrapped cartesian coordinates
+        chunk (int): number of atoms processed at a time, default to 256
+    Returns:
+        msd (nframes * natoms np.array): unit: Ang^2, msd[m] is at the time lag m
+    """
+    nframes, natoms = np.shape(positions)[:2]
+    msd = np.empty((nframes, natoms))
+    lag = np.arange(nframes)
+    counts = (nframes - lag)[:, None]
+    for j in range(0, natoms, chunk):
+        x = np.asarray(positions[:, j : j + chunk], dtype = float)
+        # S1: recursion on the squared norms, vectorized with cumulative sums
+        square = np.sum(x**2, axis = 2)
+        total = np.sum(square, axis = 0)
+        head = np.concatenate((np.zeros((1, square.shape[1])), np.cumsum(square, axis = 0)[:-1]))
+        tail = np.concatenate((np.zeros((1, square.shape[1])), np.cumsum(square[::-1], axis = 0)[:-1]))
+        s1 = (2 * total - head - tail) / counts
+        # S2: autocorrelation, zero padded to avoid the circular wrap
+        f = np.fft.rfft(x, n = 2 * nframes, axis = 0)
+        s2 = np.sum(np.fft.irfft(f * np.conj(f), n = 2 * nframes, axis = 0)[:nframes], axis = 2) / counts
+        msd[:, j : j + chunk] = s1 - 2 * s2
+    return msd
+
+def species_msd(msd, atoms):
+    """
+    Average the MSD of the atoms over each species.
+    Args:
+        msd (nframes * natoms np.array): see msd_fft()
+        atoms (list of dict): {'element': (str), 'num': (int)} in the order of the atoms
+    Returns:
+        dict: {element (str): nframes np.array}
+    """
+    result = {}
+    start = 0
+    for atom in atoms:
+        result[atom['element']] = np.mean(msd[:, start : start + atom['num']], axis = 1)
+        start += atom['num']
+    return result
+
+def fit_diffusion(time, msd, window = (0.1, 0.5), dim = 3):
+    """
+    Fit the diffusion coefficient from MSD = 2 * dim * D * t + b, in a window of
+    the time lags, which skips the ballistic regime and the poorly averaged long lags.
+    Args:
+        time (np.array): time lags (fs)
+        msd (np.array): MSD (Ang^2)
+        window (tuple(float)): fraction of the total time fitted, default to (0.1, 0.5)
+        dim (int): dimensionality of the diffusion, default to 3
+    Returns:
+        D (float): diffusion coefficient, unit: cm^2/s
+    """
+    time = np.asarray(time)
+    lower, upper = window[0] * time[-1], window[1] * time[-1]
+    selected = (time >= lower) & (time <= upper)
+    if np.count_nonzero(selected) < 2:
+        raise ValueError("Less than 2 points in the fitting window {}.".format(window))
+    slope = np.polyfit(time[selected], np.asarray(msd)[selected], 1)[0]
+    # 1 Ang^2/fs = 0.1 cm^2/s
+    return slope / (2 * dim) * 0.1
+
+def diffusion_analysis(xdatcar, dt, start = 0, stop = None, step = 1,
+        window = (0.1, 0.5), nblocks = 1, dim = 3, memmap = None):
+    """
+    Compute the MSD and the diffusion coefficient of each species of an Xdatcar
+    trajectory. With nblocks > 1, the trajectory is split into blocks analyzed
+    independently, giving an estimate of the statistical error.
+    Args:
+        xdatcar (Xdatcar): the trajectory
+        dt (float): time between two successive frames in the file (fs),
+            i.e., POTIM * NBLOCK
+        start, stop, step (int): frames analyzed, as range(start, stop, step)
+        window (tuple(float)): fraction of the time lags fitted, default to (0.1, 0.5)
+        nblocks (int): number of blocks, default to 1
+        dim (int): dimensionality of the diffusion, default to 3
+        memmap (str): if given, the unwrapped positions are kept in this .npy file
+            mapped in memory instead of RAM
+    Returns:
+        dict: {element (str): {'time': np.array (fs), 'msd': np.array (Ang^2),
+            'D': float (cm^2/s), 'D_err': float (cm^2/s)}}, the MSD of the first block
+    """
+    positions = xdatcar_positions(xdatcar, start, stop, step, memmap)
+    size = len(positions) // nblocks
+    time = np.arange(size) * dt * step
+    results = {}
+    for i in range(nblocks):
+        msd = species_msd(msd_fft(positions[i * size : (i + 1) * size]), xdatcar._atoms)
+        for element, values in msd.items():
+            result = results.setdefault(element, {'time': time, 'msd': values, 'D_blocks': []})
+            result['D_blocks'].append(fit_diffusion(time, values, window, dim))
+
+    for result in results.values():
+        blocks = result.pop('D_blocks')
+        result['D'] = np.mean(blocks)
+        result['D_err'] = np.std(blocks, ddof = 1) / np.sqrt(nblocks) if nblocks > 1 else 0.0
+    return results
@@ -0,0 +1,213 @@
+# coding: utf-8
+import numpy as np
+from copy import deepcopy
+from vasplib.core.structure import Structure, format_rows
+from vasplib.analysis.symmetry import symmetry_operations, translation_group, cartesian_rotations, \
+    equivalent_atoms
+from vasplib.vasp.poscar import write_poscars
+
+"""
+Class and functions for the sets of displaced structures of the finite-displacement
+methods, e.g., phonons and elastic constants: lightweight structures sharing the
+arrays of the parent, the displacements reduced by the site symmetries, and the
+streaming write-out of the job directories.
+"""
+
+class DisplacedStructure(Structure):
+    """
+    A structure with one atom of a parent structure displaced, storing only the
+    atom index and the displacement. The lattice, the species and the coordinates
+    of the parent are shared (copy on write): the coordinates are copied only when
+    they are read or changed, and writing the POSCAR file reuses the formatted
+    coordinates of the parent, shared by the structures of a set, with one line
+    replaced. The parent must not be changed while its displaced structures are
+    in use. copy.deepcopy() returns an independent Structure.
+    >>> for struct in displacements(parent, 0.01, symmetry = True):
+    ...     struct.write_POSCAR('POSCAR')
+    """
+    __slots__ = ('parent', 'index', 'displacement', '_own', '_shared')
+
+    def __init__(self, parent, index, displacement, shared = None):
+        """
+        Create a DisplacedStructure object.
+        Args:
+            parent (Structure): the undisplaced structure
+            index (int): the index of the displaced atom
+            displacement (list(float)): displacement vector along x, y and z (Ang)
+            shared (dict): cache of the formatted coordinates of the parent,
+                shared by the displaced structures of a set, default to None
+        """
+        if not 0 <= index < parent.atom_nums:
+            raise ValueError("The atom idx {} exceeds the number of atoms.".format(index))
+        self.parent = parent
+        self.index = int(index)
+        self.displacement = np.asarray(displacement, dtype = float)
+        self.comment = parent.comment
+        self.coord_type = parent.coord_type
+        self._lattice = parent._lattice
+        self._cache = parent._lattice_cache()
+        self._species = parent._species
+        self._elements = list(parent._elements)
+        self._extras = [dict(extra) for extra in parent._extras]
+        self._converted = None
+        self._own = None
+        self._shared = shared if shared is not None else {}
+
+    def _delta(self):
+        """
+        Return the displacement in the coord_type of the parent.
+        """
+        if self.parent.coord_type == 'direct':
+            return np.matmul(self.displacement, self.parent.inv_lattice)
+        return self.displacement
+
+    @property
+    def _coords(self):
+        # the coordinates of the parent are copied on the first access
+        if self._own is None:
+            coords = self.parent._coords.copy()
+            coords[self.index] += self._delta()
+            self._own = coords
+        return self._own
+
+    @_coords.setter
+    def _coords(self, coords):
+        self._own = coords
+
+    def _parent_rows(self, precision):
+        """
+        Return the formatted coordinates of the parent and the offsets of the
+        lines, computed once per set of displaced structures and again if the
+        coordinates of the parent changed.
+        """
+        coords = self.parent._coords
+        rows = self._shared.get(precision)
+        if rows is None or not np.array_equal(rows[2], coords):
+            text = format_rows(coords, precision)
+            offsets = np.concatenate(([0], np.cumsum([len(line) + 1 for line in text.splitlines()])))
+            rows = self._shared[precision] = (text, offsets, coords.copy())
+        return rows[:2]
+
+    def _write_POSCAR(self, fp, precision = 14):
+        """
+        Write the structure to an opened file object, splicing the line of the
+        displaced atom into the formatted coordinates of the parent.
+        """
+        if self._own is not None or self.coord_type != self.parent.coord_type:
+            Structure._write_POSCAR(self, fp, precision)
+            return
+        self._write_header(fp, precision)
+        text, offsets = self._parent_rows(precision)
+        fp.write(text[:offsets[self.index]])
+        fp.write(format_rows((self.parent._coords[self.index] + self._delta())[None, :], precision))
+        fp.write(text[offsets[self.index + 1]:])
+
+    def __deepcopy__(self, memo):
+        struct = Structure(comment = self.comment, lattice = self._lattice.copy(), atoms = [],
+                           coord_type = self.coord_type)
+        struct._set_arrays(self._coords, self._elements,
+                           np.bincount(self._species, minlength = len(self._elements)),
+                           deepcopy(self._extras, memo))
+        return struct
+
+def displacement_vectors(delta = 0.01, plusminus = True):
+    """
+    The displacements along the cartesian axes.
+    Args:
+        delta (float): the length of the displacements (Ang), default to 0.01
+        plusminus (bool): both +delta and -delta, default to True
+    Returns:
+        6 * 3 np.array: +x, -x, +y, -y, +z, -z (3 * 3, +x, +y, +z without plusminus)
+    """
+    axes = np.eye(3) * delta
+    if plusminus:
+        return np.stack([axes, -axes], axis = 1).reshape(-1, 3)
+    return axes
+
+def _site_displacements(site, delta = 0.01, plusminus = True):
+    """
+    Reduce the displacements of an atom along the cartesian axes by its site
+    symmetry: an axis is kept if the images of the kept displacements don't
+    span it, and its -delta if no operation maps it onto +delta.
+    Args:
+        site (m * 3 * 3 np.array): cartesian rotations of the site symmetry
+        delta, plusminus: see displacement_vectors()
+    Returns:
+        list(3 np.array)
+    """
+    tol = 1e-3 * delta
+    kept, images = [], np.empty((0, 3))
+    for axis in np.eye(3) * delta:
+        axis_images = np.matmul(axis, site)
+        if len(images) and np.linalg.matrix_rank(np.vstack((images, axis_images)), tol) == \
+                np.linalg.matrix_rank(images, tol):
+            continue
+        kept.append(axis)
+        images = np.vstack((images, axis_images))
+        if plusminus and not np.any(np.all(np.abs(axis_images + axis) < tol, axis = 1)):
+            kept.append(-axis)
+    return kept
+
+def displacements(struct, delta = 0.01, atoms = None, plusminus = True, symmetry = False,
+        symprec = 1e-3):
+    """
+    Generate the displaced structures of a finite-displacement set, lazily: each
+    one is a DisplacedStructure sharing the arrays of struct.
+    With symmetry, only the symmetry-inequivalent atoms are displaced, and the
+    displacements of each atom are reduced by its site symmetry to the axes whose
+    images don't span the others (and -delta if not equivalent to +delta).
+    Args:
+        struct (Structure)
+        delta (float): the length of the displacements (Ang), default to 0.01
+        atoms (list(int)): the atoms to displace, default to all the atoms (or
+            the inequivalent ones with symmetry)
+        plusminus (bool): both +delta and -delta, default to True
+        symmetry (bool): reduce the set by the space-group operations, default to False
+        symprec (float): tolerance of the positions (Ang), see symmetry_operations()
+    Yields:
+        DisplacedStructure
+    """
+    vectors = displacement_vectors(delta, plusminus)
+    if symmetry:
+        # one operation per rotation, the pure translations of a supercell apart
+        rotations, translations, permutations = symmetry_operations(struct, symprec, translations = False)
+        rotations = cartesian_rotations(rotations, struct.lattice)
+        translation_permutations = translation_group(struct, symprec)[1]
+        translation_labels = equivalent_atoms(translation_permutations)
+        labels = equivalent_atoms(permutations, translation_permutations)
+        if atoms is None:
+            atoms = np.unique(labels)
+    elif atoms is None:
+        atoms = range(struct.atom_nums)
+    shared = {}
+    for i in atoms:
+        if symmetry:
+            # the rotations of the operations leaving the atom i in place
+            site = rotations[translation_labels[permutations[:, i]] == translation_labels[i]]
+            kept = _site_displacements(site, delta, plusminus)
+        else:
+            kept = vectors
+        for v in kept:
+            yield DisplacedStructure(struct, i, v, shared)
+
+def write_displacements(struct, filenames = 'disp-{:04d}/POSCAR', delta = 0.01, atoms = None,
+        plusminus = True, symmetry = False, symprec = 1e-3, precision = 14, nthreads = 4):
+    """
+    Write the displaced structures to the job directories as they are generated,
+    see displacements() and write_poscars(), without keeping the set in memory.
+    Args:
+        struct (Structure)
+        filenames (list(str) or str): the filenames, or a pattern formatted by the
+            index of the displaced structure, default to 'disp-{:04d}/POSCAR'
+        delta, atoms, plusminus, symmetry, symprec: see displacements()
+        precision, nthreads: see write_poscars()
+    Returns:
+        list of (filename (str), atom index (int), displacement (3 np.array))
+    """
+    records = []
+    def generate():
+        for displaced in displacements(struct, delta, atoms, plusminus, symmetry, symprec):
+            records.append((displaced.index, displaced.displacement))
+            yield displaced
+    written = write_poscars(generate(), filenames, precision, nthreads)
+    return [(filename, index, displacement) for filename, (index, displacement) in zip(written, records)]
@@ -1,8 +1,8 @@
 import os
 import numpy as np
 from vasplib.output.vaspxml import VaspXml
-from vasplib.plot.plot_dos import plot_electronic_dos
-from vasplib.plot.plot_band import plot_electronic_band_structure
+
+# The plotting functions (matplotlib) are imported only when a plot is requested.
 
 def analyze_electronic_property(args: dict):
     """
@@ -52,6 +52,7 @@ def analyze_electronic_dos(args):
         np.savetxt(args['out'], dos) # Write the dos to a txt file
 
     if args.get('plot', False):
+        from vasplib.plot.plot_dos import plot_electronic_dos
         plot_electronic_dos(dos, args) # Plot the dos figure
 
 def _get_partial_electronic_dos(args):
@@ -109,6 +110,7 @@ def analyze_electronic_band_structure(args):
     special_k = xml.get_high_symmetry_kpoints()
 
     if args.get('plot', False):
+        from vasplib.plot.plot_band import plot_electronic_band_structure
         plot_electronic_band_structure(band_total, band_partial, special_k, args) # Plot the band structure figure
 
 def _get_partial_band(args):
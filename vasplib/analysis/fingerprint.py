@@ -0,0 +1,249 @@
+# coding: utf-8
+import itertools
+import collections
+import numpy as np
+from math import gcd
+from functools import reduce
+from concurrent.futures import ProcessPoolExecutor
+from vasplib.analysis.rdf import pair_distances
+
+"""
+Functions and class for the permutation-invariant fingerprints of structures, and
+a hash index deduplicating large sets of structures, e.g., the candidates of a
+high-throughput screening.
+"""
+
+def composition(symbols):
+    """
+    Reduced composition of a list of element symbols, independent of the order of
+    the atoms and of the size of the supercell.
+    Args:
+        symbols (list(str) or np.array): the element symbol of every atom
+    Returns:
+        tuple: ((element (str), count (int)), ...) sorted by element
+    """
+    names, counts = np.unique(symbols, return_counts = True)
+    divisor = reduce(gcd, counts.tolist())
+    return tuple((str(name), int(count) // divisor) for name, count in zip(names, counts))
+
+def _fingerprint(frac, lattice, symbols, rmax, nbins):
+    """
+    Fingerprint of the direct coordinates of a structure, see fingerprint().
+    """
+    names, species_idx = np.unique(symbols, return_inverse = True)
+    species_idx = species_idx.reshape(-1)
+    nspecies = len(names)
+    i, j, dist = pair_distances(frac, lattice, rmax)
+    # a distance of rmax has no weight, and would fall out of the grid
+    inside = dist < rmax
+    i, j, dist = i[inside], j[inside], dist[inside]
+    # linear interpolation between the grid points k * rmax / nbins, continuous
+    # in the distances and vanishing at rmax
+    x = dist / rmax * nbins
+    lower = np.floor(x).astype(int)
+    upper_weight = x - lower
+    pair = species_idx[i] * nspecies + species_idx[j]
+    size = nspecies * nspecies * (nbins + 1)
+    hist = np.bincount(pair * (nbins + 1) + lower, 1 - upper_weight, minlength = size)
+    hist += np.bincount(pair * (nbins + 1) + lower + 1, upper_weight, minlength = size)
+    hist = hist.reshape(nspecies, nspecies, nbins + 1)[:, :, :nbins]
+    upper = np.triu_indices(nspecies)
+    # hist[a, b] == hist[b, a], keep a <= b, per atom of the structure
+    return (hist[upper] / float(len(symbols))).astype(np.float32).reshape(-1)
+
+def fingerprint(struct, rmax = 6.0, nbins = 30):
+    """
+    Permutation-invariant fingerprint of a structure: the species-resolved
+    histograms of the interatomic distances within rmax, i.e., the number of
+    neighbors of species b per atom around each distance, for every species pair
+    a <= b in the alphabetical order. Each distance is shared linearly between the
+    two nearest points of the grid k * rmax / nbins, so the fingerprint varies
+    continuously with the positions. It is independent of the order of the atoms
+    and of the species blocks, of the choice of the cell, and of rotations and
+    translations.
+    Args:
+        struct (Structure)
+        rmax (float): the largest distance (Ang), default to 6.0
+        nbins (int): number of grid points in [0, rmax), default to 30
+    Returns:
+        np.array (float32): npairs * nbins values
+    """
+    return _fingerprint(struct.direct_coords(), struct.lattice, struct.symbols, rmax, nbins)
+
+def _chunk_fingerprints(items, rmax, nbins):
+    """
+    Fingerprint a chunk of structures, executed by the worker processes.
+    Args:
+        items (list of (frac, lattice, symbols))
+    """
+    return [(composition(symbols), _fingerprint(frac, lattice, symbols, rmax, nbins))
+            for frac, lattice, symbols in items]
+
+def iter_fingerprints(structures, rmax = 6.0, nbins = 30, nprocs = 1, chunk = 1000):
+    """
+    Fingerprint a stream of structures, in order. With nprocs > 1, chunks of
+    structures are sent to a pool of processes, at most 2 * nprocs chunks being
+    pending at a time, so structures may be a generator of any length.
+    Args:
+        structures (iterable of Structure)
+        rmax, nbins: see fingerprint()
+        nprocs (int): number of processes, default to 1
+        chunk (int): number of structures per task, default to 1000
+    Yields:
+        (composition, fingerprint): see composition() and fingerprint()
+    """
+    structures = iter(structures)
+    def tasks():
+        while True:
+            batch = [(s.direct_coords(), s.lattice, s.symbols)
+                     for s in itertools.islice(structures, chunk)]
+            if not batch:
+                return
+            yield batch
+
+    if nprocs > 1:
+        with ProcessPoolExecutor(nprocs) as pool:
+            pending = collections.deque()
+            for batch in tasks():
+                pending.append(pool.submit(_chunk_fingerprints, batch, rmax, nbins))
+                if len(pending) >= 2 * nprocs:
+                    for result in pending.popleft().result():
+                        yield result
+            while pending:
+                for result in pending.popleft().result():
+                    yield result
+    else:
+        for batch in tasks():
+            for result in _chunk_fingerprints(batch, rmax, nbins):
+                yield result
+
+class FingerprintIndex(object):
+    """
+    Hash index of structures for deduplication. The structures are bucketed by
+    their reduced composition and their coarse-grained fingerprint, i.e., the
+    numbers of neighbors per atom in a few distance shells, and a new structure
+    is compared only with the unique structures of its bucket: first by the
+    relative L1 distance of the fingerprints, then by the compare function if given.
+    >>> index = FingerprintIndex()
+    >>> uid, new = index.add(struct)
+    """
+    def __init__(self, rmax = 6.0, nbins = 30, shells = 5, decimals = 2, tol = 1e-3,
+            compare = None):
+        """
+        Create a FingerprintIndex object.
+        Args:
+            rmax, nbins: see fingerprint()
+            shells (int): number of distance shells of the hash key, nbins must be
+                a multiple of shells, default to 5
+            decimals (int): decimals of the neighbor numbers in the hash key, default to 2
+            tol (float): largest relative L1 distance of the fingerprints of two
+                equivalent structures, default to 1e-3
+            compare (function): compare(struct1, struct2) -> bool, the exact
+                comparison run on the structures matching by fingerprint, default to None
+        """
+        if nbins % shells:
+            raise ValueError("nbins {} is not a multiple of shells {}.".format(nbins, shells))
+        self.rmax = rmax
+        self.nbins = nbins
+        self.shells = shells
+        self.decimals = decimals
+        self.tol = tol
+        self.compare = compare
+        self.buckets = {} # hash key: list of unique ids
+        self.fingerprints = [] # fingerprint of each unique structure
+        self.structures = [] # each unique structure, kept if compare is given
+
+    def __len__(self):
+        """
+        Return the number of unique structures.
+        """
+        return len(self.fingerprints)
+
+    def key(self, comp, fp):
+        """
+        Hash key of a fingerprint.
+        Args:
+            comp (tuple): see composition()
+            fp (np.array): see fingerprint()
+        Returns:
+            tuple
+        """
+        coarse = np.sum(fp.reshape(-1, self.shells, self.nbins // self.shells), axis = 2)
+        return comp, np.round(coarse, self.decimals).tobytes()
+
+    def find(self, comp, fp, struct = None):
+        """
+        Find a unique structure equivalent to a fingerprint.
+        Args:
+            comp, fp: see key()
+            struct (Structure): required by the compare function
+        Returns:
+            int: the id of the unique structure, or None
+        """
+        ids = self.buckets.get(self.key(comp, fp), [])
+        if not ids:
+            return None
+        others = np.array([self.fingerprints[uid] for uid in ids], dtype = float)
+        norm = np.maximum(np.sum(others + fp, axis = 1), 1e-12)
+        distances = np.sum(np.abs(others - fp), axis = 1) / norm
+        for k in np.argsort(distances):
+            if distances[k] > self.tol:
+                break
+            if self.compare is None or self.compare(self.structures[ids[k]], struct):
+                return ids[k]
+        return None
+
+    def add_fingerprint(self, comp, fp, struct = None):
+        """
+        Add a structure by its fingerprint, unless an equivalent one is indexed.
+        Args:
+            comp, fp, struct: see find()
+        Returns:
+            (uid, new): the id of the unique structure, and whether it was added
+        """
+        uid = self.find(comp, fp, struct)
+        if uid is not None:
+            return uid, False
+        uid = len(self.fingerprints)
+        self.buckets.setdefault(self.key(comp, fp), []).append(uid)
+        self.fingerprints.append(fp)
+        self.structures.append(struct if self.compare is not None else None)
+        return uid, True
+
+    def add(self, struct):
+        """
+        Add a structure, unless an equivalent one is indexed.
+        Args:
+            struct (Structure)
+        Returns:
+            (uid, new): see add_fingerprint()
+        """
+        fp = fingerprint(struct, self.rmax, self.nbins)
+        return self.add_fingerprint(composition(struct.symbols), fp, struct)
+
+def deduplicate(structures, rmax = 6.0, nbins = 30, tol = 1e-3, compare = None,
+        nprocs = 1, chunk = 1000):
+    """
+    Deduplicate a list of structures, the fingerprints being computed in parallel
+    and the structures bucketed by a FingerprintIndex.
+    Args:
+        structures (list(Structure))
+        rmax, nbins: see fingerprint()
+        tol, compare: see FingerprintIndex()
+        nprocs, chunk: see iter_fingerprints()
+    Returns:
+        (unique, labels):
+            unique (list(int)): the indices of the first structure of each class
+            labels (np.array, int): for each structure, the index of the first
+                equivalent structure
+    """
+    index = FingerprintIndex(rmax, nbins, tol = tol, compare = compare)
+    unique = []
+    labels = np.empty(len(structures), dtype = int)
+    fps = iter_fingerprints(structures, rmax, nbins, nprocs, chunk)
+    for i, (comp, fp) in enumerate(fps):
+        uid, new = index.add_fingerprint(comp, fp, structures[i] if compare is not None else None)
+        if new:
+            unique.append(i)
+        labels[i] = unique[uid]
+    return unique, labels
@@ -0,0 +1,110 @@
+# coding: utf-8
+import numpy as np
+from scipy.spatial import cKDTree
+
+"""
+Functions for partitioning the volumetric data of a Chgcar object among the atoms.
+"""
+
+def periodic_images(frac, lattice, pad):
+    """
+    Get the periodic images of the atoms lying within the unit cell extended by
+    pad (in fractional units) on each side.
+    Args:
+        frac (n * 3 np.array): direct coordinates of the atoms
+        lattice (3 * 3 np.array): lattice vectors
+        pad (3 np.array): the padding along a, b and c, in fractional units
+    Returns:
+        (cart, idx):
+            cart (m * 3 np.array): cartesian coordinates of the images
+            idx (m np.array, int): the atom index of each image
+    """
+    frac = np.asarray(frac) % 1.0
+    ranges = [np.arange(-int(np.ceil(p)), int(np.ceil(p)) + 1) for p in pad]
+    shifts = np.stack(np.meshgrid(*ranges, indexing = 'ij'), axis = -1).reshape(-1, 3)
+    images = frac[None, :, :] + shifts[:, None, :]
+    idx = np.broadcast_to(np.arange(len(frac)), images.shape[:2])
+    inside = np.all((images >= -pad) & (images <= 1 + pad), axis = 2)
+    return np.matmul(images[inside], lattice), idx[inside]
+
+def _grid_points(chgcar, iz, n):
+    """
+    Cartesian coordinates of the grid points in the planes iz, ..., iz + n - 1,
+    in the order of the volumetric data (x running fastest).
+    """
+    NX, NY, NZ = chgcar.NX, chgcar.NY, chgcar.NZ
+    a, b, c = chgcar.struct.lattice
+    x = np.arange(NX)/NX
+    y = np.arange(NY)/NY
+    z = np.arange(iz, iz + n)/NZ
+    points = (z[:, None, None, None] * c + y[None, :, None, None] * b
+              + x[None, None, :, None] * a)
+    return points.reshape(-1, 3)
+
+def partition_charge(chgcar, method = 'voronoi', radius = None, nplanes = 8, workers = -1):
+    """
+    Integrate the charge density of each atom over the full 3D grid.
+    The data is streamed from the file nplanes xy planes at a time, and each chunk
+    of grid points is assigned to the atoms at once.
+    Args:
+        chgcar (Chgcar): the charge density
+        method (str): 'voronoi' or 'sphere'
+            'voronoi': every grid point belongs to its nearest atom under the
+                minimum image convention (periodic Voronoi cells)
+            'sphere': every atom collects the grid points within radius,
+                overlapping spheres count the same point for several atoms
+        radius (float or dict or list): radius of the spheres (Ang), required by
+            method = 'sphere'. A dict maps element symbols to radii, a list gives
+            one radius per atom.
+        nplanes (int): the number of xy planes per chunk, default to 8
+        workers (int): number of threads in the KD-tree queries, default to -1 (all)
+    Returns:
+        (charges, volumes):
+            charges (np.array): electrons assigned to each atom
+            volumes (np.array): volume (Ang^3) assigned to each atom
+    """
+    struct = chgcar.struct
+    lattice = struct.lattice
+    frac = struct.direct_coords()
+    natoms = len(frac)
+    ngrid = chgcar.NX * chgcar.NY * chgcar.NZ
+    volume_grid = abs(np.linalg.det(lattice)) / ngrid
+    # 1/height of the lattice planes, |b_i| without the 2*pi factor
+    inv_heights = np.linalg.norm(np.linalg.inv(lattice), axis = 0)
+
+    if method == 'voronoi':
+        # Any point of the cell is closer than cutoff to an image of every atom
+        cutoff = 0.5 * np.sum(np.linalg.norm(lattice, axis = 1))
+    elif method == 'sphere':
+        if radius is None:
+            raise ValueError("'radius' is required by method 'sphere'.")
+        if isinstance(radius, dict):
+            radii = np.concatenate([[radius[atom['element']]] * atom['num'] for atom in struct.atoms])
+        else:
+            radii = np.broadcast_to(np.asarray(radius, dtype = float), (natoms,))
+        cutoff = np.max(radii)
+    else:
+        raise ValueError("Not supported method: {}".format(method))
+
+    cart, idx = periodic_images(frac, lattice, cutoff * inv_heights)
+    tree = cKDTree(cart)
+
+    charges = np.zeros(natoms)
+    counts = np.zeros(natoms)
+    for iz, block in chgcar.iter_planes(nplanes):
+        points = _grid_points(chgcar, iz, block.shape[0])
+        values = block.ravel() / ngrid
+        if method == 'voronoi':
+            _, nearest = tree.query(points, workers = workers)
+            owner = idx[nearest]
+            charges += np.bincount(owner, weights = values, minlength = natoms)
+            counts += np.bincount(owner, minlength = natoms)
+        else:
+            pairs = tree.sparse_distance_matrix(cKDTree(points), cutoff, output_type = 'ndarray')
+            owner = idx[pairs['i']]
+            inside = pairs['v'] <= radii[owner]
+            owner = owner[inside]
+            charges += np.bincount(owner, weights = values[pairs['j'][inside]], minlength = natoms)
+            counts += np.bincount(owner, minlength = natoms)
+
+    return charges, counts * volume_grid
@@ -0,0 +1,217 @@
+# coding: utf-8
+import copy
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial import cKDTree
+from vasplib.analysis.partition import periodic_images
+
+"""
+Functions for the partial radial distribution functions g(r) of trajectories.
+"""
+
+def pair_vectors(frac, lattice, rmax):
+    """
+    Find all the pairs of atoms within rmax in one frame, over the periodic images,
+    with the vectors from the first atom to the image of the second one. The
+    periodic images within rmax of the cell are found from the lattice plane
+    spacings, so triclinic cells are handled, and the neighbors are searched with
+    a KD-tree.
+    Args:
+        frac (natoms * 3 np.array): direct coordinates
+        lattice (3 * 3 np.array): lattice vectors
+        rmax (float): the largest distance (Ang)
+    Returns:
+        (i, j, vectors): the atom indices (np.array, int) and the cartesian
+            vectors (npairs * 3 np.array) of the ordered pairs, an atom paired with
+            its own images included
+    """
+    frac = np.asarray(frac, dtype = float) % 1.0
+    inv_heights = np.linalg.norm(np.linalg.inv(lattice), axis = 0)
+    cart, idx = periodic_images(frac, lattice, rmax * inv_heights)
+    origins = np.matmul(frac, lattice)
+    pairs = cKDTree(origins).sparse_distance_matrix(cKDTree(cart), rmax, output_type = 'ndarray')
+    keep = pairs['v'] > 1e-8 # the atom itself
+    i, images = pairs['i'][keep], pairs['j'][keep]
+    return i, idx[images], cart[images] - origins[i]
+
+def pair_distances(frac, lattice, rmax):
+    """
+    Find all the pairs of atoms within rmax in one frame, over the periodic
+    images, see pair_vectors().
+    Args:
+        frac (natoms * 3 np.array): direct coordinates
+        lattice (3 * 3 np.array): lattice vectors
+        rmax (float): the largest distance (Ang)
+    Returns:
+        (i, j, dist): the atom indices (np.array, int) and the distances (np.array)
+            of the ordered pairs, an atom paired with its own images included
+    """
+    i, j, vectors = pair_vectors(frac, lattice, rmax)
+    return i, j, np.linalg.norm(vectors, axis = 1)
+
+def pair_counts(frac, lattice, species_idx, nspecies, rmax, nbins):
+    """
+    Count the distances of all the species pairs within rmax in one frame, see
+    pair_distances().
+    Args:
+        frac (natoms * 3 np.array): direct coordinates
+        lattice (3 * 3 np.array): lattice vectors
+        species_idx (natoms np.array, int): species index of each atom
+        nspecies (int): number of species
+        rmax (float): the largest distance (Ang)
+        nbins (int): number of bins in [0, rmax)
+    Returns:
+        counts (nspecies * nspecies * nbins np.array, int): counts[a, b, k] is the
+            number of ordered pairs (i of species a, j of species b) in the bin k
+    """
+    i, j, dist = pair_distances(frac, lattice, rmax)
+    bins = np.minimum((dist / rmax * nbins).astype(int), nbins - 1)
+    key = (species_idx[i] * nspecies + species_idx[j]) * nbins + bins
+    counts = np.bincount(key, minlength = nspecies * nspecies * nbins)
+    return counts.reshape(nspecies, nspecies, nbins)
+
+def frame_histogram(frac, lattice, species_idx, nspecies, rmax, nbins):
+    """
+    Histogram the distances of all the species pairs within rmax in one frame,
+    see pair_counts().
+    Args:
+        frac, lattice, species_idx, nspecies, rmax, nbins: see pair_counts()
+    Returns:
+        hist (nspecies * nspecies * nbins np.array): pair counts normalized by
+            N_a * N_b / V, so frames of different volumes can be averaged
+    """
+    hist = pair_counts(frac, lattice, species_idx, nspecies, rmax, nbins).astype(float)
+    counts = np.bincount(species_idx, minlength = nspecies)
+    volume = abs(np.linalg.det(lattice))
+    return hist / (np.outer(counts, counts)[:, :, None] / volume)
+
+def _chunk_histogram(coords, lattices, species_idx, nspecies, rmax, nbins):
+    """
+    Sum the histograms of a chunk of frames, executed by the worker processes.
+    """
+    hist = np.zeros((nspecies, nspecies, nbins))
+    for frac, lattice in zip(coords, lattices):
+        hist += frame_histogram(frac, lattice, species_idx, nspecies, rmax, nbins)
+    return hist
+
+def _xdatcar_histogram(reader, starts, ends, species_idx, nspecies, rmax, nbins):
+    """
+    Parse frames of an XDATCAR file at the byte positions starts and ends, see
+    Xdatcar._parse_frames(), and sum their histograms, executed by the worker
+    processes. Cartesian frames are converted to direct coordinates with the
+    lattice of each frame.
+    """
+    coords, lattices, direct = reader._parse_frames(starts, ends)
+    if not direct:
+        coords = np.matmul(coords, np.linalg.inv(lattices))
+    return _chunk_histogram(coords, lattices, species_idx, nspecies, rmax, nbins)
+
+def _normalize(hist, nframes, rmax, nbins):
+    """
+    Turn the summed histograms into g(r).
+    """
+    edges = np.linspace(0, rmax, nbins + 1)
+    shell = 4/3 * np.pi * (edges[1:]**3 - edges[:-1]**3)
+    r = (edges[1:] + edges[:-1]) / 2
+    return r, hist / nframes / shell
+
+def _species(atoms):
+    """
+    Species names and the species index of each atom, from a list of
+    {'element': (str), 'num': (int)} dicts, merging repeated elements.
+    """
+    names = []
+    for atom in atoms:
+        if atom['element'] not in names:
+            names.append(atom['element'])
+    species_idx = np.concatenate([[names.index(atom['element'])] * atom['num'] for atom in atoms])
+    return names, species_idx.astype(int)
+
+def _to_dict(names, g):
+    """
+    {'A-B': g_AB(r)} for every pair of species, A before B.
+    """
+    result = {}
+    for a in range(len(names)):
+        for b in range(a, len(names)):
+            result['{}-{}'.format(names[a], names[b])] = g[a, b]
+    return result
+
+def rdf(coords, lattices, atoms, rmax = 8.0, nbins = 200, nprocs = 1, chunk = 100):
+    """
+    Partial radial distribution functions averaged over the frames.
+    Args:
+        coords (nframes * natoms * 3 np.array): direct coordinates
+        lattices (nframes * 3 * 3 np.array or 3 * 3 np.array): lattice vectors of
+            each frame, or the fixed lattice
+        atoms (list of dict): {'element': (str), 'num': (int)} in the order of the atoms
+        rmax (float): the largest distance (Ang), default to 8.0
+        nbins (int): number of bins, default to 200
+        nprocs (int): number of processes, the frames are distributed in chunks
+        chunk (int): number of frames per task, default to 100
+    Returns:
+        (r, g):
+            r (nbins np.array): centers of the bins (Ang)
+            g (dict): {'A-B': nbins np.array} for every pair of species
+    """
+    names, species_idx = _species(atoms)
+    nspecies = len(names)
+    if np.ndim(lattices) == 2:
+        lattices = np.broadcast_to(lattices, (len(coords), 3, 3))
+    tasks = [(coords[i : i + chunk], lattices[i : i + chunk], species_idx, nspecies, rmax, nbins)
+             for i in range(0, len(coords), chunk)]
+
+    if nprocs > 1:
+        with ProcessPoolExecutor(nprocs) as pool:
+            hist = sum(pool.map(_chunk_histogram, *zip(*tasks)))
+    else:
+        hist = sum(_chunk_histogram(*task) for task in tasks)
+
+    r, g = _normalize(hist, len(coords), rmax, nbins)
+    return r, _to_dict(names, g)
+
+def xdatcar_rdf(xdatcar, start = 0, stop = None, step = 1, rmax = 8.0, nbins = 200,
+        nprocs = 1, chunk = 100):
+    """
+    Partial radial distribution functions of an Xdatcar trajectory. The frame
+    index is built once, and every worker process is given the header of the file
+    and the byte positions of its chunk of frames, which it reads directly.
+    Args:
+        xdatcar (Xdatcar): the trajectory
+        start, stop, step (int): frames analyzed, as range(start, stop, step)
+        rmax, nbins, nprocs, chunk: see rdf()
+    Returns:
+        (r, g): see rdf()
+    """
+    names, species_idx = _species(xdatcar._atoms)
+    frames = range(*slice(start, stop, step).indices(len(xdatcar)))
+    # the frame index stays in this process, the tasks only carry their positions
+    reader = copy.copy(xdatcar)
+    reader._offsets = None
+    tasks = []
+    for i in range(0, len(frames), chunk):
+        starts, ends = xdatcar._frame_bounds(frames[i : i + chunk])
+        tasks.append((reader, starts, ends, species_idx, len(names), rmax, nbins))
+
+    if nprocs > 1:
+        with ProcessPoolExecutor(nprocs) as pool:
+            hist = sum(pool.map(_xdatcar_histogram, *zip(*tasks)))
+    else:
+        hist = sum(_xdatcar_histogram(*task) for task in tasks)
+
+    r, g = _normalize(hist, len(frames), rmax, nbins)
+    return r, _to_dict(names, g)
+
+def structures_rdf(structures, rmax = 8.0, nbins = 200, nprocs = 1, chunk = 100):
+    """
+    Partial radial distribution functions of a list of structures with the same
+    atoms, e.g., the ionic steps read by Outcar.struct_ionic_step().
+    Args:
+        structures (list(Structure))
+        rmax, nbins, nprocs, chunk: see rdf()
+    Returns:
+        (r, g): see rdf()
+    """
+    coords = np.array([s.direct_coords() for s in structures])
+    lattices = np.array([s.lattice for s in structures])
+    return rdf(coords, lattices, structures[0].atoms, rmax, nbins, nprocs, chunk)
@@ -0,0 +1,229 @@
+# coding: utf-8
+import itertools
+import numpy as np
+from scipy import ndimage
+
+"""
+Class for sampling volumetric data on arbitrary planes and lines.
+"""
+
+class GridSampler(object):
+    """
+    Interpolate periodic volumetric data, e.g., Chgcar.getChargeDensity(), at
+    arbitrary points, planes and lines.
+    >>> chg = Chgcar('CHGCAR')
+    >>> sampler = GridSampler(chg.getChargeDensity(), chg.struct.lattice)
+    >>> values, xy = sampler.miller_planes([1, 1, 0], [0.0, 0.5], shape = (60, 40))
+    """
+    def __init__(self, density, lattice, order = 1, positions = None):
+        """
+        Create a GridSampler object.
+        Args:
+            density (NZ * NY * NX np.array): the data on the grid, x running fastest
+            lattice (3 * 3 np.array): lattice vectors of the cell
+            order (int): order of the interpolation, 1 for trilinear and 3 for
+                cubic spline, default to 1
+            positions (list of 3 np.array): direct coordinates of the grid points
+                along x, y and z, increasing, for grids of uneven spacing, e.g.,
+                Chgcar.level_grid() for the preview pyramid, default to None, i.e.,
+                the point i at i/N
+        """
+        self.lattice = np.asarray(lattice, dtype = float)
+        self.order = order
+        self.positions = positions
+        self.shape = np.shape(density)
+        if order > 1:
+            # the spline coefficients are computed once and reused by every call
+            self._coeffs = ndimage.spline_filter(density, order = order, mode = 'grid-wrap')
+        else:
+            self._coeffs = np.asarray(density, dtype = float)
+
+    def sample(self, frac):
+        """
+        Interpolate the data at the fractional coordinates frac, wrapped into the cell.
+        Args:
+            frac (... * 3 np.array): direct coordinates of the points
+        Returns:
+            values (... np.array)
+        """
+        frac = np.asarray(frac, dtype = float)
+        NZ, NY, NX = self.shape
+        if self.positions is None:
+            indices = np.stack((frac[..., 2] * NZ, frac[..., 1] * NY, frac[..., 0] * NX))
+        else:
+            # piecewise-linear map of the coordinates to the indices, periodic:
+            # the point after the last one is the first point of the next cell
+            indices = []
+            for axis in (2, 1, 0):
+                points = np.asarray(self.positions[axis], dtype = float)
+                x = frac[..., axis] - points[0]
+                x = x - np.floor(x)
+                indices.append(np.interp(x, np.append(points - points[0], 1.0), np.arange(len(points) + 1)))
+            indices = np.stack(indices)
+        values = ndimage.map_coordinates(self._coeffs, indices.reshape(3, -1),
+                order = self.order, mode = 'grid-wrap', prefilter = False)
+        return values.reshape(frac.shape[:-1])
+
+    def sample_cart(self, cart):
+        """
+        Interpolate the data at the cartesian coordinates cart.
+        Args:
+            cart (... * 3 np.array): cartesian coordinates of the points (Ang)
+        Returns:
+            values (... np.array)
+        """
+        return self.sample(np.matmul(cart, np.linalg.inv(self.lattice)))
+
+    def plane(self, origin, u, v, shape = (50, 50)):
+        """
+        Sample the parallelogram origin + s * u + t * v, 0 <= s, t < 1.
+        origin may hold several origins to sample a batch of parallel slices.
+        Args:
+            origin (3 np.array or m * 3 np.array): cartesian origin(s) of the slice
+            u, v (3 np.array): cartesian edge vectors of the slice
+            shape (tuple(int)): (nu, nv), the number of points along u and v
+        Returns:
+            (values, xy):
+                values (nu * nv np.array, or m * nu * nv for a batch)
+                xy (nu * nv * 2 np.array): in-plane cartesian coordinates (Ang) of
+                    the points, x along u, for plotting without distortion
+        """
+        u, v = np.asarray(u, dtype = float), np.asarray(v, dtype = float)
+        s = np.arange(shape[0])/shape[0]
+        t = np.arange(shape[1])/shape[1]
+        points = s[:, None, None] * u + t[None, :, None] * v
+        origin = np.asarray(origin, dtype = float)
+        values = self.sample_cart(origin[..., None, None, :] + points)
+
+        e1 = u / np.linalg.norm(u)
+        e2 = v - np.dot(v, e1) * e1
+        e2 = e2 / np.linalg.norm(e2)
+        xy = np.stack((np.matmul(points, e1), np.matmul(points, e2)), axis = -1)
+        return values, xy
+
+    def plane_basis(self, hkl):
+        """
+        Get two short lattice vectors spanning the lattice plane (hkl), defining
+        the periodic in-plane cell of the slices. An integer basis of the lattice
+        vectors n with n . hkl = 0 is found exactly, see _plane_lattice(), and
+        Gauss-reduced, so the two shortest independent vectors of the plane are
+        among its vectors a, b, a + b and a - b.
+        Args:
+            hkl (list(int)): Miller indices
+        Returns:
+            (u, v, normal, spacing):
+                u, v (3 np.array): cartesian in-plane lattice vectors
+                normal (3 np.array): unit normal of the plane
+                spacing (float): interplanar distance d_hkl (Ang)
+        """
+        hkl = np.asarray(hkl)
+        if not np.any(hkl):
+            raise ValueError("Miller indices {} are all zero.".format(hkl.tolist()))
+        normal = np.matmul(hkl, np.linalg.inv(self.lattice).T)
+        spacing = 1/np.linalg.norm(normal)
+        normal = normal * spacing
+
+        a, b = _plane_lattice(hkl)
+        metric = np.matmul(self.lattice, self.lattice.T)
+        norm2 = lambda n: np.dot(np.matmul(n, metric), n)
+        while True:
+            if norm2(b) < norm2(a):
+                a, b = b, a
+            mu = int(np.round(np.dot(np.matmul(a, metric), b) / norm2(a)))
+            if mu == 0:
+                break
+            b = b - mu * a
+        grid = np.array([i * a + j * b for i, j in itertools.product((1, 0, -1), repeat = 2) if i or j])
+        vectors = np.matmul(grid, self.lattice)
+        lengths = np.linalg.norm(vectors, axis = 1)
+        # shortest first, then prefer positive components, then a before b before c
+        order = np.lexsort((-grid[:, 2], -grid[:, 1], -grid[:, 0], -np.sum(grid, axis = 1), np.round(lengths, 8)))
+        u = vectors[order[0]]
+        for i in order[1:]:
+            if np.linalg.norm(np.cross(u, vectors[i])) > 1e-6 * lengths[i] * lengths[order[0]]:
+                v = vectors[i]
+                break
+        # right-handed with respect to the normal
+        if np.dot(np.cross(u, v), normal) < 0:
+            v = -v
+        return u, v, normal, spacing
+
+    def miller_planes(self, hkl, offsets, shape = (50, 50)):
+        """
+        Sample a batch of slices on the lattice planes (hkl).
+        Args:
+            hkl (list(int)): Miller indices
+            offsets (float or list(float)): positions of the slices along the normal,
+                in units of the interplanar distance d_hkl, e.g., for (001) the
+                offset is the fractional coordinate along c
+            shape (tuple(int)): (nu, nv), the number of points along u and v
+        Returns:
+            (values, xy): see GridSampler.plane(), values has one slice per offset
+                if offsets is a list
+        """
+        u, v, normal, spacing = self.plane_basis(hkl)
+        origin = np.multiply.outer(np.asarray(offsets, dtype = float) * spacing, normal)
+        return self.plane(origin, u, v, shape)
+
+    def atoms_plane(self, struct, idx, shape = (50, 50), extent = (0, 1, 0, 1)):
+        """
+        Sample the slice through three atoms.
+        Args:
+            struct (Structure): the structure holding the atoms
+            idx (list(int)): indices of the three atoms i, j and k
+            shape (tuple(int)): (nu, nv), the number of points along u and v
+            extent (tuple(float)): (smin, smax, tmin, tmax), the sampled region is
+                r_i + s * (r_j - r_i) + t * (r_k - r_i), default to (0, 1, 0, 1)
+        Returns:
+            (values, xy): see GridSampler.plane()
+        """
+        coords = struct.cartesian_coords()[list(idx)]
+        smin, smax, tmin, tmax = extent
+        u = coords[1] - coords[0]
+        v = coords[2] - coords[0]
+        origin = coords[0] + smin * u + tmin * v
+        return self.plane(origin, (smax - smin) * u, (tmax - tmin) * v, shape)
+
+    def line(self, start, end, npoints = 100):
+        """
+        Sample the profile along the segment from start to end, wrapped through the
+        periodic cell. start and end may hold several segments to sample at once.
+        Args:
+            start, end (3 np.array or m * 3 np.array): direct coordinates of the ends,
+                they may lie outside the unit cell
+            npoints (int): number of points, including both ends, default to 100
+        Returns:
+            (distance, values):
+                distance (npoints np.array, or m * npoints): distance from start (Ang)
+                values (npoints np.array, or m * npoints)
+        """
+        start = np.asarray(start, dtype = float)
+        end = np.asarray(end, dtype = float)
+        s = np.linspace(0, 1, npoints)
+        frac = start[..., None, :] + s[:, None] * (end - start)[..., None, :]
+        length = np.linalg.norm(np.matmul(end - start, self.lattice), axis = -1)
+        distance = np.multiply.outer(length, s)
+        return distance, self.sample(frac)
+
+def _plane_lattice(hkl):
+    """
+    Find an integer basis of the lattice vectors n in the plane (hkl), n . hkl = 0,
+    by the unimodular column operations of the Euclidean algorithm reducing hkl
+    to (0, .., g, .., 0): the two other columns are the basis.
+    Args:
+        hkl (list(int)): Miller indices, not all zero
+    Returns:
+        (a, b): 3 np.array (int)
+    """
+    h = np.array(hkl, dtype = int)
+    U = np.eye(3, dtype = int)
+    while np.count_nonzero(h) > 1:
+        nonzero = np.flatnonzero(h)
+        p = nonzero[np.argmin(np.abs(h[nonzero]))]
+        for j in nonzero:
+            if j != p:
+                q = h[j] // h[p]
+                h[j] -= q * h[p]
+                U[:, j] -= q * U[:, p]
+    a, b = [U[:, j] for j in range(3) if h[j] == 0]
+    return a, b
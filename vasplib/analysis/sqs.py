@@ -0,0 +1,294 @@
+# coding: utf-8
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from vasplib.analysis.build import Build
+from vasplib.analysis.rdf import pair_vectors
+
+"""
+Class and functions for the special quasirandom structures (SQS) of alloys: the
+Monte Carlo search of the occupations of a sublattice of a supercell whose pair
+and triplet statistics match the random alloy, with the statistics updated
+incrementally after each swap of two atoms.
+"""
+
+def _outer(x, n):
+    """
+    Return the outer product of n copies of the vector x.
+    """
+    product = x
+    for k in range(n - 1):
+        product = np.multiply.outer(product, x)
+    return product
+
+def _involved(entries, nsites):
+    """
+    Index the clusters by their sites, as CSR arrays: the clusters involving the
+    site i are indices[indptr[i] : indptr[i + 1]], each once.
+    Args:
+        entries (M * n np.array, int): the sites of each cluster
+        nsites (int): number of sites
+    Returns:
+        (indptr, indices)
+    """
+    rows = np.repeat(np.arange(len(entries)), entries.shape[1])
+    pairs = np.unique(np.stack((entries.ravel(), rows), axis = 1), axis = 0)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(pairs[:, 0], minlength = nsites))))
+    return indptr, pairs[:, 1]
+
+class _Chain(object):
+    """
+    Occupations of the sites and the cluster counts of one Monte Carlo chain,
+    see SQS.
+    """
+    def __init__(self, tables, occupation):
+        self.tables = tables
+        self.occupation = np.array(occupation, dtype = int)
+        self.counts = [self._count(k, None) for k in range(len(tables['entries']))]
+
+    def _count(self, k, idx):
+        """
+        Count the clusters of arity k (all of them if idx is None, else the
+        clusters idx) by type and species, as a flat array.
+        """
+        entries, types = self.tables['entries'][k], self.tables['types'][k]
+        if idx is not None:
+            entries, types = entries[idx], types[idx]
+        nspecies = self.tables['nspecies']
+        key = types
+        for column in entries.T:
+            key = key * nspecies + self.occupation[column]
+        return np.bincount(key, minlength = self.tables['sizes'][k])
+
+    def objective(self, counts = None):
+        """
+        Sum of the squared deviations of the cluster probabilities from the
+        random alloy.
+        """
+        counts = self.counts if counts is None else counts
+        return sum(float(np.sum((count / norm - target)**2)) for count, norm, target in
+                   zip(counts, self.tables['norms'], self.tables['targets']))
+
+    def swap(self, i, j):
+        """
+        Swap the occupations of the sites i and j, updating the counts of the
+        clusters involving them only, in new arrays.
+        """
+        changes = []
+        for k, (indptr, indices) in enumerate(self.tables['involved']):
+            idx = np.union1d(indices[indptr[i] : indptr[i + 1]], indices[indptr[j] : indptr[j + 1]])
+            changes.append((k, idx, self._count(k, idx)))
+        self.occupation[[i, j]] = self.occupation[[j, i]]
+        for k, idx, before in changes:
+            self.counts[k] = self.counts[k] + self._count(k, idx) - before
+
+def _run_chain(tables, occupation, steps, temperatures, seed):
+    """
+    Run one simulated-annealing chain of swaps, executed by the worker processes.
+    Returns:
+        (objective, occupation): the best occupation found
+    """
+    rng = np.random.default_rng(seed)
+    chain = _Chain(tables, rng.permutation(occupation))
+    current = chain.objective()
+    best, best_occupation = current, chain.occupation.copy()
+    schedule = np.geomspace(temperatures[0], temperatures[1], max(steps, 1))
+    for step in range(steps):
+        i, j = rng.integers(len(chain.occupation), size = 2)
+        if chain.occupation[i] == chain.occupation[j]:
+            continue
+        counts = list(chain.counts)
+        chain.swap(i, j)
+        new = chain.objective()
+        if new <= current or rng.random() < np.exp((current - new) / schedule[step]):
+            current = new
+            if current < best:
+                best, best_occupation = current, chain.occupation.copy()
+        else:
+            chain.occupation[[i, j]] = chain.occupation[[j, i]]
+            chain.counts = counts
+    return best, best_occupation
+
+class SQS(object):
+    """
+    Special quasirandom structure search on a sublattice of a supercell. The
+    neighbor shells of the sublattice and its triangles are found once, and the
+    pair and triplet clusters are indexed by their sites, so swapping two atoms
+    recounts only the O(coordination) clusters involving them. The objective is
+    the sum over the clusters of the squared deviations of the probabilities of
+    their species from the random alloy, e.g., x_a x_b for the pairs, which
+    matches all their correlation functions. Independent annealing chains run in
+    parallel processes.
+    >>> sqs = SQS(supercell, 'Ni', {'Ni': 16, 'Co': 16})
+    >>> struct, objective = sqs.search(steps = 20000, nchains = 8, nprocs = 4)
+    """
+    def __init__(self, struct, sites, composition, pair_shells = 3, triplet_shells = 1, tol = 1e-3):
+        """
+        Create a SQS object.
+        Args:
+            struct (Structure): the supercell
+            sites (str or list(int)): the sublattice, an element symbol or the atom indices
+            composition (dict): {element (str): number of atoms on the sublattice}
+            pair_shells (int): number of neighbor shells of the pairs, default to 3
+            triplet_shells (int): the triangles whose sides are in the first
+                triplet_shells shells, default to 1, 0 for no triplets
+            tol (float): tolerance of the shell distances (Ang): the distances
+                differing by less than tol are in the same shell, default to 1e-3
+        """
+        self.struct = struct
+        if isinstance(sites, str):
+            sites = np.flatnonzero(struct.symbols == sites)
+        self.sites = np.unique(np.asarray(sites, dtype = int))
+        self.elements = list(composition)
+        nums = np.array([composition[element] for element in self.elements], dtype = int)
+        if np.sum(nums) != len(self.sites):
+            raise ValueError("{} atoms given for {} sites.".format(np.sum(nums), len(self.sites)))
+        if triplet_shells > pair_shells:
+            raise ValueError("triplet_shells {} exceeds pair_shells {}.".format(triplet_shells, pair_shells))
+        self.occupation = np.repeat(np.arange(len(nums)), nums)
+        x = nums / float(len(self.sites))
+
+        # the neighbor shells of the sublattice, searched in growing spheres: the
+        # sorted distances split at the gaps larger than tol
+        frac = struct.direct_coords()[self.sites]
+        rmax = (struct.volume / len(self.sites))**(1/3.)
+        while True:
+            i, j, vectors = pair_vectors(frac, struct.lattice, rmax)
+            order = np.argsort(i, kind = 'stable')
+            i, j, vectors = i[order], j[order], vectors[order]
+            dist = np.linalg.norm(vectors, axis = 1)
+            sorted_dist = np.sort(dist)
+            groups = np.split(sorted_dist, np.flatnonzero(np.diff(sorted_dist) > tol) + 1)
+            if len(groups) > pair_shells:
+                break
+            rmax *= 1.5
+        groups = groups[:pair_shells]
+        self.shells = np.array([np.mean(group) for group in groups]) # the distances of the shells (Ang)
+        # the distances of a shell, within tol/2 of its extent, as the gaps exceed tol
+        bounds = np.array([[group[0] - tol/2, group[-1] + tol/2] for group in groups])
+
+        def classify(d):
+            # the shell of each distance, -1 if none
+            k = np.searchsorted(bounds[:, 0], d, side = 'right') - 1
+            return np.where((k >= 0) & (d <= bounds[np.maximum(k, 0), 1]), k, -1)
+
+        shell = classify(dist)
+        keep = shell >= 0
+        i, j, vectors, shell = i[keep], j[keep], vectors[keep], shell[keep]
+        entries, types = [np.stack((i, j), axis = 1)], [shell]
+
+        # the triangles: pairs of neighbors e1 != e2 of a center within the first
+        # triplet_shells shells, at a distance in these shells
+        self.triplets = [] # the shells of the sides of each triplet type
+        if triplet_shells > 0:
+            near = shell < triplet_shells
+            triangles, keys = [], []
+            ni, nj, nv, ns = i[near], j[near], vectors[near], shell[near]
+            starts = np.searchsorted(ni, np.arange(len(self.sites) + 1))
+            for c in range(len(self.sites)):
+                e = np.arange(starts[c], starts[c + 1])
+                side = np.linalg.norm(nv[e][None, :, :] - nv[e][:, None, :], axis = 2)
+                side_shell = classify(side)
+                ok = (side_shell >= 0) & (side_shell < triplet_shells)
+                e1, e2 = np.nonzero(ok)
+                triangles.append(np.stack((np.full(len(e1), c), nj[e[e1]], nj[e[e2]]), axis = 1))
+                keys.append(np.sort(np.stack((ns[e[e1]], ns[e[e2]], side_shell[e1, e2]), axis = 1), axis = 1))
+            triangles, keys = np.concatenate(triangles), np.concatenate(keys)
+            self.triplets, triplet_types = np.unique(keys, axis = 0, return_inverse = True)
+            entries.append(triangles)
+            types.append(triplet_types.reshape(-1))
+
+        nspecies = len(self.elements)
+        ntypes = [pair_shells, len(self.triplets)]
+        self._tables = {
+            'nspecies': nspecies,
+            'entries': entries,
+            'types': types,
+            'sizes': [ntypes[k] * nspecies**(k + 2) for k in range(len(entries))],
+            'norms': [np.repeat(np.bincount(types[k], minlength = ntypes[k]), nspecies**(k + 2))
+                      for k in range(len(entries))],
+            'targets': [np.tile(_outer(x, k + 2).ravel(), ntypes[k])
+                        for k in range(len(entries))],
+            'involved': [_involved(entries[k], len(self.sites)) for k in range(len(entries))],
+        }
+
+    def objective(self, occupation = None):
+        """
+        Compute the objective of an occupation from scratch.
+        Args:
+            occupation (np.array, int): the element index of each site, default
+                to SQS.occupation
+        Returns:
+            float
+        """
+        return _Chain(self._tables, self.occupation if occupation is None else occupation).objective()
+
+    def correlations(self, occupation = None):
+        """
+        The correlation functions of a binary alloy, spins +1 and -1 for the
+        first and the second element, and their values in the random alloy.
+        Args:
+            occupation (np.array, int): default to SQS.occupation
+        Returns:
+            (correlations, targets): lists of np.array, the pairs of each shell
+                and the triplets of each type of SQS.triplets
+        """
+        if len(self.elements) != 2:
+            raise ValueError("The correlation functions are defined for binary alloys only.")
+        chain = _Chain(self._tables, self.occupation if occupation is None else occupation)
+        spin = np.array([1.0, -1.0])
+        x = np.bincount(chain.occupation, minlength = 2) / float(len(chain.occupation))
+        correlations, targets = [], []
+        for k, (count, norm) in enumerate(zip(chain.counts, self._tables['norms'])):
+            probabilities = (count / norm).reshape((-1,) + (2,) * (k + 2))
+            spins = _outer(spin, k + 2)
+            correlations.append(np.sum(probabilities * spins, axis = tuple(range(1, k + 3))))
+            targets.append(np.full(len(probabilities), np.dot(x, spin)**(k + 2)))
+        return correlations, targets
+
+    def search(self, steps = 20000, nchains = 1, nprocs = 1, temperatures = (1e-3, 1e-6), seed = None):
+        """
+        Anneal independent chains of swaps from random occupations, in parallel
+        processes with nprocs > 1, and keep the best occupation found.
+        Args:
+            steps (int): number of swaps of each chain, default to 20000
+            nchains (int): number of chains, default to 1
+            nprocs (int): number of processes, default to 1
+            temperatures ((float, float)): initial and final temperatures, in the
+                units of the objective, decreased geometrically, default to (1e-3, 1e-6)
+            seed (int): seed of the random numbers, default to None
+        Returns:
+            (Build, float): the structure and its objective, also kept in
+                SQS.occupation
+        """
+        seeds = np.random.SeedSequence(seed).spawn(nchains)
+        args = [(self._tables, self.occupation, steps, temperatures, s) for s in seeds]
+        if nprocs > 1:
+            with ProcessPoolExecutor(nprocs) as pool:
+                results = list(pool.map(_run_chain, *zip(*args)))
+        else:
+            results = [_run_chain(*arg) for arg in args]
+        best, occupation = min(results, key = lambda result: result[0])
+        self.occupation = occupation
+        return self.structure(occupation), best
+
+    def structure(self, occupation = None):
+        """
+        Build the structure of an occupation: the sublattice atoms are moved to
+        blocks of their elements, after the other atoms of the supercell.
+        Args:
+            occupation (np.array, int): default to SQS.occupation
+        Returns:
+            Build
+        """
+        occupation = self.occupation if occupation is None else occupation
+        host = self.struct
+        rest = np.setdiff1d(np.arange(host.atom_nums), self.sites)
+        species = np.array(host.species)[rest]
+        order = np.concatenate((rest[np.argsort(species, kind = 'stable')],
+                                self.sites[np.argsort(occupation, kind = 'stable')]))
+        nums = np.concatenate((np.bincount(species, minlength = len(host.elements)),
+                               np.bincount(occupation, minlength = len(self.elements))))
+        elements = list(host.elements) + self.elements
+        blocks = [k for k in range(len(elements)) if nums[k] > 0]
+        return Build.from_arrays(host.lattice, host.coords[order], [elements[k] for k in blocks],
+                                 nums[blocks], host.coord_type, host.comment)
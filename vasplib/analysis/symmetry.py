@@ -0,0 +1,198 @@
+# coding: utf-8
+import numpy as np
+from scipy.spatial import cKDTree
+
+"""
+Functions for the space-group operations of structures, found directly from the
+lattice and the atoms (no external library), in the fractional convention of
+the row vectors: an operation maps x to x R + t.
+"""
+
+def lattice_rotations(lattice, symprec = 1e-3):
+    """
+    Find the integer matrices R mapping the lattice onto itself, L' = R L with the
+    metric tensor unchanged. The candidate rows of R are the lattice vectors of the
+    lengths of a, b and c, searched within the bounds given by the plane spacings,
+    so the cell doesn't need to be reduced.
+    Args:
+        lattice (3 * 3 np.array): lattice vectors
+        symprec (float): tolerance of the lengths (Ang), default to 1e-3
+    Returns:
+        n * 3 * 3 np.array (int): the rotations, the identity first
+    """
+    lattice = np.asarray(lattice, dtype = float)
+    metric = np.matmul(lattice, lattice.T)
+    lengths = np.sqrt(np.diag(metric))
+    spacings = 1/np.linalg.norm(np.linalg.inv(lattice), axis = 0)
+    candidates = []
+    for i in range(3):
+        # |n_j| = |v . b_j| <= |v| / d_j
+        nmax = np.floor((lengths[i] + symprec) / spacings).astype(int)
+        n = np.stack(np.meshgrid(*[np.arange(-m, m + 1) for m in nmax], indexing = 'ij'), axis = -1)
+        n = n.reshape(-1, 3)
+        norms = np.sqrt(np.einsum('ij,jk,ik->i', n, metric, n))
+        candidates.append(n[np.abs(norms - lengths[i]) < symprec])
+
+    def matching(ni, nj, i, j):
+        # pairs of candidates with the dot product a_i . a_j
+        dots = np.matmul(np.matmul(ni, metric), nj.T)
+        return np.abs(dots - metric[i, j]) < symprec * (lengths[i] + lengths[j])
+
+    rotations = []
+    pairs01 = np.argwhere(matching(candidates[0], candidates[1], 0, 1))
+    ok02 = matching(candidates[0], candidates[2], 0, 2)
+    ok12 = matching(candidates[1], candidates[2], 1, 2)
+    for k0, k1 in pairs01:
+        for k2 in np.flatnonzero(ok02[k0] & ok12[k1]):
+            R = np.array([candidates[0][k0], candidates[1][k1], candidates[2][k2]])
+            if abs(round(np.linalg.det(R))) == 1:
+                rotations.append(R)
+    rotations = np.array(rotations, dtype = int).reshape(-1, 3, 3)
+    identity = np.flatnonzero(np.all(rotations == np.eye(3, dtype = int), axis = (1, 2)))
+    order = np.concatenate((identity, np.setdiff1d(np.arange(len(rotations)), identity)))
+    return rotations[order]
+
+def _wrap(frac):
+    """
+    Wrap direct coordinates into [0, 1).
+    """
+    frac = frac - np.floor(frac)
+    frac[frac >= 1.0] = 0.0
+    return frac
+
+class _AtomFinder(object):
+    """
+    Periodic k-d tree of the direct coordinates of a structure, finding the atom
+    at given positions, and the candidate translations of the operations.
+    """
+    def __init__(self, struct, symprec):
+        self.frac = _wrap(np.array(struct.direct_coords(), dtype = float))
+        self.species = struct.species
+        natoms = len(self.frac)
+        # frac-space radius of a cartesian error of symprec
+        self.tol = symprec * np.linalg.norm(np.linalg.inv(struct.lattice), 2)
+        self.tree = cKDTree(self.frac, boxsize = 1.0)
+        counts = np.bincount(self.species)
+        self.anchors = np.flatnonzero(self.species == np.argmin(np.where(counts > 0, counts, natoms + 1)))
+        self.probe = np.unique(np.linspace(0, natoms - 1, min(natoms, 8)).astype(int))
+
+    def find(self, points):
+        """
+        Return the index of the atom at each point, -1 if none.
+        """
+        dist, idx = self.tree.query(_wrap(points), distance_upper_bound = self.tol)
+        return np.where(np.isfinite(dist), idx, -1)
+
+    def maps(self, perms):
+        """
+        Return True for the rows of atom indices mapping every atom onto an atom
+        of its species, once.
+        """
+        perms = np.atleast_2d(perms)
+        ok = np.all((perms >= 0) & (self.species[np.maximum(perms, 0)] == self.species), axis = 1)
+        return ok & np.all(np.diff(np.sort(perms, axis = 1), axis = 1) > 0, axis = 1)
+
+    def candidates(self, R):
+        """
+        Return the translations t mapping one atom of the smallest species onto
+        the atoms of the species, kept if x R + t maps the probe atoms.
+        """
+        rotated = np.matmul(self.frac, R)
+        shifts = _wrap(self.frac[self.anchors] - rotated[self.anchors[0]])
+        idx = self.find(rotated[self.probe][None, :, :] + shifts[:, None, :])
+        valid = np.all((idx >= 0) & (self.species[np.maximum(idx, 0)] == self.species[self.probe]), axis = 1)
+        return rotated, shifts[valid]
+
+    def clean(self, shifts):
+        shifts[(np.abs(shifts) < self.tol) | (np.abs(shifts - 1) < self.tol)] = 0.0
+        return shifts
+
+def translation_group(struct, symprec = 1e-3):
+    """
+    Find the pure translations mapping a structure onto itself, e.g., the
+    lattice vectors of the primitive cell in a supercell, the zero translation first.
+    Args:
+        struct (Structure)
+        symprec (float): tolerance of the positions (Ang), default to 1e-3
+    Returns:
+        (translations, permutations): see symmetry_operations()
+    """
+    finder = _AtomFinder(struct, symprec)
+    rotated, shifts = finder.candidates(np.eye(3, dtype = int))
+    perms = finder.find(rotated[None, :, :] + shifts[:, None, :])
+    ok = finder.maps(perms)
+    shifts, perms = finder.clean(shifts[ok]), perms[ok]
+    order = np.argsort(np.any(shifts != 0, axis = 1), kind = 'stable')
+    return shifts[order], perms[order]
+
+def symmetry_operations(struct, symprec = 1e-3, translations = True):
+    """
+    Find the space-group operations of a structure. For each lattice rotation R,
+    the translations mapping one atom of the smallest species onto the atoms of
+    the same species are the candidates; they are screened on a few atoms, then
+    checked on all the atoms with a periodic k-d tree of the direct coordinates.
+    The operations of a supercell are the products of one operation per rotation
+    and the pure translations, see translation_group(), and are generated from
+    them without searching; with translations False, only the first factor is
+    returned, which is much smaller for large supercells.
+    Args:
+        struct (Structure)
+        symprec (float): tolerance of the positions (Ang), default to 1e-3
+        translations (bool): all the operations, or one per rotation, default to True
+    Returns:
+        (rotations, translations, permutations):
+            rotations (n * 3 * 3 np.array, int): x -> x R + t on the direct coordinates
+            translations (n * 3 np.array): t, in [0, 1)
+            permutations (n * N np.array, int): the operation k maps the atom i
+                onto the atom permutations[k, i]
+    """
+    finder = _AtomFinder(struct, symprec)
+    rotations, shifts, permutations = [], [], []
+    for R in lattice_rotations(struct.lattice, symprec):
+        rotated, candidates = finder.candidates(R)
+        for t in candidates:
+            perm = finder.find(rotated + t)
+            if finder.maps(perm)[0]:
+                rotations.append(R)
+                shifts.append(finder.clean(t[None, :])[0])
+                permutations.append(perm)
+                break
+    rotations = np.array(rotations, dtype = int).reshape(-1, 3, 3)
+    shifts = np.array(shifts).reshape(-1, 3)
+    permutations = np.array(permutations, dtype = int).reshape(-1, len(finder.frac))
+    if translations:
+        group, group_perms = translation_group(struct, symprec)
+        rotations = np.repeat(rotations, len(group), axis = 0)
+        shifts = finder.clean(_wrap((shifts[:, None, :] + group[None, :, :]).reshape(-1, 3)))
+        # x R + t_r + T_k: the atom perm_r[i], translated by T_k
+        permutations = group_perms[:, permutations].transpose(1, 0, 2).reshape(-1, permutations.shape[1])
+    return rotations, shifts, permutations
+
+def cartesian_rotations(rotations, lattice):
+    """
+    Convert the rotations of the direct coordinates to cartesian ones,
+    r -> r C with C = L^-1 R L.
+    Args:
+        rotations (n * 3 * 3 np.array): see symmetry_operations()
+        lattice (3 * 3 np.array): lattice vectors
+    Returns:
+        n * 3 * 3 np.array
+    """
+    return np.matmul(np.matmul(np.linalg.inv(lattice), rotations), lattice)
+
+def equivalent_atoms(permutations, translation_permutations = None):
+    """
+    Label the atoms by their orbit under the operations.
+    Args:
+        permutations (n * N np.array): see symmetry_operations()
+        translation_permutations (m * N np.array): the permutations of the pure
+            translations, if the operations are given one per rotation, see
+            translation_group(), default to None
+    Returns:
+        N np.array (int): the smallest atom index of the orbit of each atom
+    """
+    if translation_permutations is None:
+        return np.min(permutations, axis = 0)
+    # the orbit of i is the union of the translation orbits of perm_r[i]
+    labels = np.min(translation_permutations, axis = 0)
+    return np.min(labels[permutations], axis = 0)
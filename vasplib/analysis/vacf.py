@@ -0,0 +1,157 @@
+# coding: utf-8
+import os
+import numpy as np
+from vasplib.core.periodic_table import atomic_masses
+from vasplib.vasp.incar import Incar
+from vasplib.output.outcar import Outcar
+from vasplib.analysis.diffusion import xdatcar_positions
+
+"""
+Functions for the velocity autocorrelation function (VACF) and the vibrational
+density of states (VDOS) of molecular dynamics trajectories.
+"""
+
+def frame_interval(xdatcar, potim = None, nblock = None):
+    """
+    Get the time between two successive frames of an XDATCAR file, POTIM * NBLOCK.
+    The values not given are read from the INCAR file, then the OUTCAR file, in
+    the directory of the XDATCAR file. NBLOCK defaults to 1.
+    Args:
+        xdatcar (Xdatcar): the trajectory
+        potim (float): time step of the ionic motion (fs)
+        nblock (int): number of ionic steps between two frames
+    Returns:
+        dt (float): unit: fs
+    """
+    directory = os.path.dirname(os.path.abspath(xdatcar.filename))
+    incar = os.path.join(directory, 'INCAR')
+    if (potim is None or nblock is None) and os.path.isfile(incar):
+        params = Incar()
+        params.from_file(incar)
+        if potim is None and params.get_attr('POTIM') is not None:
+            potim = float(params.get_attr('POTIM'))
+        if nblock is None and params.get_attr('NBLOCK') is not None:
+            nblock = int(params.get_attr('NBLOCK'))
+    outcar = Outcar(os.path.join(directory, 'OUTCAR'))
+    if (potim is None or nblock is None) and outcar.exists():
+        if potim is None:
+            potim = outcar.potim
+        if nblock is None:
+            nblock = outcar.nblock
+    if potim is None:
+        raise ValueError("POTIM is neither given nor found in INCAR/OUTCAR of {}.".format(directory))
+    return potim * (nblock if nblock is not None else 1)
+
+def finite_difference(positions, dt):
+    """
+    Velocities from the positions by central differences, one-sided at both ends.
+    Args:
+        positions (nframes * natoms * 3 np.array): unwrapped cartesian coordinates (Ang)
+        dt (float): time between two frames (fs)
+    Returns:
+        velocities (nframes * natoms * 3 np.array): unit: Ang/fs
+    """
+    return np.gradient(np.asarray(positions, dtype = float), dt, axis = 0)
+
+def vacf_fft(velocities):
+    """
+    Velocity autocorrelation <v(t0) . v(t0 + m)> of every atom averaged over all
+    time origins, computed with zero-padded FFTs in O(nframes log(nframes)).
+    Args:
+        velocities (nframes * natoms * 3 np.array)
+    Returns:
+        vacf (nframes * natoms np.array): vacf[m] is at the time lag m
+    """
+    nframes = len(velocities)
+    f = np.fft.rfft(velocities, n = 2 * nframes, axis = 0)
+    corr = np.sum(np.fft.irfft(f * np.conj(f), n = 2 * nframes, axis = 0)[:nframes], axis = 2)
+    return corr / (nframes - np.arange(nframes))[:, None]
+
+def species_vacf(positions, dt, atoms, chunk = 256):
+    """
+    Mass-weighted VACF summed over the atoms of each species,
+        C(m) = sum_i M_i <v_i(t0) . v_i(t0 + m)>.
+    The velocities are computed and correlated chunk by chunk of atoms, so
+    positions may be a memory-mapped array.
+    Args:
+        positions (nframes * natoms * 3 np.array): unwrapped cartesian coordinates (Ang)
+        dt (float): time between two frames (fs)
+        atoms (list of dict): {'element': (str), 'num': (int)} in the order of the atoms
+        chunk (int): number of atoms processed at a time, default to 256
+    Returns:
+        dict: {element (str): nframes np.array}, unit: amu * Ang^2/fs^2
+    """
+    masses = np.repeat(atomic_masses([atom['element'] for atom in atoms]), [atom['num'] for atom in atoms])
+    species = np.concatenate([[i] * atom['num'] for i, atom in enumerate(atoms)]).astype(int)
+    total = np.zeros((len(positions), len(atoms)))
+    for j in range(0, len(masses), chunk):
+        vacf = vacf_fft(finite_difference(positions[:, j : j + chunk], dt))
+        # sum over the atoms of each species at once
+        weights = np.zeros((vacf.shape[1], len(atoms)))
+        weights[np.arange(vacf.shape[1]), species[j : j + chunk]] = masses[j : j + chunk]
+        total += np.matmul(vacf, weights)
+
+    result = {}
+    for i, atom in enumerate(atoms):
+        result[atom['element']] = result.get(atom['element'], 0) + total[:, i]
+    return result
+
+def vdos(time, vacf, dof = 1.0, window = True):
+    """
+    Vibrational density of states, the cosine transform of the VACF.
+    Args:
+        time (np.array): time lags (fs), evenly spaced from 0
+        vacf (np.array): the VACF at the time lags
+        dof (float): area of the VDOS, e.g., 3 * N for N atoms, default to 1.0
+        window (bool): damp the VACF to zero with a half Hann window before the
+            transform, reducing the truncation ripples, default to True
+    Returns:
+        (freq, dos):
+            freq (np.array): unit: THz, 1 THz = 33.356 cm^-1
+            dos (np.array): unit: 1/THz
+    """
+    vacf = np.asarray(vacf, dtype = float)
+    n = len(vacf)
+    if window:
+        vacf = vacf * np.hanning(2 * n - 1)[n - 1:]
+    # even extension, C(-t) = C(t)
+    spectrum = np.fft.rfft(np.concatenate((vacf, vacf[-2:0:-1]))).real
+    freq = np.fft.rfftfreq(2 * n - 2, time[1] - time[0]) * 1000
+    spectrum = np.clip(spectrum, 0, None)
+    area = np.sum(spectrum) * freq[1]
+    if area > 0:
+        spectrum = dof * spectrum / area
+    return freq, spectrum
+
+def vacf_analysis(xdatcar, potim = None, start = 0, stop = None, step = 1,
+        window = True, chunk = 256, memmap = None):
+    """
+    Compute the mass-weighted VACF and the VDOS of each species of an Xdatcar
+    trajectory, the velocities being the finite differences of the unwrapped positions.
+    Args:
+        xdatcar (Xdatcar): the trajectory
+        potim (float): time between two successive frames in the file (fs), i.e.,
+            POTIM * NBLOCK, default to read from INCAR/OUTCAR, see frame_interval()
+        start, stop, step (int): frames analyzed, as range(start, stop, step)
+        window (bool): see vdos()
+        chunk (int): number of atoms processed at a time, default to 256
+        memmap (str): if given, the unwrapped positions are kept in this .npy file
+            mapped in memory instead of RAM
+    Returns:
+        dict: {element (str): {'time': np.array (fs), 'vacf': np.array
+            (amu * Ang^2/fs^2), 'freq': np.array (THz), 'vdos': np.array (1/THz)}},
+            the VDOS of a species integrates to 3 * its number of atoms
+    """
+    dt = potim if potim is not None else frame_interval(xdatcar)
+    dt = dt * step
+    positions = xdatcar_positions(xdatcar, start, stop, step, memmap)
+    time = np.arange(len(positions)) * dt
+    counts = {}
+    for atom in xdatcar._atoms:
+        counts[atom['element']] = counts.get(atom['element'], 0) + atom['num']
+
+    results = {}
+    for element, vacf in species_vacf(positions, dt, xdatcar._atoms, chunk).items():
+        freq, dos = vdos(time, vacf, 3 * counts[element], window)
+        results[element] = {'time': time, 'vacf': vacf, 'freq': freq, 'vdos': dos}
+    return results
@@ -0,0 +1,84 @@
+# coding: utf-8
+import numpy as np
+from vasplib.output.chgcar import Chgcar, ChgcarWriter
+
+"""
+Functions for combining volumetric files (CHGCAR, LOCPOT, ...) sharing the same grid.
+"""
+
+def check_compatible(chgcars, tol = 1e-4):
+    """
+    Check that the volumetric files share the same grid and lattice.
+    Args:
+        chgcars (list(Chgcar)): the files to compare
+        tol (float): absolute tolerance on the lattice vectors, default to 1e-4 (Ang)
+    Raises:
+        ValueError: if the grid dimensions or the lattices differ.
+    """
+    ref = chgcars[0]
+    for chg in chgcars[1:]:
+        if [chg.NX, chg.NY, chg.NZ] != [ref.NX, ref.NY, ref.NZ]:
+            raise ValueError("Grid {} of {} doesn't match grid {} of {}.".format(
+                [chg.NX, chg.NY, chg.NZ], chg.filename, [ref.NX, ref.NY, ref.NZ], ref.filename))
+        if not np.allclose(chg.struct.lattice, ref.struct.lattice, rtol = 0, atol = tol):
+            raise ValueError("Lattice of {} doesn't match lattice of {}.".format(
+                chg.filename, ref.filename))
+
+def linear_combination(filenames, coeffs, out, nplanes = 2, tol = 1e-4):
+    """
+    Write sum(coeffs[i] * data[i]) of the volumetric files to a CHGCAR-format file.
+    The files are streamed in lockstep, a few planes at a time, so the memory
+    does not grow with the grid size. The header of the output is taken from the
+    first file.
+    Args:
+        filenames (list(str)): the volumetric files
+        coeffs (list(float)): the coefficients, one for each file
+        out (str): the filename to write to
+        nplanes (int): the number of xy planes read from each file at a time, default to 2
+        tol (float): absolute tolerance on the lattice vectors, default to 1e-4 (Ang)
+    Returns:
+        Chgcar: the written file
+    >>> linear_combination(['CHGCAR_AB', 'CHGCAR_A', 'CHGCAR_B'], [1, -1, -1], 'CHGDIFF')
+    """
+    if len(filenames) != len(coeffs):
+        raise ValueError("Length of 'filenames' and 'coeffs' must equal.")
+
+    chgcars = [Chgcar(filename) for filename in filenames]
+    check_compatible(chgcars, tol)
+
+    ref = chgcars[0]
+    with ChgcarWriter(out, ref.struct, [ref.NX, ref.NY, ref.NZ]) as writer:
+        streams = [chg.iter_planes(nplanes) for chg in chgcars]
+        for chunks in zip(*streams):
+            block = coeffs[0] * chunks[0][1]
+            for coeff, (iz, data) in zip(coeffs[1:], chunks[1:]):
+                block += coeff * data
+            writer.write(block)
+
+    return Chgcar(out)
+
+def charge_density_difference(whole, parts, out, nplanes = 2, tol = 1e-4):
+    """
+    Write the charge density difference rho(AB) - rho(A) - rho(B) - ... to a file.
+    Args:
+        whole (str): the CHGCAR file of the whole system AB
+        parts (list(str)): the CHGCAR files of the fragments A, B, ...
+        out (str): the filename to write to
+        nplanes (int): the number of xy planes read from each file at a time, default to 2
+        tol (float): absolute tolerance on the lattice vectors, default to 1e-4 (Ang)
+    Returns:
+        Chgcar: the written file
+    """
+    return linear_combination([whole] + list(parts), [1.0] + [-1.0] * len(parts),
+            out, nplanes, tol)
+
+def analyze_chgdiff(args):
+    """
+    Command line entry of linear_combination().
+    Args:
+        args (argparse.Namespace): FILES, coeffs, out, nplanes
+    """
+    coeffs = args.coeffs
+    if not coeffs:
+        coeffs = [1.0] + [-1.0] * (len(args.FILES) - 1)
+    linear_combination(args.FILES, coeffs, args.out, args.nplanes)
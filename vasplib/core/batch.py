@@ -0,0 +1,343 @@
+# coding: utf-8
+import numpy as np
+from vasplib.core.periodic_table import atomic_masses
+from vasplib.core.structure import Structure, N_A, is_orthogonal, min_image
+
+"""
+Class for many structures sharing the species and the numbers of atoms, e.g., the
+frames of a trajectory, the ionic steps of a relaxation or a set of displaced
+structures, stored as stacked arrays.
+"""
+
+class StructureBatch(object):
+    """
+    B structures of the same N atoms in the same species blocks, stored as one
+    B * N * 3 coordinate array and one B * 3 * 3 lattice array. The conversions
+    of the coordinates, the volumes, densities, mass centers and distances are
+    computed for the whole batch at once. Indexing returns a Structure sharing
+    the arrays of the batch (batch[k]) or a sub-batch (batch[1:10], batch[[0, 5]]).
+    Per-structure data, e.g., forces and energies, are kept in StructureBatch.data
+    and indexed with the structures.
+    >>> batch = Xdatcar('XDATCAR').batch(0, 1000)
+    >>> centers = batch.mass_centers()
+    """
+    def __init__(self, lattices, coords, elements, nums, coord_type = 'direct',
+            comment = 'Default comment', data = None):
+        """
+        Create a StructureBatch object.
+        Args:
+            lattices (B * 3 * 3 np.array or 3 * 3 np.array): lattice vectors of each
+                structure, or the lattice shared by all of them
+            coords (B * N * 3 np.array): coordinates of the atoms, grouped by species
+                blocks, float32 arrays are kept as they are
+            elements (list(str)): element of each block
+            nums (list(int)): number of atoms of each block
+            coord_type (str): 'cart' or 'direct', default to 'direct'
+            comment (str): the comment
+            data (dict): {name (str): np.array of length B}, e.g., 'forces', 'energies'
+        """
+        coords = np.asarray(coords)
+        if not np.issubdtype(coords.dtype, np.floating):
+            coords = coords.astype(float)
+        self.coords = coords.reshape(len(coords), -1, 3)
+        self.elements = list(elements)
+        self._species = np.repeat(np.arange(len(self.elements)), np.asarray(nums, dtype = int))
+        self.coord_type = coord_type
+        self.comment = comment
+        self.lattices = lattices
+        self.data = dict(data) if data is not None else {}
+        if self.coords.shape[1] != len(self._species):
+            raise ValueError("{} coordinates given for {} atoms.".format(
+                self.coords.shape[1], len(self._species)))
+        for name, values in self.data.items():
+            if len(values) != len(self):
+                raise ValueError("{} values of '{}' given for {} structures.".format(
+                    len(values), name, len(self)))
+
+    @classmethod
+    def from_structures(cls, structures, dtype = float):
+        """
+        Stack structures with the same species blocks into a batch, in the
+        coord_type of the first one.
+        Args:
+            structures (list(Structure))
+            dtype: data type of the coordinates, default to float
+        Returns:
+            StructureBatch
+        """
+        first = structures[0]
+        nums = [atom['num'] for atom in first.atoms]
+        coords = np.empty((len(structures), first.atom_nums, 3), dtype = dtype)
+        lattices = np.empty((len(structures), 3, 3))
+        for k, struct in enumerate(structures):
+            if struct.elements != first.elements or [atom['num'] for atom in struct.atoms] != nums:
+                raise ValueError("Structure {} doesn't have the atoms of the first structure.".format(k))
+            coords[k] = struct.direct_coords() if first.coord_type == 'direct' else struct.cartesian_coords()
+            lattices[k] = struct.lattice
+        return cls(lattices, coords, first.elements, nums, first.coord_type, first.comment)
+
+    @classmethod
+    def from_reader(cls, reader, start = 0, stop = None, step = 1, dtype = float, memmap = None):
+        """
+        Load the frames start, start + step, ... < stop of a trajectory reader,
+        i.e., Xdatcar, Trajectory or ConcatTrajectory, through its trajectory() method.
+        Args:
+            reader (Xdatcar, Trajectory or ConcatTrajectory)
+            start, stop, step (int): 0-based frame range, as range(start, stop, step)
+            dtype: data type of the coordinates, default to float
+            memmap (str): if given, the coordinates are kept in this .npy file mapped
+                in memory
+        Returns:
+            StructureBatch, a fixed lattice is shared by all the structures
+        """
+        coords, lattices = reader.trajectory(start, stop, step, dtype = dtype, memmap = memmap)
+        return cls(reader.lattice if lattices is None else lattices, coords,
+                   [atom['element'] for atom in reader._atoms], [atom['num'] for atom in reader._atoms],
+                   getattr(reader, 'coord_type', None) or reader.structure(1).coord_type, reader._comment)
+
+    def __len__(self):
+        """
+        Return the number of structures.
+        """
+        return len(self.coords)
+
+    @property
+    def lattices(self):
+        """
+        The lattice vectors of each structure, B * 3 * 3 np.array. A lattice shared
+        by all the structures is stored once (read-only broadcast view).
+        """
+        return self._lattices
+
+    @lattices.setter
+    def lattices(self, lattices):
+        lattices = np.asarray(lattices, dtype = float)
+        if lattices.ndim == 2:
+            lattices = np.broadcast_to(lattices, (len(self.coords), 3, 3))
+        if lattices.shape != (len(self.coords), 3, 3):
+            raise ValueError("Lattices of shape {} given for {} structures.".format(
+                lattices.shape, len(self.coords)))
+        self._lattices = lattices
+        self._cache = {}
+
+    def invalidate(self):
+        """
+        Drop the cached lattice quantities, needed only after editing
+        StructureBatch.lattices in place.
+        """
+        self._cache = {}
+
+    @property
+    def fixed_lattice(self):
+        """
+        Return True if all the structures share one lattice array.
+        """
+        return self._lattices.strides[0] == 0
+
+    def _per_lattice(self, name, compute):
+        """
+        Return compute(lattices) for each structure, cached, computed once for a
+        fixed lattice.
+        """
+        if name not in self._cache:
+            if self.fixed_lattice:
+                value = compute(self._lattices[:1])
+                value = np.broadcast_to(value, (len(self),) + value.shape[1:])
+            else:
+                value = compute(self._lattices)
+            self._cache[name] = value
+        return self._cache[name]
+
+    @property
+    def atom_nums(self):
+        """
+        Return the number of atoms of each structure.
+        """
+        return len(self._species)
+
+    @property
+    def nums(self):
+        """
+        Return the number of atoms of each species block.
+        """
+        return np.bincount(self._species, minlength = len(self.elements)).tolist()
+
+    @property
+    def species(self):
+        """
+        The species block index of every atom, N np.array (int).
+        """
+        return self._species.copy()
+
+    @property
+    def symbols(self):
+        """
+        The element symbol of every atom, N np.array (str).
+        """
+        return np.array(self.elements)[self._species]
+
+    @property
+    def inv_lattices(self):
+        """
+        Return the inverse of the lattice matrices, cached.
+        Returns:
+            B * 3 * 3 np.array
+        """
+        return self._per_lattice('inv', np.linalg.inv)
+
+    @property
+    def plane_spacings(self):
+        """
+        Return the distances between the lattice planes of each cell, cached, as
+        Structure.plane_spacings.
+        Returns:
+            B * 3 np.array
+        """
+        return self._per_lattice('spacings', lambda lattices: 1/np.linalg.norm(np.linalg.inv(lattices), axis = 1))
+
+    @property
+    def volumes(self):
+        """
+        Return the volume of each cell, cached.
+        Returns:
+            B np.array: unit: Ang^3
+        """
+        return self._per_lattice('volume', lambda lattices: np.abs(np.linalg.det(lattices)))
+
+    def _convert(self, matrices):
+        """
+        Multiply the coordinates of each structure by its matrix.
+        """
+        if self.fixed_lattice:
+            return np.matmul(self.coords, matrices[0].astype(self.coords.dtype))
+        return np.matmul(self.coords, matrices.astype(self.coords.dtype))
+
+    def cartesian_coords(self):
+        """
+        List the cartesian coordinates of all the atoms of all the structures.
+        Returns:
+            B * N * 3 np.array
+        """
+        if self.coord_type == 'direct':
+            return self._convert(self._lattices)
+        return self.coords
+
+    def direct_coords(self):
+        """
+        List the fractional coordinates of all the atoms of all the structures.
+        Returns:
+            B * N * 3 np.array
+        """
+        if self.coord_type == 'cart':
+            return self._convert(self.inv_lattices)
+        return self.coords
+
+    def direct_to_cart(self):
+        """
+        Change the coordinates of all the structures to cartesian.
+        """
+        if self.coord_type == 'direct':
+            self.coords = self.cartesian_coords()
+            self.coord_type = 'cart'
+
+    def cart_to_direct(self):
+        """
+        Change the coordinates of all the structures to direct.
+        """
+        if self.coord_type == 'cart':
+            self.coords = self.direct_coords()
+            self.coord_type = 'direct'
+
+    def _masses(self):
+        """
+        Return the atomic mass of every atom.
+        """
+        return atomic_masses(self.elements)[self._species]
+
+    @property
+    def molar_mass(self):
+        """
+        Return the molar mass of one structure, the same for the whole batch.
+        Returns:
+            molar mass (float): unit: g/mol
+        """
+        return float(np.sum(self._masses()))
+
+    @property
+    def densities(self):
+        """
+        Return the density of each structure.
+        Returns:
+            B np.array: unit: g/cm^3
+        """
+        return self.molar_mass / N_A / (self.volumes * 10**(-24))
+
+    def mass_centers(self):
+        """
+        Return the mass center of each structure, in coord_type, as
+        Structure.mass_center().
+        Returns:
+            B * 3 np.array
+        """
+        masses = self._masses()
+        return np.matmul(masses, self.coords) / np.sum(masses)
+
+    def distance_matrices(self, i = None, j = None, block = 256, dtype = np.float64, out = None):
+        """
+        Get the minimum-image distances between two sets of atoms in every
+        structure, as Structure.distance_matrix(), vectorized over the batch and
+        evaluated block by block of rows, the memory used being proportional to
+        B * block * len(j). The periodic images are searched as in min_image().
+        Args:
+            i, j (list(int) or np.array or None): atom indices, default to all the atoms
+            block (int): number of rows per block, default to 256
+            dtype: np.float64 or np.float32, default to np.float64
+            out (np.array): the output array, e.g., memory-mapped, default to a new array
+        Returns:
+            B * len(i) * len(j) np.array: distances (Ang)
+        """
+        frac = self.direct_coords()
+        fi = (frac if i is None else frac[:, i]).astype(dtype)
+        fj = (frac if j is None else frac[:, j]).astype(dtype)
+        if out is None:
+            out = np.empty((len(self), fi.shape[1], fj.shape[1]), dtype = dtype)
+        if 'orthogonal' not in self._cache:
+            self._cache['orthogonal'] = is_orthogonal(self._lattices[:1] if self.fixed_lattice else self._lattices)
+        if self.fixed_lattice:
+            lattices, spacings = self._lattices[0], self.plane_spacings[0]
+        else:
+            lattices, spacings = self._lattices, self.plane_spacings
+        for start in range(0, fi.shape[1], block):
+            diff = fj[:, None, :, :] - fi[:, start : start + block, None, :]
+            out[:, start : start + block] = min_image(diff, lattices, spacings, self._cache['orthogonal'],
+                                                      dtype, vectors = False)
+        return out
+
+    def __getitem__(self, key):
+        """
+        Get the structures by python indexing.
+        Args:
+            key (int, slice or index array)
+        Returns:
+            Structure for an int, sharing the arrays of the batch unless they are
+            converted to float64 (float32 coordinates are copied), otherwise
+            StructureBatch (sharing the arrays for a slice)
+        """
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError("Structure index {} out of range.".format(key))
+            return Structure.from_arrays(self._lattices[key], self.coords[key], self.elements, self.nums,
+                                         self.coord_type, self.comment, copy = False)
+        data = {name: values[key] for name, values in self.data.items()}
+        lattices = self._lattices[0] if self.fixed_lattice else self._lattices[key]
+        return StructureBatch(lattices, self.coords[key], self.elements, self.nums, self.coord_type,
+                              self.comment, data)
+
+    def __iter__(self):
+        """
+        Iterate over the structures, see StructureBatch.__getitem__().
+        """
+        for k in range(len(self)):
+            yield self[k]
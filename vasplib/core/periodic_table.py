@@ -2,13 +2,119 @@
 
 import os
 import json
-from vasplib import core
+import numpy as np
+from vasplib.core import element_table
 """
-Class representing Element.
+Class representing Element, and the array lookups of the numeric properties of
+the elements.
+The numeric properties are read from the precompiled table element_table.py,
+regenerated by build_table() when periodic_table.json changes; the full json
+file is loaded lazily, on the first request of a property not in the table.
 """
-core_dir = os.path.dirname(core.__file__)
-with open(os.path.join(core_dir, 'periodic_table.json'), 'r') as fp:
-    pt_data = json.load(fp)
+core_dir = os.path.dirname(os.path.abspath(__file__))
+
+# symbol <-> atomic no., SYMBOLS[Z] for 103 >= Z >= 1, SYMBOLS[0] is a placeholder
+SYMBOLS = element_table.SYMBOLS
+Z_OF = {symbol: Z for Z, symbol in enumerate(SYMBOLS) if Z > 0}
+# {key: np.array indexed by Z}, NaN for no data
+PROPERTIES = {key: np.array(values, dtype = float) for key, values in element_table.PROPERTIES.items()}
+_INTEGERS = set(element_table.INTEGERS)
+
+_pt_data = None
+
+def load_data():
+    """
+    Load the full periodic_table.json file, once.
+    Returns:
+        dict: {symbol: {attr: val, attr: val}}
+    """
+    global _pt_data
+    if _pt_data is None:
+        with open(os.path.join(core_dir, 'periodic_table.json'), 'r') as fp:
+            _pt_data = json.load(fp)
+    return _pt_data
+
+def __getattr__(name):
+    # pt_data, the full json data, is loaded on the first access
+    if name == 'pt_data':
+        return load_data()
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
+
+def atomic_numbers(symbols):
+    """
+    Get the atomic numbers of element symbols.
+    Args:
+        symbols (list(str) or np.array(str))
+    Returns:
+        np.array (int)
+    """
+    try:
+        return np.fromiter([Z_OF[symbol] for symbol in symbols], dtype = int)
+    except KeyError as error:
+        raise ValueError("The element symbol {} is not valid.".format(error.args[0]))
+
+def element_property(key, elements):
+    """
+    Look up a numeric property of many elements at once.
+    Args:
+        key (str): one of PROPERTIES, e.g., 'Atomic mass', 'X', 'Atomic radius'
+        elements (list(str) or np.array(int)): element symbols or atomic numbers
+    Returns:
+        np.array (float): NaN for no data
+    """
+    if key not in PROPERTIES:
+        raise ValueError("'{}' is not a numeric property, available: {}.".format(key, sorted(PROPERTIES)))
+    if isinstance(elements, (list, tuple)) and all(isinstance(element, str) for element in elements):
+        return PROPERTIES[key][atomic_numbers(elements)]
+    elements = np.asarray(elements)
+    Z = elements if elements.dtype.kind in 'iu' else atomic_numbers(elements.reshape(-1)).reshape(elements.shape)
+    return PROPERTIES[key][Z]
+
+def atomic_masses(elements):
+    """
+    Get the atomic masses of elements.
+    Args:
+        elements (list(str) or np.array(int)): element symbols or atomic numbers
+    Returns:
+        np.array (float): unit: g/mol
+    """
+    return element_property('Atomic mass', elements)
+
+def build_table(filename = None):
+    """
+    Regenerate the precompiled table element_table.py from periodic_table.json,
+    keeping the properties whose values are numbers (or missing) for all elements.
+    Args:
+        filename (str): the file to write, default to element_table.py in vasplib/core
+    """
+    data = load_data()
+    symbols = sorted(data, key = lambda symbol: data[symbol]['Atomic no'])
+    keys = []
+    for key in sorted({key for symbol in symbols for key in data[symbol]}):
+        values = [data[symbol].get(key) for symbol in symbols]
+        numbers = [value for value in values if isinstance(value, (int, float))]
+        if numbers and all(isinstance(value, (int, float)) or value is None or value == 'no data'
+                           or (isinstance(value, str) and value.startswith('no data')) for value in values):
+            keys.append(key)
+    integers = [key for key in keys if all(isinstance(data[symbol].get(key), int) for symbol in symbols)]
+
+    def number(value):
+        return repr(value) if isinstance(value, (int, float)) else 'nan'
+
+    lines = ['# coding: utf-8',
+             '# Generated by vasplib.core.periodic_table.build_table() from periodic_table.json, do not edit.',
+             'nan = float("nan")',
+             'SYMBOLS = ({},)'.format(', '.join([repr('')] + [repr(symbol) for symbol in symbols])),
+             'INTEGERS = ({},)'.format(', '.join([repr(key) for key in integers])),
+             'PROPERTIES = {']
+    for key in keys:
+        values = ['nan'] + [number(data[symbol].get(key)) for symbol in symbols]
+        lines.append('    {}: ({}),'.format(repr(key), ', '.join(values)))
+    lines.append('}')
+    if filename is None:
+        filename = os.path.join(core_dir, 'element_table.py')
+    with open(filename, 'w') as fp:
+        fp.write('\n'.join(lines) + '\n')
 
 class Element(object):
     """
@@ -19,7 +125,8 @@ class Element(object):
 
     Attributes:
         symbol (str): elemental symbol
-        elem_data (dict): attributes dictionary
+        Z (int): atomic no.
+        elem_data (dict): attributes dictionary, loaded from the json file on the first access
 
     Methods:
         get_attr(key): get the attribute key
@@ -27,21 +134,29 @@ class Element(object):
     """
     def __init__(self, symbol):
         self.symbol = symbol
-        try:
-            self.elem_data = pt_data[symbol]
-        except KeyError:
+        self.Z = Z_OF.get(symbol)
+        if self.Z is None:
             print("The element symbol {} is not valid.".format(symbol))
 
+    @property
+    def elem_data(self):
+        return load_data()[self.symbol]
+
     def get_attr(self, key):
         """
         Args:
             key (str): Attribute of the element.
                 Available keys: "Atomic mass", "Atomic no", "Atomic orbitals", etc.
-        Returns the attribute key of the element.
+        Returns the attribute key of the element, from the precompiled table for
+        the numeric properties.
         >>> Ag = Element('Ag')
         >>> Ag.get_attr("Atomic mass")
         107.8682
         """
+        if key in PROPERTIES and self.Z is not None:
+            value = PROPERTIES[key][self.Z]
+            if value == value: # not NaN
+                return int(value) if key in _INTEGERS else float(value)
         return self.elem_data[key]
 
     def from_Z(self, Z):
@@ -56,6 +171,5 @@ class Element(object):
         >>> X.symbol
         "Xe"
         """
-        for symbol in pt_data:
-            if pt_data[symbol]["Atomic no"] == Z:
-                return Element(symbol)
+        if 1 <= Z < len(SYMBOLS):
+            return Element(SYMBOLS[Z])
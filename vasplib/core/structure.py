@@ -1,14 +1,395 @@
 # conding: utf-8
 import numpy as np
 import math
+from collections.abc import MutableMapping
 from copy import deepcopy
-from vasplib.core.periodic_table import Element
-from scipy.constants import N_A
+from vasplib.core.periodic_table import atomic_masses
+
+# Avogadro constant (1/mol), exact since the 2019 SI, equal to scipy.constants.N_A;
+# defined here so importing the structures doesn't load scipy
+N_A = 6.02214076e23
+
+def _readonly(array):
+    """
+    Return a read-only view of the array, sharing its memory.
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+def _strip_comment(line):
+    """
+    Remove the comment starting with '!' or '#' and the leading/tailing spaces.
+    """
+    if '!' in line:
+        line = line.split('!', 1)[0]
+    if '#' in line:
+        line = line.split('#', 1)[0]
+    return line.strip()
+
+def _bool_flags(flags, filename):
+    """
+    Convert an array of 'T'/'F' strings to a boolean array.
+    """
+    true = (flags == 'T') | (flags == 't')
+    if not np.all(true | (flags == 'F') | (flags == 'f')):
+        raise ValueError("Illegal selective dynamics flags in {}.".format(filename))
+    return true
+
+def _parse_block(block, nrows, nflags, filename):
+    """
+    Parse the N lines of a coordinate block, tokenized in bulk.
+    Args:
+        block (list(str)): the lines
+        nrows (int): the number of lines expected
+        nflags (int): 3 if each line has selective dynamics flags, otherwise 0
+    Returns:
+        (values, flags): N * 3 np.array, and N * 3 np.array (bool) or None
+    """
+    text = '\n'.join(block)
+    if '!' in text or '#' in text:
+        block = [_strip_comment(line) for line in block]
+        text = '\n'.join(block)
+    tokens = text.split()
+    ncols = 3 + nflags
+    if len(tokens) != ncols * nrows:
+        # trailing labels, e.g., the element symbols
+        fields = [line.split() for line in block]
+        if any(len(field) < ncols for field in fields):
+            raise ValueError("Missing values in the coordinates of {}.".format(filename))
+        tokens = [token for field in fields for token in field[:ncols]]
+    # convert the columns at once
+    values = np.empty((nrows, 3))
+    for i in range(3):
+        values[:, i] = np.array(tokens[i::ncols], dtype = float)
+    flags = None
+    if nflags:
+        flags = np.empty((nrows, 3), dtype = bool)
+        for i in range(3):
+            flags[:, i] = _bool_flags(np.array(tokens[3 + i::ncols]), filename)
+    return values, flags
+
+def parse_poscar(lines, filename = 'POSCAR', velocities = True):
+    """
+    Parse a POSCAR/CONTCAR-formatted text in one pass. The header lines are read
+    one by one, skipping the empty lines and the comments starting with '!' or '#',
+    and the coordinate and velocity blocks are tokenized in bulk into np.arrays.
+    Args:
+        lines (list(str) or str): the lines of the text
+        filename (str): the name of the source, only used in error messages
+        velocities (bool): read the velocities following the coordinates, default to True
+    Returns:
+        dict: {'comment': (str), 'factor': (float) the scaling factor in the text,
+            'lattice': (3 * 3 np.array) scaled lattice vectors,
+            'lattice_flag': (3 * 3 list(bool)) or [],
+            'elements': (list(str or None)), 'nums': (list(int)),
+            'selective': (bool), 'coord_type': 'cart' or 'direct',
+            'coords': (N * 3 np.array) coordinates, scaled if cartesian,
+            'flags': (N * 3 np.array, bool) selective dynamics flags or None,
+            'velocities': (N * 3 np.array) cartesian velocities (Ang/fs) or None}
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    lines = list(lines)
+    pos = [1]
+    def header():
+        # the next non-empty line
+        while pos[0] < len(lines):
+            line = _strip_comment(lines[pos[0]])
+            pos[0] += 1
+            if line:
+                return line
+        raise ValueError("Incomplete POSCAR header in {}.".format(filename))
+
+    data = {'comment': lines[0].strip() if lines else ''}
+    # 2nd line: factor, negative for the volume of the cell
+    factor = float(header().split()[0])
+    data['factor'] = factor
+    # 3rd ~ 5th line: lattice vectors, with optional flags
+    reduced_lattice = []
+    data['lattice_flag'] = []
+    for i in range(3):
+        line = header().split()
+        reduced_lattice.append([float(num) for num in line[:3]])
+        if len(line) > 3:
+            data['lattice_flag'].append(list(_bool_flags(np.array(line[3:6]), filename)))
+    reduced_lattice = np.array(reduced_lattice)
+    if factor < 0:
+        factor = (-factor / abs(np.linalg.det(reduced_lattice)))**(1/3)
+    data['lattice'] = reduced_lattice * factor
+
+    # 6th line: atomic species and numbers
+    line = header()
+    if line[0].isdigit(): # No line for atomic species
+        data['nums'] = [int(num_str) for num_str in line.split()]
+        data['elements'] = [None] * len(data['nums'])
+    else:
+        data['elements'] = line.split()
+        data['nums'] = [int(num_str) for num_str in header().split()]
+
+    # "Selective Dynamics"
+    line = header()
+    data['selective'] = line[0] in 'sS'
+    if data['selective']:
+        line = header()
+    # Atomic coordination type
+    if line[0] in "dD":
+        data['coord_type'] = 'direct'
+    elif line[0] in "cCkK":
+        data['coord_type'] = 'cart'
+    else:
+        raise ValueError("Undefined coordination type in {}".format(filename))
+
+    # Atomic positions
+    N = sum(data['nums'])
+    start = pos[0]
+    block = lines[start : start + N]
+    end = start + N
+    if len(block) < N or not all(line.strip() for line in block):
+        # empty lines inside the block
+        block = []
+        end = start
+        while len(block) < N and end < len(lines):
+            if lines[end].strip():
+                block.append(lines[end])
+            end += 1
+        if len(block) < N:
+            raise ValueError("{} coordinates found for {} atoms in {}.".format(len(block), N, filename))
+    data['coords'], data['flags'] = _parse_block(block, N, 3 if data['selective'] else 0, filename)
+    if data['coord_type'] == 'cart':
+        data['coords'] *= factor
+
+    # Velocities written by VASP in CONTCAR, after an empty line
+    data['velocities'] = None
+    if not velocities:
+        return data
+    rest = [line for line in lines[end : end + N + 10] if line.strip()]
+    if rest and rest[0].lstrip()[0] in 'lL':
+        rest = rest[8:] # lattice velocities and vectors
+    if rest and rest[0].lstrip()[0] in 'cCkKdD':
+        velocity_type = 'direct' if rest[0].lstrip()[0] in 'dD' else 'cart'
+        rest = rest[1:]
+    else:
+        velocity_type = 'cart'
+    if len(rest) >= N and N > 0:
+        try:
+            values = _parse_block(rest[:N], N, 0, filename)[0]
+        except ValueError:
+            values = None
+        if values is not None and velocity_type == 'direct':
+            values = np.matmul(values, data['lattice'])
+        data['velocities'] = values
+    return data
+
+def format_rows(values, precision = 14, flags = None):
+    """
+    Format the rows of an array as the lines of a POSCAR block, with one string
+    formatting operation over the whole array instead of one call per row.
+    Args:
+        values (N * 3 np.array): e.g., the coordinates
+        precision (int): number of decimals, default to 14
+        flags (N * 3 np.array, bool): selective dynamics flags appended as T/F,
+            default to None
+    Returns:
+        str: N lines, each terminated by a newline
+    """
+    values = np.asarray(values, dtype = float).reshape(len(values), -1)
+    number = '%.{}f'.format(precision)
+    row = '    '.join([number] * values.shape[1])
+    if flags is not None:
+        table = np.empty((len(values), values.shape[1] + 3), dtype = object)
+        table[:, :values.shape[1]] = values
+        table[:, values.shape[1]:] = np.where(flags, 'T', 'F')
+        row += '    %s %s %s'
+    else:
+        table = values
+    return ((row + '\n') * len(table)) % tuple(table.ravel().tolist())
+
+def is_orthogonal(lattices):
+    """
+    Return True if the lattice vectors are orthogonal, in every lattice of a stack.
+    Args:
+        lattices (3 * 3 or B * 3 * 3 np.array)
+    Returns:
+        (bool)
+    """
+    metric = np.matmul(lattices, np.swapaxes(lattices, -1, -2))
+    return bool(np.allclose(metric - metric * np.eye(3), 0, atol = 1e-10))
+
+def min_image(diff, lattices, spacings, orthogonal, dtype = np.float64, vectors = True):
+    """
+    Reduce fractional displacements to their minimum images, for one lattice or
+    for a batch of structures with one lattice each. The displacements are wrapped
+    into [-0.5, 0.5) along a, b and c, which gives the minimum image in orthogonal
+    cells. Otherwise, a vector v = (f + n).L has |f_i + n_i| <= |v| / d_i with
+    d_i the plane spacings, which bounds the lattice translations searched by
+    |n_i| <= rmax / d_i + 0.5, rmax the longest wrapped vector.
+    Args:
+        diff (... * 3 np.array): fractional displacements, wrapped in place; B * ... * 3
+            for a batch
+        lattices (3 * 3 np.array, or B * 3 * 3 np.array for a batch)
+        spacings (3 np.array, or B * 3 np.array for a batch): the lattice plane spacings
+        orthogonal (bool): whether all the lattices are orthogonal, see is_orthogonal()
+        dtype: np.float64 or np.float32, default to np.float64
+        vectors (bool): return the cartesian vectors, else the distances, default to True
+    Returns:
+        ... * 3 np.array (Ang) if vectors, else ... np.array (Ang)
+    """
+    diff -= np.round(diff)
+    shape = diff.shape
+    if np.ndim(lattices) == 2:
+        lattices, spacings = lattices[None], np.reshape(spacings, (1, 3))
+    # B * M * 3, the displacements of each lattice
+    cart = np.matmul(diff.reshape(len(lattices), -1, 3), lattices.astype(dtype))
+    d2 = np.einsum('...i,...i->...', cart, cart)
+    if not orthogonal and d2.size:
+        rmax = np.sqrt(np.max(d2, axis = 1))
+        nmax = np.max(np.floor(rmax[:, None] / spacings + 0.5), axis = 0).astype(int)
+        n = np.stack(np.meshgrid(*[np.arange(-m, m + 1) for m in nmax], indexing = 'ij'), axis = -1)
+        n = n.reshape(-1, 3)
+        n = n[np.any(n != 0, axis = 1)]
+        shifts = np.matmul(n, lattices).astype(dtype) # B * S * 3
+        best = cart.copy() if vectors else cart
+        for k in range(len(n)):
+            candidate = cart + shifts[:, k, None, :]
+            c2 = np.einsum('...i,...i->...', candidate, candidate)
+            shorter = c2 < d2
+            if vectors:
+                best[shorter] = candidate[shorter]
+            d2 = np.minimum(d2, c2)
+        cart = best
+    return cart.reshape(shape) if vectors else np.sqrt(d2).reshape(shape[:-1])
+
+class AtomView(MutableMapping):
+    """
+    Dict-style view of one species block of a Structure, for compatibility with
+    the list-of-dicts atoms: {'element': (str), 'num': (int), 'coords': (num*3 np.array)}.
+    'coords' is a slice of the coordinate array of the structure (no copy), and
+    assigning any key writes back to the structure. Other keys, e.g., 'selective',
+    are stored per block.
+    """
+    __slots__ = ('_struct', '_k')
+
+    def __init__(self, struct, k):
+        self._struct = struct
+        self._k = k
+
+    def __getitem__(self, key):
+        struct = self._struct
+        if key == 'element':
+            return struct._elements[self._k]
+        if key == 'num':
+            start, stop = struct._block(self._k)
+            return stop - start
+        if key == 'coords':
+            start, stop = struct._block(self._k)
+            return struct._coords[start : stop]
+        return struct._extras[self._k][key]
+
+    def __setitem__(self, key, value):
+        struct = self._struct
+        if key == 'element':
+            struct._elements[self._k] = value
+        elif key == 'num':
+            start, stop = struct._block(self._k)
+            if value != stop - start:
+                coords = np.zeros((value, 3))
+                n = min(value, stop - start)
+                coords[:n] = struct._coords[start : start + n]
+                struct._resize_block(self._k, coords)
+        elif key == 'coords':
+            start, stop = struct._block(self._k)
+            value = np.asarray(value, dtype = float).reshape(-1, 3)
+            if len(value) == stop - start:
+                struct._coords[start : stop] = value
+                struct.invalidate()
+            else:
+                struct._resize_block(self._k, value)
+        else:
+            struct._extras[self._k][key] = value
+
+    def __delitem__(self, key):
+        if key in ('element', 'num', 'coords'):
+            raise KeyError("Key '{}' can't be deleted.".format(key))
+        del self._struct._extras[self._k][key]
+
+    def __iter__(self):
+        yield 'element'
+        yield 'num'
+        yield 'coords'
+        for key in self._struct._extras[self._k]:
+            yield key
+
+    def __len__(self):
+        return 3 + len(self._struct._extras[self._k])
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __deepcopy__(self, memo):
+        return {key: deepcopy(value, memo) for key, value in self.items()}
+
+class AtomsView(object):
+    """
+    List-style view of the species blocks of a Structure, see AtomView.
+    """
+    __slots__ = ('_struct',)
+
+    def __init__(self, struct):
+        self._struct = struct
+
+    def __len__(self):
+        return len(self._struct._elements)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [AtomView(self._struct, i) for i in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("Species index {} out of range.".format(k))
+        return AtomView(self._struct, k)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield AtomView(self._struct, k)
+
+    def __eq__(self, other):
+        return list(map(dict, self)) == list(map(dict, other))
+
+    def __repr__(self):
+        return repr([dict(atom) for atom in self])
+
+    def __deepcopy__(self, memo):
+        return [deepcopy(atom, memo) for atom in self]
+
+    def append(self, atom):
+        """
+        Append a species block {'element': (str), 'num': (int), 'coords': (num*3 np.array)},
+        the coordinates default to zeros.
+        """
+        self._struct._append_block(atom)
+
+    def extend(self, atoms):
+        for atom in atoms:
+            self.append(atom)
 
 class Structure(object):
     """
     Structure object for reading, writing and manipulating structures.
+    The atoms are stored in one contiguous N * 3 coordinate array, grouped by
+    species blocks as in POSCAR files, with the species index of every atom and
+    a table of the block elements. Structure.atoms gives the list-of-dicts view
+    of the blocks.
+    The quantities derived from the lattice (inverse, reciprocal lattice, volume,
+    metric tensor, lattice constants) are computed once and cached until the
+    lattice changes, and the coordinates converted to the other coord_type are
+    cached until the lattice or the coordinates change, also when the arrays of
+    Structure.coords are edited in place.
     """
+    __slots__ = ('comment', 'coord_type', '_lattice', '_coords', '_species', '_elements', '_extras',
+                 '_cache', '_converted')
+
     def __init__(self,
             comment = 'Default comment',
             lattice = [],
@@ -31,10 +412,218 @@ class Structure(object):
             coord_type (str): 'cart' or 'direct', representing the coordination type of the structure.
         """
         self.comment = comment
+        self._cache = {}
+        self._converted = None # (lattice key, coordinates, coordinates of the other coord_type)
         self.lattice = lattice
         self.atoms = atoms
         self.coord_type = coord_type
 
+    @property
+    def lattice(self):
+        """
+        The lattice vectors, 3 * 3 np.array. Assigning a new lattice clears the
+        cached lattice quantities.
+        """
+        return self._lattice
+
+    @lattice.setter
+    def lattice(self, lattice):
+        self._lattice = np.asarray(lattice, dtype = float)
+        self._cache = {}
+
+    def _lattice_cache(self):
+        """
+        Return the dict of the cached lattice quantities, emptied if the lattice
+        array was edited in place since they were computed.
+        """
+        key = self._lattice.tobytes()
+        if self._cache.get('key') != key:
+            self._cache = {'key': key}
+        return self._cache
+
+    def _cached(self, name, compute):
+        """
+        Return the cached lattice quantity name, computed by compute() on the first call.
+        """
+        cache = self._lattice_cache()
+        if name not in cache:
+            value = compute()
+            if isinstance(value, np.ndarray):
+                value = _readonly(value)
+            cache[name] = value
+        return cache[name]
+
+    def invalidate(self):
+        """
+        Drop the cached converted coordinates. The cache is checked against the
+        coordinates on every access, so this only releases its memory.
+        """
+        self._converted = None
+
+    @property
+    def inv_lattice(self):
+        """
+        Return the inverse of the lattice matrix, cached.
+        Returns:
+            3 * 3 np.array: frac = cart @ inv_lattice
+        """
+        return self._cached('inv', lambda: np.linalg.inv(self._lattice))
+
+    @property
+    def volume(self):
+        """
+        Return the volume of the cell, cached.
+        Returns:
+            volume (float): unit: Ang^3
+        """
+        return self._cached('volume', lambda: abs(np.linalg.det(self._lattice)))
+
+    @property
+    def metric_tensor(self):
+        """
+        Return the metric tensor G = L L^T of the lattice, cached.
+        Returns:
+            3 * 3 np.array: G[i, j] = a_i . a_j
+        """
+        return self._cached('metric', lambda: np.matmul(self._lattice, self._lattice.T))
+
+    @property
+    def plane_spacings(self):
+        """
+        Return the distances between the lattice planes (100), (010) and (001),
+        i.e., the heights of the cell, cached.
+        Returns:
+            3 np.array: 1/|b_i|, b_i the reciprocal lattice vectors without 2*pi
+        """
+        return self._cached('spacings', lambda: 1/np.linalg.norm(self.inv_lattice, axis = 0))
+
+    @classmethod
+    def from_arrays(cls, lattice, coords, elements, nums, coord_type = 'direct',
+            comment = 'Default comment', copy = True):
+        """
+        Create a structure from the arrays directly, without per-species dicts.
+        Args:
+            lattice (3*3 np.array): lattice vectors
+            coords (N*3 np.array): coordinates of the atoms, grouped by species blocks
+            elements (list(str)): element of each block
+            nums (list(int)): number of atoms of each block
+            coord_type (str): 'cart' or 'direct', default to 'direct'
+            comment (str): the comment
+            copy (bool): copy the coordinates, default to True, otherwise the
+                structure shares the float arrays given (a view)
+        Returns:
+            Structure (or the calling subclass)
+        """
+        struct = cls(comment = comment, lattice = lattice, atoms = [], coord_type = coord_type)
+        struct._set_arrays(coords, elements, nums, copy = copy)
+        return struct
+
+    def _set_arrays(self, coords, elements, nums, extras = None, copy = True):
+        """
+        Replace the atoms by the coordinates and the species blocks.
+        """
+        if copy:
+            self._coords = np.array(coords, dtype = float).reshape(-1, 3)
+        else:
+            self._coords = np.asarray(coords, dtype = float).reshape(-1, 3)
+        self._elements = list(elements)
+        self._species = np.repeat(np.arange(len(self._elements)), np.asarray(nums, dtype = int))
+        self._extras = extras if extras is not None else [{} for element in self._elements]
+        self.invalidate()
+        if len(self._species) != len(self._coords):
+            raise ValueError("{} coordinates given for {} atoms.".format(
+                len(self._coords), len(self._species)))
+
+    @property
+    def atoms(self):
+        """
+        The list-of-dicts view of the species blocks, see AtomView.
+        Returns:
+            AtomsView: [{'element': (str), 'num': (int), 'coords': (num*3 np.array)}, ...]
+        """
+        return AtomsView(self)
+
+    @atoms.setter
+    def atoms(self, atoms):
+        elements, nums, coords, extras = [], [], [], []
+        for atom in atoms:
+            elements.append(atom['element'])
+            nums.append(int(atom['num']))
+            if 'coords' in atom:
+                coords.append(np.asarray(atom['coords'], dtype = float).reshape(-1, 3))
+            else:
+                coords.append(np.zeros((atom['num'], 3)))
+            extras.append({key: value for key, value in atom.items()
+                           if key not in ('element', 'num', 'coords')})
+        self._set_arrays(np.concatenate(coords) if coords else np.empty((0, 3)),
+                         elements, nums, extras)
+
+    def _block(self, k):
+        """
+        Return (start, stop), the index range of the atoms of the species block k.
+        """
+        bounds = np.searchsorted(self._species, [k, k + 1])
+        return int(bounds[0]), int(bounds[1])
+
+    def _resize_block(self, k, coords):
+        """
+        Replace the coordinates of the species block k by coords of another length.
+        """
+        start, stop = self._block(k)
+        self._coords = np.concatenate((self._coords[:start], coords, self._coords[stop:]))
+        self._species = np.concatenate((self._species[:start], np.full(len(coords), k),
+                                        self._species[stop:]))
+        self.invalidate()
+
+    def _append_block(self, atom):
+        """
+        Append a species block given by a dict.
+        """
+        num = int(atom['num'])
+        coords = atom['coords'] if 'coords' in atom else np.zeros((num, 3))
+        self._coords = np.concatenate((self._coords, np.asarray(coords, dtype = float).reshape(-1, 3)))
+        self._species = np.concatenate((self._species, np.full(num, len(self._elements))))
+        self._elements.append(atom['element'])
+        self._extras.append({key: value for key, value in atom.items()
+                             if key not in ('element', 'num', 'coords')})
+        self.invalidate()
+
+    @property
+    def coords(self):
+        """
+        The coordinates of all the atoms in coord_type, the array of the structure
+        itself (in-place changes are kept).
+        Returns:
+            self.atom_nums * 3 np.array
+        """
+        return self._coords
+
+    @coords.setter
+    def coords(self, coords):
+        coords = np.array(coords, dtype = float).reshape(-1, 3)
+        if len(coords) != len(self._coords):
+            raise ValueError("{} coordinates given for {} atoms.".format(len(coords), len(self._coords)))
+        self._coords = coords
+        self.invalidate()
+
+    @property
+    def species(self):
+        """
+        The species block index of every atom, read-only.
+        Returns:
+            self.atom_nums np.array (int)
+        """
+        return _readonly(self._species)
+
+    @property
+    def symbols(self):
+        """
+        The element symbol of every atom.
+        Returns:
+            self.atom_nums np.array (str)
+        """
+        return np.array(self._elements)[self._species]
+
     @property
     def molar_mass(self):
         """
@@ -42,7 +631,13 @@ class Structure(object):
         Returns:
             molar mass (float): unit: g/mol
         """
-        return sum(Element(atom['element']).get_attr('Atomic mass')* atom['num'] for atom in self.atoms)
+        return float(np.dot(self._block_masses(), np.bincount(self._species, minlength = len(self._elements))))
+
+    def _block_masses(self):
+        """
+        Return the atomic mass of the element of each species block.
+        """
+        return atomic_masses(self._elements)
 
     @property
     def density(self):
@@ -52,7 +647,7 @@ class Structure(object):
             density (float): unit: g/cm^3
         """
         mass = self.molar_mass/N_A
-        volume = np.linalg.det(self.lattice)*10**(-24)
+        volume = self.volume*10**(-24)
         return mass/volume
 
     def mass_center(self):
@@ -61,13 +656,8 @@ class Structure(object):
         Returns:
             center (np.array): np.array([x, y, z])
         """
-        weight = self.molar_mass
-        weighted_sum = 0
-        for species in self.atoms:
-            weighted_sum += np.sum(species['coords'], axis = 0) * Element(species['element']).get_attr('Atomic mass')
-        center = weighted_sum / weight
-
-        return center
+        masses = self._block_masses()[self._species]
+        return np.matmul(masses, self._coords) / np.sum(masses)
 
     def from_POSCAR(self, filename = 'POSCAR'):
         """
@@ -76,128 +666,101 @@ class Structure(object):
             filename (str): the filename of the POSCAR file. Defalut to 'POSCAR'
         """
         with open(filename, 'r') as fp:
-            lines = fp.readlines()
-
-        # Remove comments starting with '!' or "#",
-        # and remove leading/tailing spaces, EOL
-        def beautify(string):
-            string = string.strip()
-            if '!' in string:
-                string = string.split('!', 1)[0]
-            if '#' in string:
-                string = string.split('#', 1)[0]
-            string = string.strip()
-            return string
-
-        # Remove the empty lines and lines with only comments
-        for i, line in enumerate(lines):
-            lines[i] = beautify(line)
-            if not lines[i]:
-                lines.remove(lines[i])
-
-        # 1st line: comment
-        self.comment = lines[0]
-        # 2nd line: factor
-        factor = float(lines[1])
-
-        reduced_lattice = []
-        # 3rd ~ 5th line: lattice vectors
-        for i in range(2, 5):
-            line = lines[i].split()
-            vector = [float(num) for num in line[:3]]
-            reduced_lattice.append(vector)
-        self.lattice = np.array(reduced_lattice) * factor
-
-        self.atoms = []
-        # 6th line: atomic species and numbers
-        if lines[5][0].isdigit(): # No line for atomic species
-            for num_str in lines[5].split():
-                self.atoms.append({'element': None, 'num': int(num_str)})
-            num_line = 6 # line for coord_type
-        else:
-            for element, num_str in zip(lines[5].split(), lines[6].split()):
-                self.atoms.append({'element': element, 'num': int(num_str)})
-            num_line = 7
-
-        # Skip "Selective Dynamics"
-        if lines[num_line][0] in 'sS':
-            num_line += 1
-            
-        # Atomic coordination type
-        if lines[num_line][0] in "dD":
-            self.coord_type = 'direct'
-        elif lines[num_line][0] in "cC":
-            self.coord_type = 'cart'
-        else:
-            raise Exception ("Undefined coordination type in {}".format(filename))
+            lines = fp.read().splitlines()
+        self.from_lines(lines, filename)
 
-        num_line += 1
-        # Atomic positions
-        for atom in self.atoms:
-            atom['coords'] = []
-            for i in range(atom['num']):
-                line = lines[num_line]
-                atom['coords'].append([float(num) for num in line.split()[:3]])
-                num_line += 1
-
-        if self.coord_type == 'cart':
-            for atom in self.atoms:
-                atom['coords'] = np.array(atom['coords']) * factor
-        else:
-            for atom in self.atoms:
-                atom['coords'] = np.array(atom['coords'])
+    def from_lines(self, lines, filename = 'POSCAR'):
+        """
+        Read a structure from the lines of a POSCAR-formatted text, e.g., the
+        header of a CHGCAR file, see parse_poscar().
+        Args:
+            lines (list(str)): the lines of the text
+            filename (str): the name of the source, only used in error messages
+        """
+        data = parse_poscar(lines, filename, velocities = False)
+        self.comment = data['comment']
+        self.lattice = data['lattice']
+        self.coord_type = data['coord_type']
+        self._set_arrays(data['coords'], data['elements'], data['nums'], copy = False)
 
-    def write_POSCAR(self, filename):
+    def write_POSCAR(self, filename, precision = 14):
         """
         Write Structure object to a file.
         Args:
-        filename (str): the filename to write to.
-        """
-        # Convert bool to char
-        def bool_char(val):
-            """Return 'T' if  True, return 'F' if False."""
-            return 'T' if val else 'F'
-
-        with open(filename, 'w') as fp:
-            fp.write(self.comment + '\n')
-            fp.write('1.0\n')
-
-            # Write the lattice vectors
-            for i in range(3):
-                fp.write('     '.join([str(num) for num in self.lattice[i]]))
-                fp.write('\n')
-
-            # Write the atomic species
-            fp.write(' '.join([atom['element'] for atom in self.atoms]))
-            fp.write('\n')
-            # Write the atom numbers
-            fp.write(' '.join([str(atom['num']) for atom in self.atoms]))
-            fp.write('\n')
-            # Write the coordination type
-            fp.write(self.coord_type + '\n')
-            # Write the atomic positions
-            for atom in self.atoms:
-                for i in range(atom['num']):
-                    fp.write('    '.join([str(num) for num in atom['coords'][i]]))
-                    fp.write('\n')
+        filename (str or file object): the filename to write to, or an opened
+            file object, e.g., the header of a CHGCAR file being written.
+        precision (int): number of decimals of the lattice vectors and the
+            coordinates, default to 14
+        """
+        if hasattr(filename, 'write'):
+            self._write_POSCAR(filename, precision)
+        else:
+            with open(filename, 'w') as fp:
+                self._write_POSCAR(fp, precision)
+
+    def _write_POSCAR(self, fp, precision = 14):
+        """
+        Write Structure object to an opened file object.
+        """
+        self._write_header(fp, precision)
+        # Write the atomic positions
+        fp.write(format_rows(self._coords, precision))
+
+    def _write_header(self, fp, precision = 14):
+        """
+        Write the lines of the POSCAR file before the atomic positions.
+        """
+        lines = [self.comment, '1.0']
+        fp.write('\n'.join(lines) + '\n')
+        # Write the lattice vectors
+        fp.write(format_rows(self._lattice, precision))
+        # Write the atomic species (if known), the atom numbers and the coordination type
+        lines = [' '.join([element for element in self._elements if element is not None]),
+                 ' '.join([str(num) for num in np.bincount(self._species, minlength = len(self._elements))]),
+                 self.coord_type]
+        if None in self._elements:
+            lines = lines[1:]
+        fp.write('\n'.join(lines) + '\n')
 
     def direct_to_cart(self):
         """
         Change the style of the coordinations to cartesian.
         """
         if self.coord_type == 'direct':
+            cart = self.cartesian_coords()
+            self._swap_converted(cart)
             self.coord_type = 'cart'
-            for atom in self.atoms:
-                atom['coords'] = np.matmul(atom['coords'], self.lattice)
 
     def cart_to_direct(self):
         """
         Change the style of the coordinations to direct.
         """
         if self.coord_type == 'cart':
+            frac = self.direct_coords()
+            self._swap_converted(frac)
             self.coord_type = 'direct'
-            for atom in self.atoms:
-                atom['coords'] = np.matmul(atom['coords'], np.linalg.inv(self.lattice))
+
+    def _swap_converted(self, coords):
+        """
+        Make the converted coordinates the coordinates of the structure, keeping
+        the old ones as the converted cache of the other coord_type.
+        """
+        old = self._coords
+        self._coords = coords
+        self._converted = (self._lattice.tobytes(), coords.copy(), _readonly(old))
+
+    def _converted_coords(self, matrix):
+        """
+        Return the coordinates converted to the other coord_type by matrix, cached
+        with a copy of the coordinates they were converted from, so that in-place
+        changes of the lattice or of the coordinates are detected, as in
+        Structure._lattice_cache().
+        """
+        key = self._lattice.tobytes()
+        converted = self._converted
+        if converted is None or converted[0] != key or not np.array_equal(converted[1], self._coords):
+            converted = self._converted = (key, self._coords.copy(), _readonly(np.matmul(self._coords, matrix)))
+        return converted[2]
 
     @property
     def elements(self):
@@ -206,7 +769,7 @@ class Structure(object):
         Returns:
             elements (list): [ele0, ele1, ...], each element represented by a string.
         """
-        return [atom['element'] for atom in self.atoms]
+        return list(self._elements)
 
     @property
     def atom_nums(self):
@@ -215,7 +778,7 @@ class Structure(object):
         Returns:
             (int)
         """
-        return sum([atom['num'] for atom in self.atoms])
+        return len(self._coords)
 
     @property
     def atoms_flat(self):
@@ -223,12 +786,8 @@ class Structure(object):
         Return a flat list representation of all the atoms and their coords
         e.g., [{'element': 'Al', 'coord': np.array([0, 0, 0])}]
         """
-        atoms_coords = []
-        for element in self.atoms:
-            for coord in element['coords']:
-                temp = {'element': element['element'], 'coord': coord}
-                atoms_coords.append(temp)
-        return atoms_coords
+        return [{'element': self._elements[k], 'coord': coord}
+                for k, coord in zip(self._species, self._coords)]
 
     @property
     def reciprocal_lattice(self):
@@ -237,7 +796,7 @@ class Structure(object):
         Returns:
             3 * 3 np.array: [b1, b2, b3]
         """
-        return np.transpose(np.linalg.inv(self.lattice))
+        return self._cached('reciprocal', lambda: np.transpose(np.linalg.inv(self._lattice)))
 
     @property
     def lattice_constants(self):
@@ -247,33 +806,101 @@ class Structure(object):
         Returns:
             [a, b, c, d, alpha, beta, gamma], angle unit: degree
         """
-        [a, b, c] = np.linalg.norm(self.lattice, axis = 1)
-        def angle(v1, v2):
-            division = np.dot(v1, v2)/(np.linalg.norm(v1) * np.linalg.norm(v2))
-            return np.degrees(np.arccos(division))
-        alpha = angle(self.lattice[1], self.lattice[2])
-        beta = angle(self.lattice[2], self.lattice[0])
-        gamma = angle(self.lattice[0], self.lattice[1])
-        return [a, b, c, alpha, beta, gamma]
+        def compute():
+            [a, b, c] = np.linalg.norm(self.lattice, axis = 1)
+            def angle(v1, v2):
+                division = np.dot(v1, v2)/(np.linalg.norm(v1) * np.linalg.norm(v2))
+                return np.degrees(np.arccos(division))
+            alpha = angle(self.lattice[1], self.lattice[2])
+            beta = angle(self.lattice[2], self.lattice[0])
+            gamma = angle(self.lattice[0], self.lattice[1])
+            return (a, b, c, alpha, beta, gamma)
+        return list(self._cached('constants', compute))
 
     def cartesian_coords(self):
         """
         List the cartesian coordinations of all the atoms.
         Returns:
-            self.atom_nums * 3 np.array
+            self.atom_nums * 3 np.array, a new array
         """
-        coords = np.concatenate([atom['coords'] for atom in self.atoms], axis = 0)
         if self.coord_type == 'direct':
-            return np.matmul(coords, self.lattice)
-        return coords
+            return self._converted_coords(self._lattice).copy()
+        return self._coords.copy()
 
     def direct_coords(self):
         """
         List the fractional coordinations of all the atoms.
         Returns:
-            self.atom_nums * 3 np.array
+            self.atom_nums * 3 np.array, a new array
         """
-        coords = np.concatenate([atom['coords'] for atom in self.atoms], axis = 0)
         if self.coord_type == 'cart':
-            return np.matmul(coords, np.linalg.inv(self.lattice))
-        return coords
\ No newline at end of file
+            return self._converted_coords(self.inv_lattice).copy()
+        return self._coords.copy()
+
+    def _min_image(self, diff, dtype, vectors = True):
+        """
+        Reduce the fractional displacements diff (... * 3) to their minimum images,
+        see min_image().
+        """
+        return min_image(diff, self._lattice, self.plane_spacings,
+                         self._cached('orthogonal', lambda: is_orthogonal(self._lattice)), dtype, vectors)
+
+    def _indexed_coords(self, idx, dtype):
+        """
+        Return the direct coordinates of the atoms idx (all the atoms if None).
+        """
+        frac = self.direct_coords()
+        return (frac if idx is None else frac[idx]).astype(dtype)
+
+    def min_image_vectors(self, i = None, j = None, dtype = np.float64):
+        """
+        Get the minimum-image displacement vectors r_j - r_i between two sets of
+        atoms, correct for skewed cells: the images searched are bounded by the
+        lattice plane spacings.
+        Args:
+            i, j (list(int) or np.array or None): atom indices, default to all the atoms
+            dtype: np.float64 or np.float32, default to np.float64
+        Returns:
+            len(i) * len(j) * 3 np.array: cartesian displacement vectors (Ang)
+        """
+        fi = self._indexed_coords(i, dtype)
+        fj = self._indexed_coords(j, dtype)
+        return self._min_image(fj[None, :, :] - fi[:, None, :], dtype)
+
+    def iter_distances(self, i = None, j = None, block = 256, dtype = np.float64):
+        """
+        Compute the minimum-image distance matrix block by block of rows, the
+        memory used being proportional to block * len(j).
+        Args:
+            i, j (list(int) or np.array or None): atom indices, default to all the atoms
+            block (int): number of rows per block, default to 256
+            dtype: np.float64 or np.float32, default to np.float64
+        Yields:
+            (start, distances): the rows start, start + 1, ... of the matrix,
+                block * len(j) np.array (Ang)
+        """
+        fi = self._indexed_coords(i, dtype)
+        fj = self._indexed_coords(j, dtype)
+        for start in range(0, len(fi), block):
+            diff = fj[None, :, :] - fi[start : start + block, None, :]
+            yield start, self._min_image(diff, dtype, vectors = False)
+
+    def distance_matrix(self, i = None, j = None, block = 256, dtype = np.float64, out = None):
+        """
+        Get the minimum-image distances between two sets of atoms, evaluated block
+        by block, see Structure.iter_distances().
+        Args:
+            i, j (list(int) or np.array or None): atom indices, default to all the atoms
+            block (int): number of rows per block, default to 256
+            dtype: np.float64 or np.float32, default to np.float64
+            out (np.array): the output array, e.g., memory-mapped, default to a new array
+        Returns:
+            len(i) * len(j) np.array: distances (Ang)
+        """
+        ni = self.atom_nums if i is None else len(i)
+        nj = self.atom_nums if j is None else len(j)
+        if out is None:
+            out = np.empty((ni, nj), dtype = dtype)
+        for start, distances in self.iter_distances(i, j, block, dtype):
+            out[start : start + len(distances)] = distances
+        return out
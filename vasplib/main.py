@@ -3,14 +3,32 @@
 # Copyright (c) Vasplib development team (Zhuang's Lab at ASU).
 
 import sys
+import json
 import argparse
 from vasplib import info
-from vasplib.analysis.electronic import get_electronic_property
 
 """
 A master script with many tools for driving vasplib.
+The analysis modules are imported by the sub-commands, so "vasplib -h" stays fast.
 """
 
+def get_electronic_property(args):
+    """
+    Run analyze_electronic_property() with the parameters in the json file args.PARAM.
+    """
+    with open(args.PARAM, 'r') as fp:
+        params = json.load(fp)
+    params['fname'] = args.FILE
+    from vasplib.analysis.electronic import analyze_electronic_property
+    analyze_electronic_property(params)
+
+def get_chgdiff(args):
+    """
+    Run analyze_chgdiff() with the command line arguments.
+    """
+    from vasplib.analysis.volumetric import analyze_chgdiff
+    analyze_chgdiff(args)
+
 def main():
     info()
     print("Description\n------------")
@@ -31,6 +49,20 @@ def main():
                              help="path to vasprun.xml file")
     parser_electronic.set_defaults(func=get_electronic_property)
 
+    # linear combination of volumetric files, e.g., charge density difference
+    parser_chgdiff = subparsers.add_parser(
+        "chgdiff", help="Linear combination of CHGCAR-like files with the same grid, "
+        "by default FILE1 - FILE2 - FILE3 - ...")
+    parser_chgdiff.add_argument('FILES', type=str, nargs='+',
+                             help="paths to CHGCAR files")
+    parser_chgdiff.add_argument('-c', '--coeffs', type=float, nargs='+', default=None,
+                             help="coefficients of the files, default to 1 -1 -1 ...")
+    parser_chgdiff.add_argument('-o', '--out', type=str, default='CHGDIFF',
+                             help="output file, default to CHGDIFF")
+    parser_chgdiff.add_argument('-n', '--nplanes', type=int, default=2,
+                             help="number of xy planes read at a time, default to 2")
+    parser_chgdiff.set_defaults(func=get_chgdiff)
+
     args = parser.parse_args()
 
     try:
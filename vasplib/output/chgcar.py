@@ -1,5 +1,9 @@
 import os
+import copy
+import itertools
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from vasplib.core.structure import Structure
 
 class Chgcar(object):
@@ -13,9 +17,35 @@ class Chgcar(object):
             filename (str): the filename of the file to read, default to 'CHGCAR'
         """
         self.filename = filename
-        self.NX, self.NY, self.NZ = self.getNxyz() # store the number of grid points
-        self.struct = Structure()
-        self.struct.from_POSCAR(filename) # store the structure
+        # store the structure, the number of grid points, the byte position of the
+        # volumetric data and the number of values per line
+        self.struct, [self.NX, self.NY, self.NZ], self._offset, self._vpl = self._read_header()
+        self._pyramid = [] # block-averaged previews, see Chgcar.pyramid()
+
+    def _read_header(self):
+        """
+        Read the structure block and the grid dimensions at the head of the file,
+        without touching the volumetric data.
+        Returns:
+            (struct, [NX, NY, NZ], offset, vpl):
+                struct (Structure)
+                offset (int): the byte position where the volumetric data starts
+                vpl (int): the number of values per line of the volumetric data
+        """
+        lines = []
+        with open(self.filename, 'rb') as fp:
+            line = fp.readline()
+            while line.strip() != b'':
+                lines.append(line.decode())
+                line = fp.readline()
+            NX, NY, NZ = [int(x) for x in fp.readline().split()]
+            offset = fp.tell()
+            vpl = len(fp.readline().split())
+
+        struct = Structure()
+        struct.from_lines(lines, self.filename)
+
+        return struct, [NX, NY, NZ], offset, vpl
 
     def getNxyz(self):
         """
@@ -33,50 +63,280 @@ class Chgcar(object):
 
         return [NX, NY, NZ]
 
-    def getChargeDensity(self):
+    def getChargeDensity(self, nprocs = 1):
         """
         Get the charge density in real space.
+        Args:
+            nprocs (int): number of processes parsing the file, default to 1
         Returns:
             density (NZ * NY * NX np.ndarray):
                 unit: electron / grid
         """
+        density = self.read_data(nprocs)
+        density /= self.NX * self.NY * self.NZ
+        return density
+
+    def read_data(self, nprocs = 1, memmap = None):
+        """
+        Read the raw values of the volumetric data, i.e., the charge density times
+        the cell volume for CHGCAR, or the potential for LOCPOT.
+        With nprocs > 1, the numeric block is split into byte ranges aligned to the
+        lines, which are parsed by a process pool writing straight into a shared
+        output array. This requires the lines to have a fixed width, as written
+        by VASP; otherwise the data is parsed serially.
+        Args:
+            nprocs (int): number of processes, default to 1
+            memmap (str): if given, the data is written to a np.memmap backed by
+                this file instead of the memory, for grids larger than the RAM
+        Returns:
+            data (NZ * NY * NX np.array)
+        """
         NX, NY, NZ = self.NX, self.NY, self.NZ
-        with open(self.filename, 'r') as fp:
-            line = fp.readline()
-            while line.strip() != '':
-                line = fp.readline()
-            line = fp.readline()
+        size = NX * NY * NZ
+        nlines = -(-size // self._vpl)
+        ranges = self._line_ranges(nlines, 4 * nprocs) if nprocs > 1 else None
 
-            density = []
-            line = fp.readline()
-            while line and 'a' not in line:
-                density.extend([float(x) for x in line.split()])
-                line = fp.readline()
+        if ranges is None:
+            with open(self.filename, 'rb') as fp:
+                fp.seek(self._offset)
+                values = np.array(b''.join(itertools.islice(fp, nlines)).split(), dtype = float)
+            if values.size < size:
+                raise ValueError("Unexpected end of volumetric data in {}".format(self.filename))
+            if memmap is None:
+                return values[:size].reshape(NZ, NY, NX)
+            data = np.memmap(memmap, dtype = float, mode = 'w+', shape = (size,))
+            data[:] = values[:size]
+            return data.reshape(NZ, NY, NX)
 
-        density = np.reshape(density, (NZ, NY, NX)) / (NX * NY * NZ)
-        return density
+        if memmap is not None:
+            data = np.memmap(memmap, dtype = float, mode = 'w+', shape = (size,))
+            data.flush()
+            self._parse_parallel(ranges, ('memmap', memmap), size, nprocs)
+            return data.reshape(NZ, NY, NX)
+
+        shm = shared_memory.SharedMemory(create = True, size = size * 8)
+        try:
+            self._parse_parallel(ranges, ('shm', shm.name), size, nprocs)
+            data = np.ndarray((size,), dtype = float, buffer = shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+        return data.reshape(NZ, NY, NX)
+
+    def _parse_parallel(self, ranges, out, size, nprocs):
+        """
+        Parse the byte ranges in a process pool, see _parse_range().
+        """
+        tasks = [(self.filename, start, stop, out, first, count, size)
+                 for start, stop, first, count in ranges]
+        with ProcessPoolExecutor(nprocs) as pool:
+            for _ in pool.map(_parse_range, *zip(*tasks)):
+                pass
+
+    def _line_ranges(self, nlines, nchunks):
+        """
+        Split the lines of the volumetric data into byte ranges, using the fixed
+        width of the lines.
+        Returns:
+            list of tuples (start, stop, first, count): the byte range [start, stop)
+                holding the values first, ..., first + count - 1,
+            or None if the lines don't have a fixed width.
+        """
+        size = self.NX * self.NY * self.NZ
+        nchunks = max(1, min(nchunks, nlines))
+        with open(self.filename, 'rb') as fp:
+            fp.seek(self._offset)
+            width = len(fp.readline())
+            # the last line may hold less values
+            fp.seek(self._offset + (nlines - 1) * width)
+            end = fp.tell() + len(fp.readline())
+            bounds = [nlines * k // nchunks for k in range(nchunks + 1)]
+            # every range must end exactly at the end of a line
+            for line in bounds[1:-1] + [nlines - 1]:
+                fp.seek(self._offset + line * width - 1)
+                if fp.read(1) != b'\n':
+                    return None
+
+        ranges = []
+        for l0, l1 in zip(bounds[:-1], bounds[1:]):
+            start = self._offset + l0 * width
+            stop = self._offset + l1 * width if l1 < nlines else end
+            first = l0 * self._vpl
+            ranges.append((start, stop, first, min(l1 * self._vpl, size) - first))
+        return ranges
+
+    def iter_planes(self, nplanes = 1):
+        """
+        Stream the volumetric data chunk by chunk along z, without loading the
+        whole grid into memory.
+        Args:
+            nplanes (int): the number of xy planes in each chunk, default to 1
+        Yields:
+            (iz, block):
+                iz (int): the index of the first plane in the chunk
+                block (n * NY * NX np.array): the raw values in the file, i.e.,
+                    the charge density times the cell volume
+        """
+        NX, NY, NZ = self.NX, self.NY, self.NZ
+        size_plane = NX * NY
+        with open(self.filename, 'rb') as fp:
+            fp.seek(self._offset)
+            carry = np.empty(0)
+            for iz in range(0, NZ, nplanes):
+                n = min(nplanes, NZ - iz)
+                # number of lines holding the values still missing in this chunk
+                nlines = -(-(n * size_plane - carry.size) // self._vpl)
+                lines = list(itertools.islice(fp, nlines))
+                if len(lines) < nlines:
+                    raise ValueError("Unexpected end of volumetric data in {}".format(self.filename))
+                values = np.concatenate((carry, np.array(b''.join(lines).split(), dtype = float)))
+                yield iz, values[:n * size_plane].reshape(n, NY, NX)
+                carry = values[n * size_plane:]
+
+    def build_pyramid(self, levels = 3, keep_full = False):
+        """
+        Build block-averaged previews of the charge density, coarsened by 2, 4,
+        ..., 2**levels along each axis, in a single streaming pass over the file.
+        Axes not divisible by the factor end with a smaller block.
+        Args:
+            levels (int): number of coarse levels, default to 3 (2x, 4x and 8x)
+            keep_full (bool): whether to also assemble the full-resolution density
+                during the same pass, default to False
+        Returns:
+            (pyramid, density):
+                pyramid (list of np.array): pyramid[i] is coarsened by 2**(i + 1),
+                    unit: electron / grid of the full resolution
+                density (NZ * NY * NX np.array or None): the full-resolution
+                    density if keep_full else None
+        """
+        NX, NY, NZ = self.NX, self.NY, self.NZ
+        ngrid = NX * NY * NZ
+        factors = [2**(i + 1) for i in range(levels)]
+        pyramid = [np.empty((-(-NZ // f), -(-NY // f), -(-NX // f))) for f in factors]
+        density = np.empty((NZ, NY, NX)) if keep_full else None
+
+        # chunks of 2**levels planes never split a block of any level
+        for iz, block in self.iter_planes(2**levels):
+            block = block / ngrid
+            if keep_full:
+                density[iz : iz + block.shape[0]] = block
+            for f, coarse in zip(factors, pyramid):
+                mean = _block_mean(_block_mean(_block_mean(block, f, 0), f, 1), f, 2)
+                coarse[iz // f : iz // f + mean.shape[0]] = mean
+
+        return pyramid, density
+
+    def pyramid(self, levels = 3, cache = True):
+        """
+        Get the block-averaged previews of the charge density, see build_pyramid().
+        The previews are kept in memory and, if cache is True, in the file
+        filename + '.pyramid.npz' next to the data, which is reused as long as the
+        data file is unchanged.
+        Args:
+            levels (int): number of coarse levels, default to 3 (2x, 4x and 8x)
+            cache (bool): whether to read/write the cache file, default to True
+        Returns:
+            pyramid (list of np.array): pyramid[i] is coarsened by 2**(i + 1)
+        """
+        if len(self._pyramid) >= levels:
+            return self._pyramid[:levels]
 
-    def mean2D(self, plane, label = 'distance'):
+        stat = os.stat(self.filename)
+        stamp = np.array([stat.st_size, stat.st_mtime])
+        cache_file = self.filename + '.pyramid.npz'
+        if cache and os.path.isfile(cache_file):
+            with np.load(cache_file) as npz:
+                if np.array_equal(npz['stamp'], stamp) and len(npz.files) - 1 >= levels:
+                    self._pyramid = [npz['level{}'.format(i + 1)] for i in range(len(npz.files) - 1)]
+                    return self._pyramid[:levels]
+
+        self._pyramid, _ = self.build_pyramid(levels)
+        if cache:
+            arrays = {'level{}'.format(i + 1): coarse for i, coarse in enumerate(self._pyramid)}
+            try:
+                with open(cache_file, 'wb') as fp:
+                    np.savez(fp, stamp = stamp, **arrays)
+            except OSError:
+                pass # read-only directory, keep the previews in memory only
+        return self._pyramid
+
+    def density_level(self, level = 0):
+        """
+        Get the charge density at a level of the preview pyramid.
+        Args:
+            level (int): 0 for the full resolution, i for the preview coarsened
+                by 2**i, default to 0
+        Returns:
+            density (np.array): unit: electron / grid of the full resolution
+        """
+        if level == 0:
+            return self.getChargeDensity()
+        return self.pyramid(level)[level - 1]
+
+    def level_grid(self, level = 0):
+        """
+        Return the positions of the points of a pyramid level along x, y and z,
+        and the number of full-resolution points averaged into each. A coarse point
+        is the mean of a block of 2**level points, the last block being smaller if
+        the axis is not divisible by 2**level, so it sits at the center of its own
+        block.
+        Args:
+            level (int): level of the preview pyramid, default to 0
+        Returns:
+            (positions, sizes):
+                positions (list of 3 np.array): direct coordinates along x, y and z
+                sizes (list of 3 np.array, int): the block sizes along x, y and z
+        """
+        f = 2**level
+        positions, sizes = [], []
+        for N in (self.NX, self.NY, self.NZ):
+            start = np.arange(0, N, f)
+            stop = np.minimum(start + f, N)
+            positions.append((start + stop - 1)/2/N)
+            sizes.append(stop - start)
+        return positions, sizes
+
+    def sampler(self, level = 0, order = 1):
+        """
+        Create a GridSampler of the charge density at a level of the preview pyramid,
+        for slices and line profiles, see vasplib.analysis.slicing.
+        Args:
+            level (int): level of the preview pyramid, default to 0
+            order (int): order of the interpolation, default to 1
+        Returns:
+            GridSampler
+        """
+        from vasplib.analysis.slicing import GridSampler
+        positions = self.level_grid(level)[0] if level > 0 else None
+        return GridSampler(self.density_level(level), self.struct.lattice, order,
+                positions = positions)
+
+    def mean2D(self, plane, label = 'distance', level = 0):
         """
         Return the average density along a certain plane. 
+        The 'distance' labels are lengths along the lattice vectors, which are
+        distorted for non-orthogonal cells; use
+        vasplib.analysis.slicing.GridSampler for slices on arbitrary planes.
         Args:
             plane (str): 'xy' or 'xz' or 'yz'
             label (str): "grid" or "distance"
+            level (int): level of the preview pyramid, 0 for the full resolution,
+                see Chgcar.pyramid(), default to 0
         Returns:
             X (n2 * 1 np.array), Y (n1 * 1 np.array), Z (n1 * n2 np.array)
                 unit: electron / grid
         """
-        # No. of grids
-        NX, NY, NZ = self.NX, self.NY, self.NZ
         # Get the density along the axis on each grid point
-        density = self.getChargeDensity()
+        density = self.density_level(level)
+        # positions and sizes of the (coarse) grid points, x, y and z
+        (x, y, z), sizes = self.level_grid(level)
 
         if plane == 'xy':
-            Z = np.mean(density, axis = 0)
+            Z = _level_mean(density, sizes, [0])
         elif plane == 'xz':
-            Z = np.mean(density, axis = 1)
+            Z = _level_mean(density, sizes, [1])
         elif plane == 'yz':
-            Z = np.mean(density, axis = 2)
+            Z = _level_mean(density, sizes, [2])
 
         num_row, num_col = Z.shape
         if label == 'grid':
@@ -85,18 +345,18 @@ class Chgcar(object):
         elif label == 'distance':
             a, b, c = self.struct.lattice_constants[:3]
             if plane == 'xz':
-                X = np.arange(num_col)/NX*a
-                Y = np.arange(num_row)/NZ*c
+                X = x*a
+                Y = z*c
             elif plane == 'xy':
-                X = np.arange(num_col)/NX*a
-                Y = np.arange(num_row)/NY*b
+                X = x*a
+                Y = y*b
             elif plane == 'yz':
-                X = np.arange(num_col)/NY*b
-                Y = np.arange(num_row)/NZ*c
+                X = y*b
+                Y = z*c
 
         return X, Y, Z
 
-    def mean1D(self, axis, label):
+    def mean1D(self, axis, label, level = 0):
         """
         Return the average density along a certain x. The cross-section plane to
         sum is normal to the direction "axis".
@@ -105,6 +365,8 @@ class Chgcar(object):
             label (str): "grid" or "distance" or "atom"
                 When label == 'atom', we only support charge density along
                 x axis.
+            level (int): level of the preview pyramid, 0 for the full resolution,
+                see Chgcar.pyramid(), default to 0
         Returns:
             result (n * 2 np.array)
         """
@@ -113,27 +375,32 @@ class Chgcar(object):
         NX, NY, NZ = self.NX, self.NY, self.NZ
 
         # Get the density along the axis on each grid point
-        density = self.getChargeDensity()
+        density = self.density_level(level)
+        # positions and sizes of the (coarse) grid points, x, y and z
+        (x, y, z), sizes = self.level_grid(level)
 
         if axis == 'x':
-            density_1D = np.mean(density, (0, 1))
+            density_1D = _level_mean(density, sizes, [0, 1])
         elif axis == 'y':
-            density_1D = np.mean(density, (0, 2))
+            density_1D = _level_mean(density, sizes, [0, 2])
         elif axis == 'z':
-            density_1D = np.mean(density, (1, 2))
+            density_1D = _level_mean(density, sizes, [1, 2])
 
         if label == 'grid':
             independent = np.arange(density_1D.size)
         elif label == 'distance':
             a, b, c = self.struct.lattice_constants[:3]
             if axis == 'x':
-                independent = np.arange(density_1D.size)/NX*a
+                independent = x*a
             elif axis == 'y':
-                independent = np.arange(density_1D.size)/NY*b
+                independent = y*b
             elif axis == 'z':
-                independent = np.arange(density_1D.size)/NZ*c
+                independent = z*c
         elif label == 'atom':
             if axis == 'x':
+                # spread the coarse points over their blocks, so the sums below
+                # run over the full-resolution grid
+                density_1D = np.repeat(density_1D, sizes[0])
                 # direct x coordinates of all the atoms
                 atom_x = self.struct.direct_coords()[:, 0]
                 # fractional x length between neighboring grid points
@@ -189,3 +456,128 @@ class Chgcar(object):
         result = np.transpose(result)
 
         return result
+
+
+def _level_mean(density, sizes, axes):
+    """
+    Average a level of the preview pyramid over the axes (of the array, z first),
+    each point weighted by the size of its block, see Chgcar.level_grid().
+    """
+    for axis in sorted(axes, reverse = True):
+        density = np.average(density, axis = axis, weights = sizes[2 - axis])
+    return density
+
+def _block_mean(a, f, axis):
+    """
+    Average the array a over consecutive blocks of f elements along axis, the last
+    block may be smaller.
+    """
+    n = a.shape[axis]
+    starts = np.arange(0, n, f)
+    counts = np.diff(np.append(starts, n))
+    shape = [1] * a.ndim
+    shape[axis] = -1
+    return np.add.reduceat(a, starts, axis = axis) / counts.reshape(shape)
+
+def _parse_range(filename, start, stop, out, first, count, size):
+    """
+    Parse the values in the byte range [start, stop) of the file and write them to
+    the output array described by out, at the position first.
+    Executed by the worker processes of Chgcar.read_data().
+    """
+    with open(filename, 'rb') as fp:
+        fp.seek(start)
+        values = np.array(fp.read(stop - start).split(), dtype = float)
+    if values.size < count:
+        raise ValueError("Unexpected end of volumetric data in {}".format(filename))
+
+    if out[0] == 'memmap':
+        data = np.memmap(out[1], dtype = float, mode = 'r+', shape = (size,))
+        data[first : first + count] = values[:count]
+        data.flush()
+    else:
+        shm = shared_memory.SharedMemory(name = out[1])
+        data = np.ndarray((size,), dtype = float, buffer = shm.buf)
+        data[first : first + count] = values[:count]
+        del data
+        shm.close()
+
+class ChgcarWriter(object):
+    """
+    Class for writing CHGCAR files incrementally, chunk by chunk.
+    Only the first volumetric block is written, without the augmentation
+    occupancies.
+    >>> with ChgcarWriter('CHGDIFF', chg.struct, [chg.NX, chg.NY, chg.NZ]) as writer:
+    ...     for iz, block in chg.iter_planes():
+    ...         writer.write(block)
+    """
+    def __init__(self, filename, struct, grid, vpl = 5):
+        """
+        Create a CHGCAR file and write its header.
+        Args:
+            filename (str): the filename to write to
+            struct (Structure): the structure written in the header
+            grid (list(int)): [NX, NY, NZ], the grid dimensions
+            vpl (int): the number of values per line, default to 5
+        """
+        self.filename = filename
+        self.NX, self.NY, self.NZ = grid
+        self.vpl = vpl
+        self._count = 0 # number of values written
+        self._carry = np.empty(0) # values waiting for a complete line
+        self._fp = open(filename, 'w')
+
+        # VASP always writes the header in direct coordinates
+        header = copy.deepcopy(struct)
+        header.cart_to_direct()
+        header.write_POSCAR(self._fp)
+        self._fp.write('\n{:5d}{:5d}{:5d}\n'.format(self.NX, self.NY, self.NZ))
+
+    def write(self, values):
+        """
+        Append the values to the volumetric data, x running fastest.
+        Args:
+            values (np.array): raw values, i.e., charge density times the cell volume
+        """
+        values = np.concatenate((self._carry, np.ravel(values)))
+        if self._count + values.size > self.NX * self.NY * self.NZ:
+            raise ValueError("Too many values written to {}".format(self.filename))
+        nfull = values.size // self.vpl * self.vpl
+        self._write_lines(values[:nfull])
+        self._count += nfull
+        self._carry = values[nfull:]
+
+    def _write_lines(self, values):
+        """
+        Format the values as lines of self.vpl values in one call.
+        """
+        if values.size == 0:
+            return
+        nrows, rest = divmod(values.size, self.vpl)
+        fmt = (' %18.11E' * self.vpl + '\n') * nrows + ' %18.11E' * rest
+        if rest:
+            fmt += '\n'
+        self._fp.write(fmt % tuple(values.tolist()))
+
+    def close(self):
+        """
+        Flush the remaining values and close the file.
+        """
+        if self._fp.closed:
+            return
+        self._write_lines(self._carry)
+        self._count += self._carry.size
+        self._carry = np.empty(0)
+        self._fp.close()
+        if self._count != self.NX * self.NY * self.NZ:
+            raise ValueError("{} values written to {}, expected {}".format(
+                self._count, self.filename, self.NX * self.NY * self.NZ))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._fp.close()
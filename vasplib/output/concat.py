@@ -0,0 +1,308 @@
+import os
+import numpy as np
+from vasplib.output.xdatcar import Xdatcar
+from vasplib.output.outcar import Outcar
+from vasplib.output.trajectory import MAGIC, Trajectory
+from vasplib.core.batch import StructureBatch
+
+"""
+Class for reading the segments of a restarted molecular dynamics run as one trajectory.
+"""
+
+class _OutcarFrames(object):
+    """
+    The ionic steps of an OUTCAR file with the reading methods of Xdatcar. The
+    file is parsed by Outcar.ionic_steps() on the first access to the frames.
+    """
+    coord_type = 'cart'
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._outcar = Outcar(filename)
+        struct = self._outcar.initial_struct()
+        self._comment = os.path.basename(filename)
+        self._atoms = [{'element': atom['element'], 'num': atom['num']} for atom in struct.atoms]
+        self._steps = None
+
+    def _load(self):
+        if self._steps is None:
+            self._steps = self._outcar.ionic_steps()[:2]
+        return self._steps
+
+    @property
+    def _lattice_changed(self):
+        lattices = self._load()[0]
+        return not np.all(lattices == lattices[0])
+
+    @property
+    def lattice(self):
+        return self._load()[0][0].copy()
+
+    def __len__(self):
+        return len(self._load()[1])
+
+    def trajectory(self, start = 0, stop = None, step = 1, dtype = float, memmap = None):
+        lattices, positions = self._load()
+        key = slice(start, stop, step)
+        coords = positions[key].astype(dtype)
+        if memmap is not None:
+            out = np.lib.format.open_memmap(memmap, mode = 'w+', dtype = dtype, shape = coords.shape)
+            out[:] = coords
+            coords = out
+        return coords, lattices[key].astype(dtype) if self._lattice_changed else None
+
+    def structure(self, n):
+        if not 1 <= n <= len(self):
+            raise IndexError("Ionic step {} not found in {}.".format(n, self.filename))
+        return self._outcar.struct_ionic_step(n)
+
+def open_segment(filename):
+    """
+    Open a trajectory file by its type: a binary trajectory file (Trajectory), an
+    OUTCAR file (if 'OUTCAR' is in the filename), or an XDATCAR file (Xdatcar).
+    Args:
+        filename (str)
+    Returns:
+        Trajectory, Xdatcar or an object with the same reading methods
+    """
+    with open(filename, 'rb') as fp:
+        if fp.read(len(MAGIC)) == MAGIC:
+            return Trajectory(filename)
+    if 'OUTCAR' in os.path.basename(filename):
+        return _OutcarFrames(filename)
+    return Xdatcar(filename)
+
+def _is_direct(seg):
+    """
+    Return whether the coordinates read from a segment are direct.
+    """
+    if isinstance(seg, Xdatcar):
+        return seg._read_frames([0])[2]
+    return seg.coord_type == 'direct'
+
+class ConcatTrajectory(object):
+    """
+    Stitch the trajectory files of the segments of a restarted run, e.g.,
+    run1/XDATCAR, run2/XDATCAR, ..., into one sequence of frames, with the
+    reading methods of Xdatcar.
+    The segments are opened lazily, in order, only as far as needed to locate a
+    frame, and the frames are read from the segment holding them only. The frame
+    indexes of the XDATCAR segments are saved next to the files (see
+    Xdatcar.build_index()), so the later runs locate any frame at once.
+    The coordinates read in bulk (trajectory(), batch()) are direct, whatever
+    the type of the coordinates in each segment.
+    >>> traj = ConcatTrajectory(['run1/XDATCAR', 'run2/XDATCAR'], drop_first = True)
+    >>> struct = traj[123456]
+    """
+    coord_type = 'direct'
+
+    def __init__(self, filenames, drop_first = False):
+        """
+        Create a ConcatTrajectory object.
+        Args:
+            filenames (list(str)): the files of the segments, in order
+            drop_first (bool): drop the first frame of every segment but the first
+                one, when it repeats the last frame of the previous segment,
+                default to False
+        """
+        if not filenames:
+            raise ValueError("At least one segment is required.")
+        self.filenames = list(filenames)
+        self.drop_first = drop_first
+        self._segments = [None] * len(self.filenames)
+        self._bounds = [0] # global index of the first frame of each counted segment
+        first = self.segment(0)
+        self._comment = first._comment
+        self._atoms = [{'element': atom['element'], 'num': atom['num']} for atom in first._atoms]
+
+    def segment(self, i):
+        """
+        Return the segment i, opened on the first call and checked against the
+        species and the numbers of atoms of the first segment.
+        Args:
+            i (int): 0-based index of the segment
+        Returns:
+            Xdatcar, Trajectory or an object with the same reading methods
+        """
+        if self._segments[i] is None:
+            seg = open_segment(self.filenames[i])
+            if i > 0:
+                atoms = [(atom['element'], atom['num']) for atom in seg._atoms]
+                if atoms != [(atom['element'], atom['num']) for atom in self._atoms]:
+                    raise ValueError("Atoms {} of {} don't match atoms {} of {}.".format(
+                        atoms, self.filenames[i], [(atom['element'], atom['num']) for atom in self._atoms],
+                        self.filenames[0]))
+            self._segments[i] = seg
+        return self._segments[i]
+
+    def _skip(self, i):
+        """
+        Return the number of frames dropped at the start of the segment i.
+        """
+        return 1 if self.drop_first and i > 0 else 0
+
+    def _count(self, frame = None):
+        """
+        Count the frames of the segments in order until the frame is reached,
+        or all of them if frame is None.
+        """
+        while len(self._bounds) <= len(self.filenames):
+            if frame is not None and frame < self._bounds[-1]:
+                break
+            i = len(self._bounds) - 1
+            nframes = max(0, len(self.segment(i)) - self._skip(i))
+            self._bounds.append(self._bounds[-1] + nframes)
+
+    def __len__(self):
+        """
+        Return the total number of frames, counting every segment.
+        """
+        self._count()
+        return self._bounds[-1]
+
+    @property
+    def natoms(self):
+        """
+        Return the total number of atoms in each frame.
+        """
+        return sum([atom['num'] for atom in self._atoms])
+
+    @property
+    def lattice(self):
+        """
+        Return the lattice vectors of the first segment.
+        Returns:
+            3 * 3 np.array
+        """
+        return self.segment(0).lattice
+
+    def locate(self, frame):
+        """
+        Find the segment holding a frame.
+        Args:
+            frame (int): 0-based global frame index, negative counting from the end
+        Returns:
+            (i, n): the segment index and the 0-based frame index in its file
+        """
+        if frame < 0:
+            frame += len(self)
+        self._count(frame)
+        if not 0 <= frame < self._bounds[-1]:
+            raise IndexError("Frame index {} out of range.".format(frame))
+        i = int(np.searchsorted(self._bounds, frame, side = 'right')) - 1
+        return i, frame - self._bounds[i] + self._skip(i)
+
+    def __getitem__(self, key):
+        """
+        Get the frames by python indexing, e.g., traj[0], traj[-1], traj[::10]
+        Args:
+            key (int or slice): 0-based frame index or slice
+        Returns:
+            Structure or list(Structure)
+        """
+        if isinstance(key, slice):
+            return [self[k] for k in range(*key.indices(len(self)))]
+        i, n = self.locate(key)
+        return self.segment(i).structure(n + 1)
+
+    def structure(self, n):
+        """
+        Read the structure of the frame n.
+        Args:
+            n (int): the frame number, n >= 1.
+        """
+        if n < 1:
+            raise IndexError("Frame {} not found.".format(n))
+        return self[n - 1]
+
+    def _runs(self, start, stop, step):
+        """
+        Split the global frame range into one local range per segment, counting
+        only the segments needed by a forward range with a non-negative stop.
+        Returns:
+            list of (i, local start, local stop, number of frames)
+        """
+        step = 1 if step is None else step
+        if step > 0 and stop is not None and stop >= 0 and (start is None or start >= 0):
+            self._count(stop - 1)
+            frames = np.arange(start or 0, min(stop, self._bounds[-1]), step)
+        else:
+            frames = np.arange(*slice(start, stop, step).indices(len(self)))
+        segs = np.searchsorted(self._bounds, frames, side = 'right') - 1
+        runs = []
+        for group in np.split(np.arange(len(frames)), np.flatnonzero(np.diff(segs)) + 1):
+            if len(group) == 0:
+                continue
+            i = int(segs[group[0]])
+            local = frames[group] - self._bounds[i] + self._skip(i)
+            last = int(local[-1]) + (1 if step > 0 else -1)
+            runs.append((i, int(local[0]), last if last >= 0 else None, len(group)))
+        return runs
+
+    def trajectory(self, start = 0, stop = None, step = 1, dtype = float, memmap = None):
+        """
+        Load the coordinates of the frames start, start + step, ... < stop,
+        as Xdatcar.trajectory(), reading each segment in bulk.
+        Args:
+            start, stop, step (int): 0-based frame range, as range(start, stop, step)
+            dtype: data type of the arrays, default to float
+            memmap (str): if given, the coordinates are written to a .npy file mapped
+                in memory (np.lib.format.open_memmap)
+        Returns:
+            (coords, lattices):
+                coords (nframes * natoms * 3 np.array): direct coordinates, the
+                    cartesian ones of a segment are converted with its lattices
+                lattices (nframes * 3 * 3 np.array or None): lattice vectors of each
+                    frame, or None if every segment has the lattice of the first one
+        """
+        runs = self._runs(start, stop, step)
+        shape = (sum(run[3] for run in runs), self.natoms, 3)
+        if memmap is None:
+            coords = np.empty(shape, dtype = dtype)
+        else:
+            coords = np.lib.format.open_memmap(memmap, mode = 'w+', dtype = dtype, shape = shape)
+        lattices = np.empty((shape[0], 3, 3), dtype = dtype)
+        fixed = True
+        k = 0
+        step = 1 if step is None else step
+        for i, first, last, nframes in runs:
+            seg = self.segment(i)
+            coords[k : k + nframes], lat = seg.trajectory(first, last, step, dtype)
+            if lat is None:
+                lattices[k : k + nframes] = seg.lattice
+                fixed = fixed and np.allclose(seg.lattice, self.lattice)
+            else:
+                lattices[k : k + nframes] = lat
+                fixed = False
+            if not _is_direct(seg):
+                coords[k : k + nframes] = np.matmul(coords[k : k + nframes],
+                                                    np.linalg.inv(lattices[k : k + nframes].astype(float)))
+            k += nframes
+        return coords, None if fixed else lattices
+
+    def batch(self, start = 0, stop = None, step = 1, dtype = float, memmap = None):
+        """
+        Load the frames start, start + step, ... < stop of all the segments into a
+        StructureBatch.
+        Args:
+            start, stop, step, dtype, memmap: see ConcatTrajectory.trajectory()
+        Returns:
+            StructureBatch
+        """
+        return StructureBatch.from_reader(self, start, stop, step, dtype, memmap)
+
+    def iter_frames(self, start = 0, stop = None, step = 1, chunk = 100):
+        """
+        Iterate over the frames start, start + step, ... < stop, opening the
+        segments one after another.
+        Yields:
+            Structure
+        """
+        for i, first, last, nframes in self._runs(start, stop, step):
+            seg = self.segment(i)
+            if hasattr(seg, 'iter_frames'):
+                for struct in seg.iter_frames(first, last, step, chunk):
+                    yield struct
+            else:
+                for n in range(*slice(first, last, step).indices(len(seg))):
+                    yield seg.structure(n + 1)
@@ -2,6 +2,7 @@ import os
 import numpy as np
 from vasplib.core import periodic_table as pt
 from vasplib.core.structure import Structure
+from vasplib.core.batch import StructureBatch
 import subprocess as sp
 
 class Outcar(object):
@@ -15,6 +16,8 @@ class Outcar(object):
         efermi
         nkpts
         nbands
+        potim
+        nblock
     Methods:
         exists()
         get_species()
@@ -87,6 +90,30 @@ class Outcar(object):
                 if 'NBANDS' in line:
                     return int(line.split()[14])
 
+    @property
+    def potim(self):
+        """
+        Get the time step of the ionic motion.
+        Returns:
+            POTIM (float): unit: fs for molecular dynamics
+        """
+        with open(self.filename, 'r') as fp:
+            for line in fp:
+                if 'POTIM' in line:
+                    return float(line.split()[2])
+
+    @property
+    def nblock(self):
+        """
+        Get the number of ionic steps between two configurations written to XDATCAR.
+        Returns:
+            NBLOCK (int)
+        """
+        with open(self.filename, 'r') as fp:
+            for line in fp:
+                if 'NBLOCK' in line:
+                    return int(line.split()[2].rstrip(';'))
+
     def get_species(self):
         """
         Get the species in the OUTCAR file.
@@ -143,15 +170,7 @@ class Outcar(object):
                 position[-1] = position[-1].rstrip('-')
                 position = [float(x) for x in position[:]]
                 positions.append(position)
-        atoms = []
-        num_current = 0
-        for element, num in zip(species, nums):
-            atom = {'element': element, 'num': num, 
-                    'coords': np.array(positions[num_current : num_current + num])}
-            num_current += num
-            atoms.append(atom)
-
-        struct = Structure(coord_type = coord_type, lattice = lattice, atoms = atoms)
+        struct = Structure.from_arrays(lattice, positions, species, nums, coord_type)
 
         return struct
         
@@ -192,17 +211,55 @@ class Outcar(object):
                 v = [float(x) for x in line.split()[:3]]
                 positions.append(v)
 
-        atoms = []
-        num_current = 0
-        for element, num in zip(species, nums):
-            atom = {'element': element, 'num': num, 
-                    'coords': np.array(positions[num_current : num_current + num])}
-            num_current += num
-            atoms.append(atom)
-
-        struct = Structure(coord_type = coord_type, lattice = np.array(lattice), atoms = atoms)
+        struct = Structure.from_arrays(np.array(lattice), positions, species, nums, coord_type)
         return struct
 
+    def ionic_steps(self):
+        """
+        Read the lattice vectors, positions, forces and energies of all the ionic
+        steps in one pass over the file, e.g., for converting a trajectory.
+        Returns:
+            (lattices, positions, forces, energies):
+                lattices (nsteps * 3 * 3 np.array): unit: Ang
+                positions (nsteps * natoms * 3 np.array): cartesian coordinates (Ang)
+                forces (nsteps * natoms * 3 np.array): TOTAL-FORCE, unit: eV/Ang
+                energies (nsteps np.array): energy(sigma->0), unit: eV
+        """
+        lattices, blocks, energies = [], [], []
+        lattice = None
+        total_num = None
+        with open(self.filename, 'rb') as fp:
+            for line in fp:
+                if total_num is None and b'ions per type' in line:
+                    total_num = sum(int(x) for x in line.split(b'=')[1].split())
+                elif b'direct lattice vectors' in line:
+                    lattice = b' '.join(b' '.join(fp.readline().split()[:3]) for i in range(3))
+                elif b'POSITION' in line and b'TOTAL-FORCE' in line:
+                    fp.readline()
+                    blocks.append(b''.join(fp.readline() for i in range(total_num)))
+                    lattices.append(lattice)
+                elif b'energy(sigma->0)' in line and len(energies) < len(blocks):
+                    # the first energy after the positions is the one of the ionic step
+                    energies.append(float(line.split(b'=')[-1]))
+
+        nsteps = len(energies) # the last step may be unfinished
+        lattices = np.array(b' '.join(lattices[:nsteps]).split(), dtype = float).reshape(nsteps, 3, 3)
+        data = np.array(b' '.join(blocks[:nsteps]).split(), dtype = float).reshape(nsteps, total_num, 6)
+        return lattices, data[:, :, :3], data[:, :, 3:], np.array(energies)
+
+    def batch(self):
+        """
+        Read all the ionic steps into a StructureBatch of cartesian coordinates,
+        with the forces and the energies in StructureBatch.data, see Outcar.ionic_steps().
+        Returns:
+            StructureBatch
+        """
+        lattices, positions, forces, energies = self.ionic_steps()
+        nums_bash_out = sp.run(["grep", "ions per type", self.filename], capture_output=True, text=True).stdout
+        nums = [int(x) for x in nums_bash_out.split('=')[1].split()]
+        return StructureBatch(lattices, positions, self.get_species(), nums, 'cart',
+                              os.path.basename(self.filename), {'forces': forces, 'energies': energies})
+
     def energy_ionic_step(self, i):
         """
         Get the energy of the ionic step i, found by keyword "energy(sigma->0)".
@@ -0,0 +1,355 @@
+import os
+import json
+import zlib
+import numpy as np
+from vasplib.core.structure import Structure
+from vasplib.core.batch import StructureBatch
+
+"""
+Binary trajectory container of vasplib, for analyzing long trajectories without
+parsing the text files again.
+File layout:
+    8 bytes         magic b'VLTRAJ01'
+    8 bytes         byte offset of the JSON header, little-endian uint64
+    ...             data chunks of chunk frames each, zlib compressed or raw
+    JSON header     comment, atoms, coord_type, lattice, nframes and the byte
+                    ranges of the chunks of every array
+"""
+
+MAGIC = b'VLTRAJ01'
+
+class TrajectoryWriter(object):
+    """
+    Write a trajectory file frame batch by frame batch.
+    >>> with TrajectoryWriter('traj.vlt', atoms, lattice = lattice) as writer:
+    ...     writer.write(coords)
+    """
+    def __init__(self, filename, atoms, coord_type = 'direct', comment = '', lattice = None,
+            dtype = np.float64, compress = 0, chunk = 100):
+        """
+        Open a trajectory file for writing.
+        Args:
+            filename (str): the filename to write to
+            atoms (list of dict): {'element': (str), 'num': (int)} in the order of the atoms
+            coord_type (str): 'direct' or 'cart', the type of the coordinates written
+            comment (str): the comment line
+            lattice (3 * 3 np.array): the fixed lattice, or None if the lattice of
+                every frame is written
+            dtype: np.float32 or np.float64, the data type of the coordinates and
+                forces, default to np.float64. Lattices and energies are always float64.
+            compress (int): zlib compression level from 1 to 9, 0 for none, default to 0
+            chunk (int): number of frames per chunk, the unit of reading, default to 100
+        """
+        self.filename = filename
+        self.dtype = np.dtype(dtype)
+        self.compress = compress
+        self.chunk = chunk
+        self._header = {'version': 1, 'comment': comment,
+                        'atoms': [{'element': atom['element'], 'num': int(atom['num'])} for atom in atoms],
+                        'coord_type': coord_type, 'nframes': 0, 'chunk': chunk, 'compress': compress,
+                        'lattice': None if lattice is None else np.asarray(lattice, dtype = float).tolist(),
+                        'arrays': {}}
+        self._buffers = None # {name: list of np.array} of the frames not written yet
+        self._fp = open(filename, 'wb')
+        self._fp.write(MAGIC + np.zeros(1, dtype = '<u8').tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, coords, lattices = None, forces = None, energies = None):
+        """
+        Append a batch of frames. The arrays given by the first call are the ones
+        stored in the file, and the following calls must give the same arrays.
+        Args:
+            coords (nframes * natoms * 3 np.array): coordinates of coord_type
+            lattices (nframes * 3 * 3 np.array): lattice of each frame
+            forces (nframes * natoms * 3 np.array): unit: eV/Ang
+            energies (nframes np.array): unit: eV
+        """
+        arrays = {'coords': coords, 'lattices': lattices, 'forces': forces, 'energies': energies}
+        arrays = {name: np.asarray(value) for name, value in arrays.items() if value is not None}
+        if self._buffers is None:
+            if 'lattices' not in arrays and self._header['lattice'] is None:
+                raise ValueError("Either a fixed lattice or the lattices of the frames are required.")
+            self._buffers = {name: [] for name in arrays}
+            for name, value in arrays.items():
+                dtype = self.dtype if name in ('coords', 'forces') else np.dtype('<f8')
+                self._header['arrays'][name] = {'dtype': dtype.newbyteorder('<').str,
+                        'shape': list(value.shape[1:]), 'chunks': []}
+        if sorted(arrays) != sorted(self._buffers):
+            raise ValueError("Arrays {} don't match the arrays {} of the file.".format(
+                sorted(arrays), sorted(self._buffers)))
+
+        nframes = len(arrays['coords'])
+        for name, value in arrays.items():
+            if len(value) != nframes:
+                raise ValueError("Number of frames of '{}' doesn't match.".format(name))
+            self._buffers[name].append(value)
+        self._header['nframes'] += nframes
+        buffered = sum(len(value) for value in self._buffers['coords'])
+        if buffered >= self.chunk:
+            self._flush(buffered - buffered % self.chunk)
+
+    def _flush(self, nframes):
+        """
+        Write the first nframes buffered frames as chunks of self.chunk frames.
+        """
+        for name, buffer in self._buffers.items():
+            info = self._header['arrays'][name]
+            data = np.concatenate(buffer).astype(info['dtype'])
+            for i in range(0, nframes, self.chunk):
+                raw = np.ascontiguousarray(data[i : min(i + self.chunk, nframes)]).tobytes()
+                if self.compress:
+                    raw = zlib.compress(raw, self.compress)
+                info['chunks'].append([self._fp.tell(), len(raw)])
+                self._fp.write(raw)
+            self._buffers[name] = [data[nframes:]]
+
+    def close(self):
+        """
+        Write the remaining frames and the header, and close the file.
+        """
+        if self._fp.closed:
+            return
+        if self._buffers is not None:
+            buffered = sum(len(value) for value in self._buffers['coords'])
+            if buffered:
+                self._flush(buffered)
+        offset = self._fp.tell()
+        self._fp.write(json.dumps(self._header).encode())
+        self._fp.seek(len(MAGIC))
+        self._fp.write(np.array([offset], dtype = '<u8').tobytes())
+        self._fp.close()
+
+class Trajectory(object):
+    """
+    Class for reading the binary trajectory files written by TrajectoryWriter,
+    with the reading methods of Xdatcar.
+    >>> traj = convert_xdatcar(Xdatcar('XDATCAR'), 'XDATCAR.vlt')
+    >>> coords, lattices = traj.trajectory(1000, 2000)
+    """
+    def __init__(self, filename):
+        """
+        Open a trajectory file and read its header.
+        Args:
+            filename (str): the name of the file
+        """
+        self.filename = filename
+        with open(filename, 'rb') as fp:
+            head = fp.read(16)
+            if head[:8] != MAGIC:
+                raise ValueError("{} is not a vasplib trajectory file.".format(filename))
+            fp.seek(int(np.frombuffer(head[8:], dtype = '<u8')[0]))
+            self._header = json.loads(fp.read().decode())
+        self._comment = self._header['comment']
+        self._atoms = self._header['atoms']
+        self.coord_type = self._header['coord_type']
+        self._lattice_changed = 'lattices' in self._header['arrays']
+
+    def __len__(self):
+        """
+        Return the number of frames in the file.
+        """
+        return self._header['nframes']
+
+    @property
+    def natoms(self):
+        """
+        Return the total number of atoms in each frame.
+        """
+        return sum([atom['num'] for atom in self._atoms])
+
+    @property
+    def arrays(self):
+        """
+        Return the names of the arrays stored, among 'coords', 'lattices',
+        'forces' and 'energies'.
+        """
+        return list(self._header['arrays'])
+
+    @property
+    def lattice(self):
+        """
+        Return the fixed lattice, or the lattice of the first frame.
+        Returns:
+            3 * 3 np.array
+        """
+        if self._lattice_changed:
+            return self.read('lattices', 0, 1)[0]
+        return np.array(self._header['lattice'])
+
+    def read(self, name, start = 0, stop = None, step = 1, dtype = None, out = None, frames = None):
+        """
+        Read the frames start, start + step, ... < stop of an array, decoding only
+        the chunks holding them.
+        Args:
+            name (str): 'coords', 'lattices', 'forces' or 'energies'
+            start, stop, step (int): 0-based frame range, as range(start, stop, step)
+            dtype: data type of the output, default to the stored type
+            out (np.array): the output array, e.g., memory-mapped, default to a new array
+            frames (list(int)): the 0-based frame indices, in place of start, stop
+                and step, default to None
+        Returns:
+            np.array: nframes * shape of a frame
+        """
+        if name not in self._header['arrays']:
+            raise ValueError("Array '{}' is not stored in {}.".format(name, self.filename))
+        info = self._header['arrays'][name]
+        chunk = self._header['chunk']
+        if frames is None:
+            frames = np.arange(*slice(start, stop, step).indices(len(self)))
+        frames = np.asarray(frames, dtype = int)
+        if out is None:
+            out = np.empty((len(frames),) + tuple(info['shape']),
+                           dtype = info['dtype'] if dtype is None else dtype)
+
+        ids = frames // chunk
+        with open(self.filename, 'rb') as fp:
+            for k in np.unique(ids):
+                offset, nbytes = info['chunks'][k]
+                fp.seek(offset)
+                raw = fp.read(nbytes)
+                if self._header['compress']:
+                    raw = zlib.decompress(raw)
+                data = np.frombuffer(raw, dtype = info['dtype']).reshape([-1] + info['shape'])
+                selected = ids == k
+                out[selected] = data[frames[selected] - k * chunk]
+        return out
+
+    def trajectory(self, start = 0, stop = None, step = 1, dtype = float, memmap = None):
+        """
+        Load the coordinates of the frames start, start + step, ... < stop,
+        as Xdatcar.trajectory().
+        Args:
+            start, stop, step (int): 0-based frame range, as range(start, stop, step)
+            dtype: data type of the arrays, default to float
+            memmap (str): if given, the coordinates are written to a .npy file mapped
+                in memory (np.lib.format.open_memmap)
+        Returns:
+            (coords, lattices):
+                coords (nframes * natoms * 3 np.array): coordinates of coord_type
+                lattices (nframes * 3 * 3 np.array or None): lattice vectors of each
+                    frame if the lattice changes, otherwise None (see Trajectory.lattice)
+        """
+        out = None
+        if memmap is not None:
+            nframes = len(range(*slice(start, stop, step).indices(len(self))))
+            out = np.lib.format.open_memmap(memmap, mode = 'w+', dtype = dtype,
+                                            shape = (nframes, self.natoms, 3))
+        coords = self.read('coords', start, stop, step, dtype, out)
+        lattices = self.read('lattices', start, stop, step, dtype) if self._lattice_changed else None
+        return coords, lattices
+
+    def batch(self, start = 0, stop = None, step = 1, dtype = float, memmap = None):
+        """
+        Load the frames start, start + step, ... < stop into a StructureBatch,
+        with the forces and the energies in StructureBatch.data if stored.
+        Args:
+            start, stop, step, dtype, memmap: see Trajectory.trajectory()
+        Returns:
+            StructureBatch
+        """
+        batch = StructureBatch.from_reader(self, start, stop, step, dtype, memmap)
+        for name in ('forces', 'energies'):
+            if name in self._header['arrays']:
+                batch.data[name] = self.read(name, start, stop, step)
+        return batch
+
+    def __getitem__(self, key):
+        """
+        Get the frames by python indexing, e.g., traj[0], traj[-1], traj[::10]
+        Args:
+            key (int or slice): 0-based frame index or slice
+        Returns:
+            Structure or list(Structure)
+        """
+        if isinstance(key, slice):
+            return list(self._iter_indices(range(*key.indices(len(self)))))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("Frame index {} out of range.".format(key))
+        return self.structure(key + 1)
+
+    def iter_frames(self, start = 0, stop = None, step = 1, chunk = 100):
+        """
+        Iterate over the frames start, start + step, ... < stop, reading chunk
+        frames at a time.
+        Yields:
+            Structure
+        """
+        return self._iter_indices(range(*slice(start, stop, step).indices(len(self))), chunk)
+
+    def _iter_indices(self, frames, chunk = 100):
+        """
+        Iterate over the frames of the 0-based indices, reading chunk frames at a time.
+        """
+        for i in range(0, len(frames), chunk):
+            batch = frames[i : i + chunk]
+            coords = self.read('coords', dtype = float, frames = batch)
+            if self._lattice_changed:
+                lattices = self.read('lattices', dtype = float, frames = batch)
+            else:
+                lattices = np.broadcast_to(self.lattice, (len(coords), 3, 3))
+            for xyz, lattice in zip(coords, lattices):
+                yield self._to_structure(xyz, lattice)
+
+    def _to_structure(self, coords, lattice):
+        """
+        Build a Structure object of a frame.
+        """
+        return Structure.from_arrays(np.array(lattice), coords, [atom['element'] for atom in self._atoms],
+                [atom['num'] for atom in self._atoms], self.coord_type, self._comment)
+
+    def structure(self, n):
+        """
+        Read the structure of the frame n.
+        Args:
+            n (int): the frame number, n >= 1.
+        """
+        if not 1 <= n <= len(self):
+            raise IndexError("Frame {} not found in {}.".format(n, self.filename))
+        coords, lattices = self.trajectory(n - 1, n)
+        return self._to_structure(coords[0], self.lattice if lattices is None else lattices[0])
+
+def convert_xdatcar(xdatcar, filename, dtype = np.float64, compress = 0, chunk = 100):
+    """
+    Convert an Xdatcar trajectory to a binary trajectory file, parsing chunk
+    frames at a time.
+    Args:
+        xdatcar (Xdatcar): the trajectory
+        filename (str): the filename to write to
+        dtype, compress, chunk: see TrajectoryWriter
+    Returns:
+        Trajectory: the written file
+    """
+    _, _, direct = xdatcar._read_frames([0])
+    lattice = None if xdatcar._lattice_changed else xdatcar.lattice
+    with TrajectoryWriter(filename, xdatcar._atoms, 'direct' if direct else 'cart', xdatcar._comment,
+            lattice, dtype, compress, chunk) as writer:
+        for i in range(0, len(xdatcar), chunk):
+            coords, lattices, direct = xdatcar._read_frames(list(range(i, min(i + chunk, len(xdatcar)))))
+            writer.write(coords, lattices if xdatcar._lattice_changed else None)
+    return Trajectory(filename)
+
+def convert_outcar(outcar, filename, dtype = np.float64, compress = 0, chunk = 100):
+    """
+    Convert the ionic steps of an Outcar to a binary trajectory file, with the
+    cartesian positions, forces and energies.
+    Args:
+        outcar (Outcar): the OUTCAR file
+        filename (str): the filename to write to
+        dtype, compress, chunk: see TrajectoryWriter
+    Returns:
+        Trajectory: the written file
+    """
+    lattices, positions, forces, energies = outcar.ionic_steps()
+    atoms = outcar.initial_struct().atoms
+    fixed = len(lattices) > 0 and np.all(lattices == lattices[0])
+    with TrajectoryWriter(filename, atoms, 'cart', os.path.basename(outcar.filename),
+            lattices[0] if fixed else None, dtype, compress, chunk) as writer:
+        writer.write(positions, None if fixed else lattices, forces, energies)
+    return Trajectory(filename)
@@ -3,6 +3,7 @@
 import xml.etree.ElementTree as ET
 import numpy as np
 import os
+from vasplib.core.batch import StructureBatch
 
 """
 The structure of "vasprun.xml" file generated by VASP:
@@ -490,3 +491,36 @@ class VaspXml(object):
                     energy = electronic_band[nkpts + k_idx][band_idx + 1]
                     band = np.append(band, [[kx, energy, occupancy]], axis = 0)
         return band
+
+    def batch(self):
+        """
+        Read the structures of all the ionic steps ("calculation" nodes) into a
+        StructureBatch of direct coordinates, with the forces and the energies
+        (e_0_energy, i.e., energy(sigma->0)) in StructureBatch.data.
+        Returns:
+            StructureBatch
+        """
+        species = self.get_species()
+        elements, nums = [], []
+        for symbol in species:
+            if elements and elements[-1] == symbol:
+                nums[-1] += 1
+            else:
+                elements.append(symbol)
+                nums.append(1)
+
+        def varray(node, name):
+            text = ' '.join(v.text for v in node.findall("./varray[@name='{}']/v".format(name)))
+            return np.array(text.split(), dtype = float)
+
+        calculations = self.root.findall('calculation')
+        lattices = np.array([varray(c.find('structure/crystal'), 'basis') for c in calculations])
+        coords = np.array([varray(c.find('structure'), 'positions') for c in calculations])
+        data = {}
+        if all(c.find("varray[@name='forces']") is not None for c in calculations):
+            data['forces'] = np.array([varray(c, 'forces') for c in calculations]).reshape(
+                    len(calculations), -1, 3)
+        data['energies'] = np.array([float(c.find("energy/i[@name='e_0_energy']").text)
+                                     for c in calculations])
+        return StructureBatch(lattices.reshape(-1, 3, 3), coords.reshape(len(calculations), -1, 3),
+                              elements, nums, 'direct', os.path.basename(self.filename), data)
@@ -1,6 +1,7 @@
 import os
 import numpy as np
 from vasplib.core.structure import Structure
+from vasplib.core.batch import StructureBatch
 
 class Xdatcar(object):
     """
@@ -14,6 +15,14 @@ class Xdatcar(object):
         """
         self.filename = filename
         self._comment, self._exist_symbols, self._atoms, self._lattice_changed = self._initialize()
+        self._offsets = None # byte offsets of the frames, see Xdatcar.build_index()
+        self._end = None # byte position at the end of the last frame
+
+        # scaling factor and lattice vectors of the first frame
+        with open(self.filename, 'r') as fp:
+            lines = [fp.readline() for i in range(5)]
+        self._factor = float(lines[1])
+        self._lattice = np.array(' '.join(lines[2:5]).split(), dtype = float).reshape(3, 3) * self._factor
 
     def _initialize(self):
         """
@@ -41,65 +50,293 @@ class Xdatcar(object):
             for num in line.split():
                 _atoms.append({'element': None, 'num': int(num)})
 
+        # skip the configuration line and the coordinates of the first frame
+        fp.readline()
         for atom in _atoms:
             for i in range(atom['num']):
                 fp.readline()
-        for i in range(3):
-            line_next_block = fp.readline()
+        line_next_block = fp.readline()
         _lattice_changed = line_next_block.strip() == _comment
 
         fp.close()
 
         return _comment, _exist_symbols, _atoms, _lattice_changed
         
-    def structure(self, n):
+    @property
+    def offsets(self):
         """
-        Read a structure from XDATCAR file, configuration no. = n
+        The byte offset of every frame in the file, built lazily by build_index().
+        Returns:
+            offsets (nframes np.array, int)
+        """
+        if self._offsets is None:
+            self._offsets = self.build_index()
+        return self._offsets
+
+    def build_index(self, save = True, chunk_size = 2**24):
+        """
+        Find the byte offset of every frame in one pass over the file. The frames
+        have a fixed number of lines, so the offsets are read from the positions
+        of the newlines, located chunk by chunk with numpy.
+        The index is saved to and reused from filename + '.idx.npz' as long as the
+        file is unchanged. An incomplete last frame (running job) is not indexed.
         Args:
-            filename (str): the filename of XDATCAR file.
-            n (int): the configuration number, n >= 1.
+            save (bool): whether to read/write the sidecar index file, default to True
+            chunk_size (int): number of bytes scanned at a time, default to 16 MB
+        Returns:
+            offsets (nframes np.array, int): the frame starts at the comment line
+                if the lattice changes, at the configuration line otherwise
         """
-        res = Structure(comment = self._comment, atoms = self._atoms)
+        stat = os.stat(self.filename)
+        stamp = np.array([stat.st_size, stat.st_mtime])
+        index_file = self.filename + '.idx.npz'
+        if save and os.path.isfile(index_file):
+            with np.load(index_file) as npz:
+                if np.array_equal(npz['stamp'], stamp):
+                    return npz['offsets']
+
         N = sum([atom['num'] for atom in self._atoms])
+        num_header = 7 if self._exist_symbols else 6
         if self._lattice_changed:
-            if self._exist_symbols:
-                line_lattice = (N + 8) * (n - 1) + 2
-                line_coord_type = (N + 8) * (n - 1) + 7
-            else:
-                line_lattice = (N + 7) * (n - 1) + 2
-                line_coord_type = (N + 7) * (n - 1) + 6
+            first, stride = 0, num_header + 1 + N
         else:
-            line_lattice = 2
-            if self._exist_symbols:
-                line_coord_type = 7 + (N + 1) * (n - 1)
-            else:
-                line_coord_type = 6 + (N + 1) * (n - 1)
-        line_factor = line_lattice - 1
+            first, stride = num_header, N + 1
 
-        with open(self.filename, 'r') as fp:
-            for i in range(line_factor):
-                fp.readline()
-            factor = float(fp.readline().strip())
-            a = [float(num) for num in fp.readline().strip().split()]
-            b = [float(num) for num in fp.readline().strip().split()]
-            c = [float(num) for num in fp.readline().strip().split()]
-            res.lattice = np.array([a, b, c]) * factor
+        # starts[i] is the byte offset of the line i + 1
+        starts = []
+        num_lines = 0
+        with open(self.filename, 'rb') as fp:
+            pos = 0
+            last = b''
+            buf = fp.read(chunk_size)
+            while buf:
+                newlines = np.flatnonzero(np.frombuffer(buf, dtype = np.uint8) == 10)
+                line_no = num_lines + 1 + np.arange(newlines.size)
+                selected = (line_no >= first) & ((line_no - first) % stride == 0)
+                starts.append(pos + newlines[selected] + 1)
+                num_lines += newlines.size
+                pos += len(buf)
+                last = buf[-1:]
+                buf = fp.read(chunk_size)
+        if last and last != b'\n':
+            num_lines += 1 # the last line has no EOL
 
-            for i in range(line_coord_type - line_lattice - 3):
-                fp.readline()
-            str_coord_type = fp.readline().strip()
-            res.coord_type = 'direct' if str_coord_type[0] in 'dD' else 'cart'
-
-            for atom in res.atoms:
-                atom['coords'] = []
-                for i in range(atom['num']):
-                    line = fp.readline().strip()
-                    atom['coords'].append([float(num) for num in line.split()[:3]])
-            if res.coord_type == 'cart':
-                for atom in res.atoms:
-                    atom['coords'] = np.array(atom['coords']) * factor
+        offsets = np.concatenate([[0]] + starts) if first == 0 else np.concatenate(starts)
+        nframes = max(0, (num_lines - first) // stride)
+        offsets = offsets[:nframes].astype(np.int64)
+
+        if save:
+            try:
+                with open(index_file, 'wb') as fp:
+                    np.savez(fp, stamp = stamp, offsets = offsets)
+            except OSError:
+                pass # read-only directory, keep the index in memory only
+        return offsets
+
+    def __len__(self):
+        """
+        Return the number of complete frames in the file.
+        """
+        return len(self.offsets)
+
+    def __getitem__(self, key):
+        """
+        Get the frames by python indexing, e.g., xdatcar[0], xdatcar[-1], xdatcar[::10]
+        Args:
+            key (int or slice): 0-based frame index or slice
+        Returns:
+            Structure or list(Structure)
+        """
+        if isinstance(key, slice):
+            return [self.structure(i + 1) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("Frame index {} out of range.".format(key))
+        return self.structure(key + 1)
+
+    @property
+    def natoms(self):
+        """
+        Return the total number of atoms in each frame.
+        """
+        return sum([atom['num'] for atom in self._atoms])
+
+    def _frame_end(self):
+        """
+        Return the byte position at the end of the last complete frame.
+        """
+        if self._end is None:
+            num_lines = self.natoms + 1
+            if self._lattice_changed:
+                num_lines += 7 if self._exist_symbols else 6
+            with open(self.filename, 'rb') as fp:
+                fp.seek(self.offsets[-1])
+                for i in range(num_lines):
+                    fp.readline()
+                self._end = fp.tell()
+        return self._end
+
+    def _frame_bounds(self, frames):
+        """
+        Return the byte positions of the start and of the end of the frames.
+        Args:
+            frames (list(int)): 0-based indices of the frames
+        Returns:
+            (starts, ends) (list(int))
+        """
+        offsets = self.offsets
+        starts = [offsets[k] for k in frames]
+        ends = [offsets[k + 1] if k + 1 < len(offsets) else self._frame_end() for k in frames]
+        return starts, ends
+
+    def _read_frames(self, frames, dtype = float):
+        """
+        Parse the frames in bulk, see Xdatcar._parse_frames().
+        Args:
+            frames (list(int)): 0-based indices of the frames
+            dtype: data type of the output arrays, default to float
+        Returns:
+            (coords, lattices, direct):
+                coords (nframes * natoms * 3 np.array)
+                lattices (nframes * 3 * 3 np.array), scaled by the factor
+                direct (bool): whether the coordinates are direct
+        """
+        starts, ends = self._frame_bounds(frames)
+        return self._parse_frames(starts, ends, dtype)
+
+    def _parse_frames(self, starts, ends, dtype = float):
+        """
+        Parse the frames between the byte positions starts and ends in bulk: the
+        bytes of consecutive frames are read at once, and their coordinate blocks
+        are tokenized by a single split. Only the header of the file is needed,
+        not the frame index, so worker processes can parse the frames located by
+        the parent.
+        Args:
+            starts, ends (list(int)): byte positions of the frames, see
+                Xdatcar._frame_bounds()
+            dtype: data type of the output arrays, default to float
+        Returns:
+            (coords, lattices, direct): see Xdatcar._read_frames()
+        """
+        N = self.natoms
+        num_header = (7 if self._exist_symbols else 6) if self._lattice_changed else 0
+
+        blocks = []
+        with open(self.filename, 'rb') as fp:
+            if len(starts) > 1 and all(start == end for start, end in zip(starts[1:], ends[:-1])):
+                # consecutive frames, one read for all of them
+                base = starts[0]
+                fp.seek(base)
+                buf = fp.read(ends[-1] - base)
+                for start, end in zip(starts, ends):
+                    blocks.append(buf[start - base : end - base])
             else:
-                for atom in res.atoms:
-                    atom['coords'] = np.array(atom['coords'])
+                for start, end in zip(starts, ends):
+                    fp.seek(start)
+                    blocks.append(fp.read(end - start))
+
+        if self._lattice_changed:
+            lattices = np.empty((len(blocks), 3, 3), dtype = dtype)
+        else:
+            lattices = np.broadcast_to(self.lattice.astype(dtype), (len(blocks), 3, 3))
+        # the scale factor of each frame, in its own header if the lattice changes
+        factors = np.full(len(blocks), self._factor)
+        coord_blocks = []
+        for i, block in enumerate(blocks):
+            lines = block.split(b'\n', num_header + 1)
+            if self._lattice_changed:
+                factors[i] = float(lines[1])
+                lattices[i] = np.array(b' '.join(lines[2:5]).split(), dtype = float).reshape(3, 3) * factors[i]
+            coord_blocks.append(lines[-1])
+        direct = lines[num_header].strip()[:1] in (b'd', b'D')
+
+        coords = np.array(b' '.join(coord_blocks).split(), dtype = dtype).reshape(len(blocks), N, 3)
+        if not direct:
+            coords *= factors[:, None, None].astype(dtype)
+        return coords, lattices, direct
+
+    @property
+    def lattice(self):
+        """
+        Return the lattice vectors of the first frame, scaled by the factor.
+        Returns:
+            3 * 3 np.array
+        """
+        return self._lattice.copy()
+
+    def trajectory(self, start = 0, stop = None, step = 1, dtype = float, memmap = None, chunk = 1000):
+        """
+        Load the coordinates of the frames start, start + step, ... < stop into a
+        preallocated array, parsing chunk frames at a time.
+        Args:
+            start, stop, step (int): 0-based frame range, as range(start, stop, step)
+            dtype: data type of the arrays, default to float
+            memmap (str): if given, the coordinates are written to a .npy file mapped
+                in memory (np.lib.format.open_memmap), for trajectories larger than RAM
+            chunk (int): number of frames parsed at a time, default to 1000
+        Returns:
+            (coords, lattices):
+                coords (nframes * natoms * 3 np.array): direct or cartesian
+                    coordinates, as in the file
+                lattices (nframes * 3 * 3 np.array or None): lattice vectors of each
+                    frame if the lattice changes, otherwise None (see Xdatcar.lattice)
+        """
+        frames = range(*slice(start, stop, step).indices(len(self)))
+        shape = (len(frames), self.natoms, 3)
+        if memmap is None:
+            coords = np.empty(shape, dtype = dtype)
+        else:
+            coords = np.lib.format.open_memmap(memmap, mode = 'w+', dtype = dtype, shape = shape)
+        lattices = np.empty((len(frames), 3, 3), dtype = dtype) if self._lattice_changed else None
+
+        for i in range(0, len(frames), chunk):
+            batch = list(frames[i : i + chunk])
+            coords[i : i + len(batch)], lat, direct = self._read_frames(batch, dtype)
+            if self._lattice_changed:
+                lattices[i : i + len(batch)] = lat
+        return coords, lattices
 
-        return res
+    def batch(self, start = 0, stop = None, step = 1, dtype = float, memmap = None):
+        """
+        Load the frames start, start + step, ... < stop into a StructureBatch.
+        Args:
+            start, stop, step, dtype, memmap: see Xdatcar.trajectory()
+        Returns:
+            StructureBatch
+        """
+        return StructureBatch.from_reader(self, start, stop, step, dtype, memmap)
+
+    def iter_frames(self, start = 0, stop = None, step = 1, chunk = 100):
+        """
+        Iterate over the frames start, start + step, ... < stop in one forward
+        pass, parsing chunk frames at a time.
+        Args:
+            start, stop, step (int): 0-based frame range, as range(start, stop, step)
+            chunk (int): number of frames parsed at a time, default to 100
+        Yields:
+            Structure
+        """
+        frames = range(*slice(start, stop, step).indices(len(self)))
+        for i in range(0, len(frames), chunk):
+            coords, lattices, direct = self._read_frames(list(frames[i : i + chunk]))
+            for xyz, lattice in zip(coords, lattices):
+                yield self._to_structure(xyz, lattice, direct)
+
+    def _to_structure(self, coords, lattice, direct):
+        """
+        Build a Structure object of a frame.
+        """
+        return Structure.from_arrays(np.array(lattice), coords, [atom['element'] for atom in self._atoms],
+                [atom['num'] for atom in self._atoms], 'direct' if direct else 'cart', self._comment)
+
+    def structure(self, n):
+        """
+        Read a structure from XDATCAR file, configuration no. = n
+        Args:
+            n (int): the configuration number, n >= 1.
+        """
+        if not 1 <= n <= len(self):
+            raise IndexError("Configuration {} not found in {}.".format(n, self.filename))
+        coords, lattices, direct = self._read_frames([n - 1])
+        return self._to_structure(coords[0], lattices[0], direct)
@@ -1,7 +1,11 @@
 # coding: utf-8
 
+import os
 import math
+import collections
+from concurrent.futures import ThreadPoolExecutor
 from vasplib.analysis.build import Build
+from vasplib.core.structure import parse_poscar, format_rows
 import numpy as np
 import itertools
 
@@ -44,13 +48,14 @@ class Poscar(Build):
                     {'element': (str),
                     'num': (int),
                     'coords': (num*3 np.array, float),
-                    'selective': (num * 3 bool list)}
+                    'selective': (num * 3 bool np.array)}
             selective (bool): whether "Selective Dynamics" are switched on
         """
         Build.__init__(self, comment, lattice, atoms, coord_type)
         self.factor = factor
         self.lattice_flag = lattice_flag
         self.selective = selective
+        self.velocities = None # N * 3 np.array, cartesian (Ang/fs), as in CONTCAR files
         self.normalize_factor()
 
     def normalize_factor(self):
@@ -58,129 +63,82 @@ class Poscar(Build):
         Unify the factor to 1.0
         """
         if not math.isclose(self.factor, 1.0, rel_tol=1e-6):
-            self.lattice *= factor
+            self.lattice = self.lattice * self.factor
             if self.coord_type == 'cart':
-                for atom in self.atoms:
-                    atom['coord'] *= factor
+                self._coords *= self.factor
+                self.invalidate()
             self.factor = 1
 
     def from_POSCAR(self, filename = 'POSCAR'):
         """
-        Read POSCAR file.
+        Read POSCAR or CONTCAR file, see parse_poscar(). The selective dynamics
+        flags are kept as boolean arrays in the 'selective' key of the species
+        blocks, and the velocities of a CONTCAR file in Poscar.velocities.
         Args:
             filename (str): the filename of the POSCAR file. Defalut to 'POSCAR'
         """
         with open(filename, 'r') as fp:
-            lines = fp.readlines()
-
-        # Remove comments starting with '!' or "#",
-        # and remove leading/tailing spaces, EOL
-        def beautify(string):
-            string = string.strip()
-            if '!' in string:
-                string = string.split('!', 1)[0]
-            if '#' in string:
-                string = string.split('#', 1)[0]
-            string = string.strip()
-            return string
-
-        # Remove the empty lines and lines with only comments
-        for i, line in enumerate(lines):
-            lines[i] = beautify(line)
-            if not lines[i]:
-                lines.remove(lines[i])
-
-        # 1st line: comment
-        self.comment = lines[0]
-        # 2nd line: factor
-        factor = float(lines[1])
-        self.facotr = 1
-
-        reduced_lattice = []
-        self.lattice_flag = []
-        # 3rd ~ 5th line: lattice vectors
-        for i in range(2, 5):
-            line = lines[i].split()
-            vector = [float(num) for num in line[:3]]
-            reduced_lattice.append(vector)
-            if len(line) > 3:
-                self.lattice_flag.append(line[3:6])
-                for item in line[3:6]:
-                    if item not in 'TF':
-                        raise ValueError("Illegal lattice flags in {}!".format(lines[i]))
-        self.lattice = np.array(reduced_lattice) * factor
-
-        self.atoms = []
-        # 6th line: atomic species and numbers
-        if lines[5][0].isdigit(): # No line for atomic species
-            for num_str in lines[5].split():
-                self.atoms.append({'element': None, 'num': int(num_str)})
-            num_line = 6 # line for coord_type
-        else:
-            for element, num_str in zip(lines[5].split(), lines[6].split()):
-                self.atoms.append({'element': element, 'num': int(num_str)})
-            num_line = 7
-
-        # Skip "Selective Dynamics"
-        self.selective = False
-        if lines[num_line][0] in 'sS':
-            self.selective = True
-            num_line += 1
-
-        # Atomic coordination type
-        if lines[num_line][0] in "dD":
-            self.coord_type = 'direct'
-        elif lines[num_line][0] in "cC":
-            self.coord_type = 'cart'
-        else:
-            raise Exception ("Undefined coordination type in {}".format(filename))
-
-        num_line += 1
-        # Atomic positions
-        for atom in self.atoms:
-            atom['coords'] = []
-            if self.selective:
-                atom['selective'] = []
-            for i in range(atom['num']):
-                line = lines[num_line]
-                atom['coords'].append([float(num) for num in line.split()[:3]])
-                if self.selective:
-                    atom['selective'].append(line.split()[3:6])
-                num_line += 1
-
-        if self.coord_type == 'cart':
-            for atom in self.atoms:
-                atom['coords'] = np.array(atom['coords']) * factor
-        else:
-            for atom in self.atoms:
-                atom['coords'] = np.array(atom['coords'])
-
-    def write_POSCAR(self, filename):
-        """
-        Write Poscar object to a file.
+            lines = fp.read().splitlines()
+        data = parse_poscar(lines, filename)
+
+        self.comment = data['comment']
+        self.factor = 1
+        self.lattice = data['lattice']
+        self.lattice_flag = data['lattice_flag']
+        self.selective = data['selective']
+        self.coord_type = data['coord_type']
+        self.velocities = data['velocities']
+        extras = [{} for element in data['elements']]
+        if self.selective:
+            bounds = np.cumsum([0] + data['nums'])
+            for k, extra in enumerate(extras):
+                extra['selective'] = data['flags'][bounds[k] : bounds[k + 1]]
+        self._set_arrays(data['coords'], data['elements'], data['nums'], extras, copy = False)
+
+    @property
+    def selective_flags(self):
+        """
+        The selective dynamics flags of all the atoms, True if the coordinate
+        is allowed to change, True for the blocks without flags.
+        Returns:
+            self.atom_nums * 3 np.array (bool)
+        """
+        flags = np.ones((self.atom_nums, 3), dtype = bool)
+        for k, atom in enumerate(self.atoms):
+            if 'selective' in atom:
+                start, stop = self._block(k)
+                values = np.asarray(atom['selective'])
+                if values.dtype.kind in 'US':
+                    values = np.char.upper(values) == 'T'
+                flags[start : stop] = values
+        return flags
+
+    def write_POSCAR(self, filename, precision = 14):
+        """
+        Write Poscar object to a file, the blocks of the coordinates, the flags
+        and the velocities being formatted at once, see format_rows().
         Args:
         filename (str): the filename to write to.
+        precision (int): number of decimals of the lattice vectors, coordinates
+            and velocities, default to 14
         """
         # Convert bool to char
         def bool_char(val):
             """Return 'T' if  True, return 'F' if False."""
+            if isinstance(val, str):
+                return 'T' if val.upper() == 'T' else 'F'
             return 'T' if val else 'F'
 
         with open(filename, 'w') as fp:
             fp.write(self.comment + '\n')
-            fp.write('{:.14f}\n'.format(self.factor))
+            fp.write('{:.{}f}\n'.format(self.factor, precision))
 
             # Write the lattice vectors and their flags
+            lattice = format_rows(self.lattice, precision)
             if self.lattice_flag:
-                for i in range(3):
-                    bool_vector_str = [bool_char(flag) for flag in self.lattice_flag[i]]
-                    fp.write('{:.14f}    {:.14f}    {:.14f}'.format(*self.lattice[i]))
-                    fp.write('    ' + '  '.join(bool_vector_str))
-                    fp.write('\n')
-            else:
-                for i in range(3):
-                    fp.write('{:.14f}    {:.14f}    {:.14f}'.format(*self.lattice[i]))
-                    fp.write('\n')
+                lattice = ''.join(['{}    {}\n'.format(line, '  '.join([bool_char(flag) for flag in flags]))
+                                   for line, flags in zip(lattice.splitlines(), self.lattice_flag)])
+            fp.write(lattice)
 
             # Write the atomic species
             fp.write(' '.join([atom['element'] for atom in self.atoms]))
@@ -194,12 +152,11 @@ class Poscar(Build):
             # Write the coordination type
             fp.write(self.coord_type + '\n')
             # Write the atomic positions
-            for atom in self.atoms:
-                for i in range(atom['num']):
-                    fp.write('{:.14f}    {:.14f}    {:.14f}'.format(*atom['coords'][i]))
-                    if self.selective:
-                        fp.write('    ' + ' '.join([bool_char(x) for x in atom['selective'][i]]))
-                    fp.write('\n')
+            fp.write(format_rows(self._coords, precision, self.selective_flags if self.selective else None))
+            # Write the velocities
+            if self.velocities is not None:
+                fp.write('\n')
+                fp.write(format_rows(self.velocities, precision))
 ###########################################################################################
     def update_elements(self, elements):
         """
@@ -217,23 +174,8 @@ class Poscar(Build):
         idx1, idx2 (int): the index of the atoms to exchange.
             0 <= idx1, idx2 < self.get_total_nums()
         """
-        nums = [atom['num'] for atom in self.atoms]
-        ele1 = 0
-        ele2 = 0
-        for num in nums:
-            if idx1 - num <= -1:
-                break
-            else:
-                idx1 -= num
-                ele1 += 1
-        for num in nums:
-            if idx2 - num < 0:
-                break
-            else:
-                idx2 -= num
-                ele2 += 1
-        self.atoms[ele1]['reduced_coords'][idx1], self.atoms[ele2]['reduced_coords'][idx2]\
-                = self.atoms[ele2]['reduced_coords'][idx2], self.atoms[ele1]['reduced_coords'][idx1]
+        self._coords[[idx1, idx2]] = self._coords[[idx2, idx1]]
+        self.invalidate()
 
     def swap_positions(self, atom1, atom2):
         """
@@ -242,5 +184,56 @@ class Poscar(Build):
         atoms1, atom2 (tuple): (ele_idx, atom_idx)
             0 <= idx
         """
-        self.atoms[atom1[0]]['redcued_coords'][atom1[1]], self.atoms[atom2[0]]['reduced_coords'][atom2[1]]\
-              = self.atoms[atom2[0]]['reduced_coords'][atom2[1]], self.atoms[atom1[0]]['reduced_coords'][atom1[1]]
+        idx1 = self._block(atom1[0])[0] + atom1[1]
+        idx2 = self._block(atom2[0])[0] + atom2[1]
+        self.swap_idx(idx1, idx2)
+
+def write_poscars(structures, filenames, precision = 14, nthreads = 4):
+    """
+    Write many structures to POSCAR files with a pool of threads, e.g., a set of
+    displaced structures. The coordinate blocks are formatted at once (see
+    format_rows()), and the threads overlap the formatting with the writes,
+    which dominate on network file systems. The structures are consumed as they
+    are written, at most 2 * nthreads being pending, so a generator is never
+    materialized. The missing directories are created.
+    Args:
+        structures (iterable of Structure or Poscar): e.g., a list, a StructureBatch
+            or a generator
+        filenames (list(str) or str): the filenames, or a pattern formatted by the
+            index of the structure, e.g., 'disp-{:04d}/POSCAR'
+        precision (int): number of decimals, default to 14
+        nthreads (int): number of threads, default to 4
+    Returns:
+        list(str): the filenames written
+    """
+    if isinstance(filenames, str):
+        names = (filenames.format(i) for i in itertools.count())
+    else:
+        filenames = list(filenames)
+        if hasattr(structures, '__len__') and len(filenames) != len(structures):
+            raise ValueError("{} filenames given for {} structures.".format(len(filenames), len(structures)))
+        names = iter(filenames)
+
+    def write(struct, filename):
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        struct.write_POSCAR(filename, precision)
+
+    written = []
+    with ThreadPoolExecutor(nthreads) as pool:
+        pending = collections.deque()
+        for struct in structures:
+            filename = next(names, None)
+            if filename is None:
+                raise ValueError("More structures than the {} filenames given.".format(len(written)))
+            pending.append(pool.submit(write, struct, filename))
+            written.append(filename)
+            # the results raise the errors of the threads
+            if len(pending) >= 2 * nthreads:
+                pending.popleft().result()
+        while pending:
+            pending.popleft().result()
+    if not isinstance(filenames, str) and len(written) != len(filenames):
+        raise ValueError("{} filenames given for {} structures.".format(len(filenames), len(written)))
+    return written